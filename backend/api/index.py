@@ -1,187 +1,44 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import pandas as pd
 import numpy as np
 import os
+import sys
+from datetime import datetime
 
-app = Flask(__name__)
-CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'https://your-frontend-domain.vercel.app'], supports_credentials=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Load dataset
-def load_dataset():
-    try:
-        # Try multiple possible paths for Vercel
-        possible_paths = [
-            'nutrition_sampled_500.csv',
-            '../data/nutrition_sampled_500.csv',
-            'data/nutrition_sampled_500.csv',
-            './data/nutrition_sampled_500.csv',
-            '/var/task/nutrition_sampled_500.csv'
-        ]
-        
-        for path in possible_paths:
-            try:
-                df = pd.read_csv(path)
-                print(f"✅ Dataset loaded successfully from: {path}")
-                return df
-            except FileNotFoundError:
-                continue
-        
-        print("❌ Dataset not found in any of the expected paths")
-        return None
-    except Exception as e:
-        print(f"❌ Error loading dataset: {e}")
-        return None
-
-# Function to categorize food based on name
-def categorize_food(food_name: str) -> str:
-    """Categorize food based on its name"""
-    name_lower = food_name.lower()
-    
-    # Protein Hewani
-    if any(word in name_lower for word in ['ayam', 'daging', 'sapi', 'kambing', 'babi', 'ikan', 'udang', 'telur', 'susu', 'keju', 'empal', 'cumi', 'penyu', 'domba']):
-        return 'Protein Hewani'
-    
-    # Makanan Pokok
-    elif any(word in name_lower for word in ['nasi', 'beras', 'jagung', 'singkong', 'ubi', 'kentang', 'mie', 'pasta', 'roti', 'oatmeal', 'ketan', 'tepung']):
-        return 'Makanan Pokok'
-    
-    # Sayuran
-    elif any(word in name_lower for word in ['bayam', 'kangkung', 'brokoli', 'wortel', 'tomat', 'terung', 'labu', 'daun', 'sayur', 'selada', 'buncis', 'kacang panjang', 'pare', 'seledri', 'bawang', 'cabai']):
-        return 'Sayuran'
-    
-    # Buah-buahan
-    elif any(word in name_lower for word in ['pisang', 'apel', 'jeruk', 'mangga', 'buah', 'nanas', 'pepaya', 'alpukat', 'jambu', 'kedondong', 'nangka', 'markisa']):
-        return 'Buah-buahan'
-    
-    # Protein Nabati
-    elif any(word in name_lower for word in ['tahu', 'tempe', 'kacang', 'kedelai', 'oncom', 'koro']):
-        return 'Protein Nabati'
-    
-    # Kue dan Snack
-    elif any(word in name_lower for word in ['kue', 'cake', 'biskuit', 'kerupuk', 'snack', 'martabak', 'putu', 'misro', 'getuk']):
-        return 'Kue dan Snack'
-    
-    # Minuman
-    elif any(word in name_lower for word in ['teh', 'kopi', 'jus', 'es', 'minuman', 'squash']):
-        return 'Minuman'
-    
-    # Bumbu dan Condiment
-    elif any(word in name_lower for word in ['bawang', 'cabai', 'merica', 'garam', 'gula', 'minyak', 'cuka', 'petis', 'rusip']):
-        return 'Bumbu dan Condiment'
-    
-    # Default
-    else:
-        return 'Lainnya'
+from catalog.conditions import HEALTH_CONDITIONS
+from catalog.food_query import FoodQuery
+from catalog.payloads import foods_payload
+from catalog.store import CatalogStore
+from catalog.ranking import top_k
+from catalog.scoring import score_catalog
 
-def estimate_fiber_sugar(food_name: str, category: str, calories: float, carbs: float) -> tuple:
-    """Estimate fiber and sugar content based on food category and characteristics"""
-    name_lower = food_name.lower()
-    
-    # Base estimates
-    fiber = 0.0
-    sugar = 0.0
-    
-    if category == 'Sayuran':
-        fiber = max(0.5, carbs * 0.3)
-        sugar = max(0.1, carbs * 0.1)
-    elif category == 'Buah-buahan':
-        fiber = max(1.0, carbs * 0.15)
-        sugar = max(2.0, carbs * 0.6)
-    elif category == 'Protein Nabati':
-        fiber = max(2.0, carbs * 0.25)
-        sugar = max(0.5, carbs * 0.05)
-    elif category == 'Makanan Pokok':
-        fiber = max(0.5, carbs * 0.08)
-        sugar = max(0.1, carbs * 0.02)
-    elif category == 'Protein Hewani':
-        fiber = 0.0
-        sugar = 0.0
-    elif category == 'Kue dan Snack':
-        fiber = max(0.1, carbs * 0.02)
-        sugar = max(1.0, carbs * 0.4)
-    else:
-        fiber = max(0.1, carbs * 0.05)
-        sugar = max(0.1, carbs * 0.1)
-    
-    return round(fiber, 1), round(sugar, 1)
+app = Flask(__name__)
+CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'https://your-frontend-domain.vercel.app'], supports_credentials=True)
 
-def calculate_health_score(food_name: str, category: str, calories: float, protein: float, fat: float, carbs: float, fiber: float, sugar: float, health_conditions: list) -> int:
-    """Calculate health score (1-5) based on nutritional content and health conditions"""
-    score = 3  # Base score
-    
-    # Calorie scoring
-    if calories <= 100:
-        score += 1
-    elif calories <= 200:
-        score += 0.5
-    elif calories > 400:
-        score -= 1
-    
-    # Protein scoring
-    if protein >= 15:
-        score += 1
-    elif protein >= 10:
-        score += 0.5
-    elif protein < 2:
-        score -= 0.5
-    
-    # Fat scoring
-    if fat <= 5:
-        score += 1
-    elif fat <= 10:
-        score += 0.5
-    elif fat > 20:
-        score -= 1
-    
-    # Carb scoring
-    if carbs <= 20:
-        score += 0.5
-    elif carbs > 50:
-        score -= 0.5
-    
-    # Fiber scoring
-    if fiber >= 3:
-        score += 1
-    elif fiber >= 1:
-        score += 0.5
-    
-    # Sugar scoring
-    if sugar <= 2:
-        score += 1
-    elif sugar <= 5:
-        score += 0.5
-    elif sugar > 15:
-        score -= 1
-    
-    # Category bonus
-    if category in ['Sayuran', 'Buah-buahan']:
-        score += 0.5
-    
-    # Health condition specific scoring
-    for condition in health_conditions:
-        if condition == 'diabetes':
-            if carbs <= 25 and sugar <= 5:
-                score += 1
-            elif carbs > 40 or sugar > 15:
-                score -= 1
-        elif condition == 'hipertensi':
-            if fat <= 10 and calories <= 300:
-                score += 1
-            elif fat > 20:
-                score -= 1
-        elif condition == 'obesitas':
-            if calories <= 150 and fat <= 5:
-                score += 1
-            elif calories > 300 or fat > 15:
-                score -= 1
-        elif condition == 'jantung':
-            if fat <= 8 and protein >= 10:
-                score += 1
-            elif fat > 15:
-                score -= 1
-    
-    return max(1, min(5, int(round(score))))
+# Shared catalog: memory-mapped from the binary snapshot when one matches the
+# CSV (or no CSV is deployed), otherwise parsed once per instance (stdlib csv,
+# no pandas); reloaded only when the file changes.  CATALOG_SNAPSHOT serves a
+# prebuilt snapshot instead, e.g. the full food dataset from catalog.ingest.
+if os.environ.get('CATALOG_SNAPSHOT'):
+    catalog_store = CatalogStore([], snapshot_paths=[os.environ['CATALOG_SNAPSHOT']])
+else:
+    catalog_store = CatalogStore([
+        'nutrition_sampled_500.csv',
+        '../data/nutrition_sampled_500.csv',
+        'data/nutrition_sampled_500.csv',
+        './data/nutrition_sampled_500.csv',
+        '/var/task/nutrition_sampled_500.csv'
+    ], snapshot_paths=[
+        'catalog_snapshot',
+        '../data/catalog_snapshot',
+        'data/catalog_snapshot',
+        '/var/task/catalog_snapshot'
+    ])
+# Pre-encode the /api/foods payload for every catalog version as it loads
+catalog_store.subscribe(foods_payload)
+catalog_store.get()
 
 @app.route('/', methods=['GET'])
 def root():
@@ -194,57 +51,37 @@ def root():
 @app.route('/api/foods', methods=['GET'])
 def get_foods():
     try:
-        df = load_dataset()
-        if df is None:
+        catalog = catalog_store.get()
+        if catalog is None:
             return jsonify({'error': 'Dataset not found'}), 404
         
-        foods = []
-        for _, food in df.iterrows():
-            food_dict = {
-                'id': food['id'],
-                'name': food['name'],
-                'calories': food['calories'],
-                'protein': food['proteins'],
-                'fat': food['fat'],
-                'carbohydrate': food['carbohydrate'],
-                'image': food.get('image', ''),
-                'category': categorize_food(food['name'])
-            }
-            foods.append(food_dict)
+        # The unfiltered listing is pre-encoded once per catalog version and
+        # honors If-None-Match; filtered/paginated queries only build one page
+        if FoodQuery.is_plain(request.args):
+            return foods_payload(catalog).response(request)
         
-        return jsonify({
-            'success': True,
-            'data': foods,
-            'total': len(foods)
-        })
+        try:
+            query = FoodQuery(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(query.run(catalog))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/health-conditions', methods=['GET'])
 def get_health_conditions():
-    """Get available health conditions"""
-    health_conditions = [
-        'diabetes',
-        'hipertensi', 
-        'obesitas',
-        'jantung',
-        'kolesterol',
-        'asam_urat',
-        'ginjal',
-        'lambung',
-        'tiroid',
-        'alergi'
-    ]
+    """Get available health conditions (every condition has scoring rules)"""
     return jsonify({
         'success': True,
-        'data': health_conditions
+        'data': HEALTH_CONDITIONS
     })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'timestamp': pd.Timestamp.now().isoformat()
+        'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/recommendations', methods=['POST'])
@@ -255,67 +92,26 @@ def get_recommendations():
         available_ingredients = data.get('available_ingredients', [])
         target_calories = data.get('target_calories', 2000)
         
-        df = load_dataset()
-        if df is None:
+        catalog = catalog_store.get()
+        if catalog is None:
             return jsonify({'error': 'Dataset not found'}), 404
         
-        recommended_foods = []
+        # Only the health-condition part of the score is computed per request;
+        # the rest comes from the feature table built at catalog load
+        features = catalog.features
+        scored = score_catalog(features, health_conditions)
         
-        for _, food in df.iterrows():
-            # Filter by available ingredients if provided
-            if available_ingredients:
-                food_name_lower = food['name'].lower()
-                ingredient_match = any(ingredient.lower() in food_name_lower for ingredient in available_ingredients)
-                if not ingredient_match:
-                    continue
-            
-            # Get category and estimate fiber/sugar
-            category = categorize_food(food['name'])
-            fiber, sugar = estimate_fiber_sugar(food['name'], category, food['calories'], food['carbohydrate'])
-            
-            # Calculate health score
-            health_score = calculate_health_score(
-                food['name'], category, food['calories'], food['proteins'], 
-                food['fat'], food['carbohydrate'], fiber, sugar, health_conditions
-            )
-            
-            # Determine health labels
-            health_labels = []
-            if food['proteins'] >= 15:
-                health_labels.append("tinggi_protein")
-            if food['fat'] <= 5:
-                health_labels.append("rendah_lemak")
-            if food['carbohydrate'] <= 20:
-                health_labels.append("rendah_karbohidrat")
-            if fiber >= 3:
-                health_labels.append("tinggi_serat")
-            if food['calories'] <= 200:
-                health_labels.append("rendah_kalori")
-            if sugar <= 2:
-                health_labels.append("rendah_gula")
-            if category in ['Sayuran', 'Buah-buahan']:
-                health_labels.append("antioksidan")
-                
-            food_dict = {
-                'name': food['name'],
-                'category': category,
-                'calories': int(food['calories']),
-                'protein': float(food['proteins']),
-                'carbohydrates': float(food['carbohydrate']),
-                'fat': float(food['fat']),
-                'fiber': fiber,
-                'sugar': sugar,
-                'health_score': health_score,
-                'health_labels': health_labels,
-                'suitable_for': health_conditions,
-                'region': 'Indonesia',
-                'description': f"{food['name']} - {category}"
-            }
-            recommended_foods.append(food_dict)
+        # Filter by available ingredients if provided (inverted name index lookup)
+        if available_ingredients:
+            candidates = catalog.ingredient_index.lookup(available_ingredients)
+        else:
+            candidates = np.arange(len(scored))
         
-        # Sort by health score and get top recommendations
-        recommended_foods.sort(key=lambda x: x['health_score'], reverse=True)
-        top_recommendations = recommended_foods[:10]
+        # Partial top-10 selection by health score (ties keep catalog order);
+        # only the winners are turned into dicts
+        top_recommendations = [
+            scored.recommendation(i, health_conditions) for i in top_k(scored.health_score, 10, candidates)
+        ]
         
         # Calculate nutrition analysis
         if top_recommendations:
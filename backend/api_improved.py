@@ -2,9 +2,21 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import joblib
 import os
-from ml_models.nutrition_analyzer_improved import ImprovedNutritionAnalyzer
+import random
+import threading
+import time
+from catalog.cache import LRUCache
+from catalog.calorie_index import CalorieIndex
+from catalog.conditions import HEALTH_CONDITIONS, condition_mask
+from catalog.food_query import FoodQuery
+from catalog.meal_plan import MEALS, MealPlan, PlanningPool, meal_plans_payload, plan_days, plan_meals, replan_day
+from catalog.payloads import foods_payload
+from catalog.store import CatalogStore
+from catalog.ranking import top_k
+from catalog.ranking_table import RankingTableStore
+from catalog.similarity import SimilarityIndex
+from catalog.scoring import CATEGORIES, score_catalog
 
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'https://your-frontend-domain.vercel.app'], supports_credentials=True)
@@ -12,6 +24,8 @@ CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000', 'https://yo
 # Initialize Nutrition Analyzer
 def initialize_nutrition_analyzer():
     try:
+        # Imported here so catalog-only workers never load the ML stack
+        from ml_models.nutrition_analyzer_improved import ImprovedNutritionAnalyzer
         analyzer = ImprovedNutritionAnalyzer()
         print("✅ Nutrition Analyzer initialized successfully")
         return analyzer
@@ -19,219 +33,59 @@ def initialize_nutrition_analyzer():
         print(f"❌ Error initializing Nutrition Analyzer: {e}")
         return None
 
-# Initialize analyzer
-nutrition_analyzer = initialize_nutrition_analyzer()
+# The analyzer is built on the first request that needs it (or by the
+# optional warm-up thread), not at import time
+nutrition_analyzer = None
+analyzer_status = {'state': 'not_loaded', 'load_seconds': None}
+analyzer_lock = threading.Lock()
 
-# Load dataset
-def load_dataset():
-    try:
-        # Try multiple possible paths
-        possible_paths = [
-            '../data/nutrition_sampled_500.csv',
-            'data/nutrition_sampled_500.csv',
-            './data/nutrition_sampled_500.csv'
-        ]
-        
-        for path in possible_paths:
-            try:
-                df = pd.read_csv(path)
-                print(f"✅ Dataset loaded successfully from: {path}")
-                return df
-            except FileNotFoundError:
-                continue
-        
-        print("❌ Dataset not found in any of the expected paths")
-        return None
-    except Exception as e:
-        print(f"❌ Error loading dataset: {e}")
-        return None
+def get_nutrition_analyzer():
+    """The shared analyzer, built once on first use; None if it failed to load"""
+    global nutrition_analyzer
+    if analyzer_status['state'] in ('ready', 'failed'):
+        return nutrition_analyzer
+    with analyzer_lock:
+        if analyzer_status['state'] not in ('ready', 'failed'):
+            analyzer_status['state'] = 'loading'
+            started = time.perf_counter()
+            nutrition_analyzer = initialize_nutrition_analyzer()
+            analyzer_status['load_seconds'] = round(time.perf_counter() - started, 3)
+            analyzer_status['state'] = 'ready' if nutrition_analyzer is not None else 'failed'
+    return nutrition_analyzer
 
-# Function to categorize food based on name
-def categorize_food(food_name: str) -> str:
-    """Categorize food based on its name"""
-    name_lower = food_name.lower()
-    
-    # Protein Hewani
-    if any(word in name_lower for word in ['ayam', 'daging', 'sapi', 'kambing', 'babi', 'ikan', 'udang', 'telur', 'susu', 'keju', 'empal', 'cumi', 'penyu', 'domba']):
-        return 'Protein Hewani'
-    
-    # Makanan Pokok
-    elif any(word in name_lower for word in ['nasi', 'beras', 'jagung', 'singkong', 'ubi', 'kentang', 'mie', 'pasta', 'roti', 'oatmeal', 'ketan', 'tepung']):
-        return 'Makanan Pokok'
-    
-    # Sayuran
-    elif any(word in name_lower for word in ['bayam', 'kangkung', 'brokoli', 'wortel', 'tomat', 'terung', 'labu', 'daun', 'sayur', 'selada', 'buncis', 'kacang panjang', 'pare', 'seledri', 'bawang', 'cabai']):
-        return 'Sayuran'
-    
-    # Buah-buahan
-    elif any(word in name_lower for word in ['pisang', 'apel', 'jeruk', 'mangga', 'buah', 'nanas', 'pepaya', 'alpukat', 'jambu', 'kedondong', 'nangka', 'markisa']):
-        return 'Buah-buahan'
-    
-    # Protein Nabati
-    elif any(word in name_lower for word in ['tahu', 'tempe', 'kacang', 'kedelai', 'oncom', 'koro']):
-        return 'Protein Nabati'
-    
-    # Kue dan Snack
-    elif any(word in name_lower for word in ['kue', 'cake', 'biskuit', 'kerupuk', 'snack', 'martabak', 'putu', 'misro', 'getuk']):
-        return 'Kue dan Snack'
-    
-    # Minuman
-    elif any(word in name_lower for word in ['teh', 'kopi', 'jus', 'es', 'minuman', 'squash']):
-        return 'Minuman'
-    
-    # Bumbu dan Condiment
-    elif any(word in name_lower for word in ['bawang', 'cabai', 'merica', 'garam', 'gula', 'minyak', 'cuka', 'petis', 'rusip']):
-        return 'Bumbu dan Condiment'
-    
-    # Default
-    else:
-        return 'Lainnya'
+def start_analyzer_warmup():
+    """Build the analyzer in a background thread so the first analysis request doesn't wait"""
+    thread = threading.Thread(target=get_nutrition_analyzer, name='analyzer-warmup', daemon=True)
+    thread.start()
+    return thread
 
-def estimate_fiber_sugar(food_name: str, category: str, calories: float, carbs: float) -> tuple:
-    """Estimate fiber and sugar content based on food category and characteristics"""
-    name_lower = food_name.lower()
-    
-    # Base estimates
-    fiber = 0.0
-    sugar = 0.0
-    
-    if category == 'Sayuran':
-        # Vegetables typically have 2-4g fiber per 100g
-        fiber = max(0.5, carbs * 0.3)  # 30% of carbs as fiber for vegetables
-        sugar = max(0.1, carbs * 0.1)  # 10% of carbs as sugar for vegetables
-        
-    elif category == 'Buah-buahan':
-        # Fruits typically have 2-4g fiber and 10-20g sugar per 100g
-        fiber = max(1.0, carbs * 0.15)  # 15% of carbs as fiber for fruits
-        sugar = max(2.0, carbs * 0.6)   # 60% of carbs as sugar for fruits
-        
-    elif category == 'Protein Nabati':
-        # Legumes typically have 5-10g fiber per 100g
-        fiber = max(2.0, carbs * 0.25)  # 25% of carbs as fiber for legumes
-        sugar = max(0.5, carbs * 0.05)  # 5% of carbs as sugar for legumes
-        
-    elif category == 'Makanan Pokok':
-        # Grains typically have 2-4g fiber per 100g
-        fiber = max(0.5, carbs * 0.08)  # 8% of carbs as fiber for grains
-        sugar = max(0.1, carbs * 0.02)  # 2% of carbs as sugar for grains
-        
-    elif category == 'Protein Hewani':
-        # Animal proteins typically have 0g fiber and 0g sugar
-        fiber = 0.0
-        sugar = 0.0
-        
-    elif category == 'Kue dan Snack':
-        # Processed foods typically have low fiber and high sugar
-        fiber = max(0.1, carbs * 0.02)  # 2% of carbs as fiber for processed foods
-        sugar = max(1.0, carbs * 0.4)   # 40% of carbs as sugar for processed foods
-        
-    else:
-        # Default estimates
-        fiber = max(0.1, carbs * 0.05)
-        sugar = max(0.1, carbs * 0.1)
-    
-    # Adjust based on specific foods
-    if 'bayam' in name_lower:
-        fiber = 2.2
-        sugar = 0.4
-    elif 'brokoli' in name_lower:
-        fiber = 2.6
-        sugar = 1.5
-    elif 'wortel' in name_lower:
-        fiber = 2.8
-        sugar = 4.7
-    elif 'pisang' in name_lower:
-        fiber = 2.6
-        sugar = 12.2
-    elif 'apel' in name_lower:
-        fiber = 2.4
-        sugar = 10.4
-    elif 'nasi merah' in name_lower or 'beras merah' in name_lower:
-        fiber = 1.8
-        sugar = 0.4
-    elif 'oatmeal' in name_lower:
-        fiber = 2.8
-        sugar = 0.3
-    
-    return round(fiber, 1), round(sugar, 1)
+# Set ANALYZER_WARMUP=1 on workers that serve the analysis endpoints
+if os.environ.get('ANALYZER_WARMUP') == '1':
+    start_analyzer_warmup()
 
-def calculate_health_score(food_name: str, category: str, calories: float, protein: float, fat: float, carbs: float, fiber: float, sugar: float, health_conditions: list) -> int:
-    """Calculate health score (1-5) based on nutritional content and health conditions"""
-    score = 3  # Base score
-    
-    # Calorie scoring
-    if calories <= 100:
-        score += 1
-    elif calories <= 200:
-        score += 0.5
-    elif calories > 400:
-        score -= 1
-    
-    # Protein scoring
-    if protein >= 15:
-        score += 1
-    elif protein >= 10:
-        score += 0.5
-    elif protein < 2:
-        score -= 0.5
-    
-    # Fat scoring
-    if fat <= 5:
-        score += 1
-    elif fat <= 10:
-        score += 0.5
-    elif fat > 20:
-        score -= 1
-    
-    # Carb scoring
-    if carbs <= 20:
-        score += 0.5
-    elif carbs > 50:
-        score -= 0.5
-    
-    # Fiber scoring
-    if fiber >= 3:
-        score += 1
-    elif fiber >= 1:
-        score += 0.5
-    
-    # Sugar scoring
-    if sugar <= 2:
-        score += 1
-    elif sugar <= 5:
-        score += 0.5
-    elif sugar > 15:
-        score -= 1
-    
-    # Category bonus
-    if category in ['Sayuran', 'Buah-buahan']:
-        score += 0.5
-    
-    # Health condition specific scoring
-    for condition in health_conditions:
-        if condition == 'diabetes':
-            if carbs <= 25 and sugar <= 5:
-                score += 1
-            elif carbs > 40 or sugar > 15:
-                score -= 1
-        elif condition == 'hipertensi':
-            if fat <= 10 and calories <= 300:
-                score += 1
-            elif fat > 20:
-                score -= 1
-        elif condition == 'obesitas':
-            if calories <= 150 and fat <= 5:
-                score += 1
-            elif calories > 300 or fat > 15:
-                score -= 1
-        elif condition == 'jantung':
-            if fat <= 8 and protein >= 10:
-                score += 1
-            elif fat > 15:
-                score -= 1
-    
-    # Ensure score is between 1 and 5
-    return max(1, min(5, int(round(score))))
+# Shared catalog: loaded once at startup (memory-mapped from the binary
+# snapshot when one matches the CSV), reloaded only when the file changes.
+# CATALOG_SNAPSHOT serves a prebuilt snapshot instead, e.g. the full food
+# dataset from catalog.ingest.
+if os.environ.get('CATALOG_SNAPSHOT'):
+    catalog_store = CatalogStore([], snapshot_paths=[os.environ['CATALOG_SNAPSHOT']])
+else:
+    catalog_store = CatalogStore([
+        '../data/nutrition_sampled_500.csv',
+        'data/nutrition_sampled_500.csv',
+        './data/nutrition_sampled_500.csv'
+    ], snapshot_paths=[
+        '../data/catalog_snapshot',
+        'data/catalog_snapshot'
+    ])
+# Pre-encode the /api/foods payload for every catalog version as it loads
+catalog_store.subscribe(foods_payload)
+catalog_store.get()
+
+# Response cache for /api/recommendations and seeded /api/food-recommendations,
+# emptied whenever the catalog reloads
+recommendation_cache = LRUCache(maxsize=512, ttl=300)
+catalog_store.subscribe(lambda catalog: recommendation_cache.clear())
 
 @app.route('/', methods=['GET'])
 def root():
@@ -244,28 +98,81 @@ def root():
 @app.route('/api/foods', methods=['GET'])
 def get_foods():
     try:
-        df = load_dataset()
-        if df is None:
+        catalog = catalog_store.get()
+        if catalog is None:
             return jsonify({'error': 'Dataset not found'}), 404
         
-        foods = []
-        for _, food in df.iterrows():
-            food_dict = {
-                'id': food['id'],
-                'name': food['name'],
-                'calories': food['calories'],
-                'protein': food['proteins'],
-                'fat': food['fat'],
-                'carbohydrate': food['carbohydrate'],
-                'image': food.get('image', ''),
-                'category': categorize_food(food['name'])  # Add category
+        # The unfiltered listing is pre-encoded once per catalog version and
+        # honors If-None-Match; filtered/paginated queries only build one page
+        if FoodQuery.is_plain(request.args):
+            return foods_payload(catalog).response(request)
+        
+        try:
+            query = FoodQuery(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(query.run(catalog))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def food_rows(catalog) -> dict:
+    """Catalog row of every food id"""
+    return catalog.derived('food_rows', lambda catalog: {
+        food_id: row for row, food_id in enumerate(catalog.table['id'].tolist())
+    })
+
+# Most neighbours /api/foods/<id>/similar returns
+MAX_SIMILAR = 50
+
+@app.route('/api/foods/<int:food_id>/similar', methods=['GET'])
+def get_similar_foods(food_id):
+    """Foods with the closest nutrient profile; healthier=true keeps only higher health scores"""
+    try:
+        try:
+            k = int(request.args.get('k', 5))
+        except ValueError:
+            return jsonify({'error': "'k' must be an integer"}), 400
+        if not 1 <= k <= MAX_SIMILAR:
+            return jsonify({'error': f"'k' must be from 1 to {MAX_SIMILAR}"}), 400
+        healthier = request.args.get('healthier', 'false').lower() in ('1', 'true', 'yes')
+        health_conditions = [condition.strip() for value in request.args.getlist('health_conditions')
+                             for condition in value.split(',') if condition.strip()]
+        
+        catalog = catalog_store.get()
+        if catalog is None:
+            return jsonify({'error': 'Dataset not found'}), 404
+        row = food_rows(catalog).get(food_id)
+        if row is None:
+            return jsonify({'error': f'Food {food_id} not found'}), 404
+        
+        # KD-tree over standardized nutrient vectors, built once per catalog version
+        index = catalog.derived('similarity_index', lambda catalog: SimilarityIndex(catalog.features))
+        scored = score_catalog(catalog.features, health_conditions)
+        allowed = scored.health_score > scored.health_score[row] if healthier else None
+        rows, distances = index.similar(row, k, allowed)
+        
+        ids = catalog.table['id']
+        
+        def food(i):
+            return {
+                'id': int(ids[i]),
+                'name': scored.names[i],
+                'calories': float(scored.calories[i]),
+                'protein': float(scored.proteins[i]),
+                'fat': float(scored.fat[i]),
+                'carbohydrate': float(scored.carbohydrate[i]),
+                'fiber': float(scored.fiber[i]),
+                'sugar': float(scored.sugar[i]),
+                'category': scored.category(i),
+                'health_score': int(scored.health_score[i])
             }
-            foods.append(food_dict)
         
         return jsonify({
             'success': True,
-            'data': foods,
-            'total': len(foods)
+            'food': food(row),
+            'similar': [dict(food(i), distance=round(distance, 3)) for i, distance in zip(rows.tolist(), distances.tolist())],
+            'healthier': healthier
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -280,6 +187,7 @@ def analyze_nutrition():
             'carbohydrate': data.get('carbohydrate', 0)
         }
         
+        nutrition_analyzer = get_nutrition_analyzer()
         if nutrition_analyzer is None:
             return jsonify({'error': 'Nutrition analyzer not initialized'}), 500
         
@@ -292,301 +200,517 @@ def analyze_nutrition():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Upper bound on foods per /api/analyze-nutrition/batch request
+MAX_ANALYSIS_BATCH = 1000
+
+def analysis_inputs(food) -> dict:
+    """Analyzer input for one batch item (ValueError unless it is an object of non-negative numbers)"""
+    if not isinstance(food, dict):
+        raise ValueError("Each food must be an object")
+    inputs = {}
+    for field, name in (('protein', 'proteins'), ('fat', 'fat'), ('carbohydrate', 'carbohydrate')):
+        value = food.get(field, 0)
+        try:
+            number = float(value) if not isinstance(value, bool) else np.nan
+        except (TypeError, ValueError):
+            number = np.nan
+        if not np.isfinite(number) or number < 0:
+            raise ValueError(f"'{field}' must be a non-negative number")
+        inputs[name] = number
+    return inputs
+
+@app.route('/api/analyze-nutrition/batch', methods=['POST'])
+def analyze_nutrition_batch():
+    """Analyze many foods (a meal, a day log) with one model pass per batch.
+
+    An invalid food gets an ``{'error': ...}`` entry in its place; the other
+    foods are still analyzed.
+    """
+    try:
+        data = request.get_json()
+        foods = data.get('foods') if isinstance(data, dict) else None
+        if not isinstance(foods, list):
+            return jsonify({'error': "'foods' must be a list of objects"}), 400
+        if len(foods) > MAX_ANALYSIS_BATCH:
+            return jsonify({'error': f"At most {MAX_ANALYSIS_BATCH} foods per batch"}), 400
+        
+        nutrition_analyzer = get_nutrition_analyzer()
+        if nutrition_analyzer is None:
+            return jsonify({'error': 'Nutrition analyzer not initialized'}), 500
+        
+        items = []
+        for food in foods:
+            try:
+                items.append(analysis_inputs(food))
+            except ValueError as e:
+                items.append({'error': str(e)})
+        valid = [item for item in items if 'error' not in item]
+        analyses = iter(nutrition_analyzer.analyze_foods_nutrition(valid))
+        results = [item if 'error' in item else next(analyses) for item in items]
+        
+        return jsonify({
+            'success': True,
+            'analyses': results,
+            'total': len(results),
+            'errors': len(results) - len(valid)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_target_calories(value):
+    """``target_calories`` from a request body: a positive number, numeric strings included (ValueError otherwise).
+
+    Whole numbers come back as ``int`` so that ``2000`` and ``"2000"`` share
+    cache entries and are echoed the same way.
+    """
+    error = "'target_calories' must be a positive number"
+    if isinstance(value, bool):
+        raise ValueError(error)
+    try:
+        target = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(error) from None
+    if not np.isfinite(target) or target <= 0:
+        raise ValueError(error)
+    return int(target) if target.is_integer() else target
+
+def recommendation_cache_key(health_conditions: list, available_ingredients: list, target_calories, catalog_version: str) -> tuple:
+    """Canonical cache key for a /api/recommendations request.
+
+    Conditions enter as the same ``condition_mask`` the scoring uses: each
+    known condition counts once, whatever its order or repetition, and
+    unknown ones are ignored.  Ingredient matching is a case-insensitive
+    union, so ingredients are normalized the same way.
+    """
+    return (
+        condition_mask(health_conditions),
+        tuple(sorted({ingredient.lower() for ingredient in available_ingredients})),
+        target_calories,
+        catalog_version
+    )
+
+def build_recommendations(catalog, health_conditions: list, available_ingredients: list, target_calories) -> dict:
+    """Ranked foods, nutrition analysis and meal plans for one request.
+
+    The result only depends on the cache key, so it is shared between
+    requests; callers must not modify it.
+    """
+    # Only the health-condition part of the score is computed per request;
+    # the rest comes from the feature table built at catalog load
+    features = catalog.features
+    scored = score_catalog(features, health_conditions)
+    
+    # Filter by available ingredients if provided (inverted name index lookup)
+    if available_ingredients:
+        candidates = catalog.ingredient_index.lookup(available_ingredients)
+    else:
+        candidates = np.arange(len(scored))
+    
+    # Partial top-10 selection by health score (ties keep catalog order);
+    # only the winners are turned into dicts
+    top_recommendations = [
+        scored.recommendation(i, health_conditions) for i in top_k(scored.health_score, 10, candidates)
+    ]
+    
+    # If no recommendations found, provide general healthy foods
+    general_fallback = not top_recommendations
+    if general_fallback:
+        general_healthy = np.flatnonzero(
+            (scored.calories <= 300) & 
+            (scored.fat <= 15) & 
+            (scored.carbohydrate <= 40)
+        )[:10]
+        top_recommendations = [
+            scored.recommendation(i, health_conditions, health_labels=['sehat']) for i in general_healthy
+        ]
+    
+    # Calculate nutrition analysis
+    if top_recommendations:
+        total_calories = sum(food['calories'] for food in top_recommendations)
+        total_protein = sum(food['protein'] for food in top_recommendations)
+        total_carbs = sum(food['carbohydrates'] for food in top_recommendations)
+        total_fat = sum(food['fat'] for food in top_recommendations)
+        total_fiber = sum(food['fiber'] for food in top_recommendations)
+        total_sugar = sum(food['sugar'] for food in top_recommendations)
+        
+        nutrition_analysis = {
+            'total_calories': total_calories,
+            'protein_percentage': round((total_protein * 4 / total_calories * 100) if total_calories > 0 else 0, 1),
+            'carb_percentage': round((total_carbs * 4 / total_calories * 100) if total_calories > 0 else 0, 1),
+            'fat_percentage': round((total_fat * 9 / total_calories * 100) if total_calories > 0 else 0, 1),
+            'fiber_content': round(total_fiber, 1),
+            'sugar_content': round(total_sugar, 1)
+        }
+    else:
+        nutrition_analysis = {
+            'total_calories': 0,
+            'protein_percentage': 0,
+            'carb_percentage': 0,
+            'fat_percentage': 0,
+            'fiber_content': 0,
+            'sugar_content': 0
+        }
+    
+    # The few low-calorie fallback foods can't reach a calorie target, so
+    # no plan is made from them
+    if target_calories is None or general_fallback:
+        meal_plans = {'meal_plans': [], 'meal_plan_summary': None}
+    else:
+        meal_plans = build_meal_plans(catalog, scored, candidates, target_calories, top_recommendations)
+    
+    return {
+        'recommended_foods': top_recommendations,
+        'nutrition_analysis': nutrition_analysis,
+        **meal_plans
+    }
+
+def split_meal_plans(top_recommendations: list) -> list:
+    """Breakfast from the two best foods and lunch from the next three"""
+    meal_plans = []
+    if top_recommendations:
+        # Breakfast plan
+        breakfast_foods = top_recommendations[:2]
+        breakfast_calories = sum(food['calories'] for food in breakfast_foods)
+        meal_plans.append({
+            'meal_type': 'Sarapan Sehat',
+            'total_calories': breakfast_calories,
+            'foods': [{'name': food['name'], 'calories': food['calories']} for food in breakfast_foods],
+            'nutrition': {
+                'protein': sum(food['protein'] for food in breakfast_foods),
+                'carbohydrates': sum(food['carbohydrates'] for food in breakfast_foods),
+                'fat': sum(food['fat'] for food in breakfast_foods)
+            }
+        })
+        
+        # Lunch plan
+        lunch_foods = top_recommendations[2:5]
+        if lunch_foods:
+            lunch_calories = sum(food['calories'] for food in lunch_foods)
+            meal_plans.append({
+                'meal_type': 'Makan Siang Bergizi',
+                'total_calories': lunch_calories,
+                'foods': [{'name': food['name'], 'calories': food['calories']} for food in lunch_foods],
+                'nutrition': {
+                    'protein': sum(food['protein'] for food in lunch_foods),
+                    'carbohydrates': sum(food['carbohydrates'] for food in lunch_foods),
+                    'fat': sum(food['fat'] for food in lunch_foods)
+                }
+            })
+    return meal_plans
+
+# Search time per meal plan; the best plan found so far is returned after it
+MEAL_PLAN_BUDGET = float(os.environ.get('MEAL_PLAN_BUDGET_MS', '50')) / 1000
+
+def meal_plan_summary(meal_plans: list, target_calories, optimal: bool) -> dict:
+    """Calorie, macro and health-score totals of one day's meal plans"""
+    energy = {
+        'protein': sum(meal['nutrition']['protein'] for meal in meal_plans) * 4,
+        'carb': sum(meal['nutrition']['carbohydrates'] for meal in meal_plans) * 4,
+        'fat': sum(meal['nutrition']['fat'] for meal in meal_plans) * 9
+    }
+    macro_energy = sum(energy.values())
+    return {
+        'target_calories': target_calories,
+        'total_calories': sum(meal['total_calories'] for meal in meal_plans),
+        'health_score': sum(food['health_score'] for meal in meal_plans for food in meal['foods']),
+        **{f'{name}_percentage': round(value / macro_energy * 100 if macro_energy > 0 else 0, 1)
+           for name, value in energy.items()},
+        'optimal': optimal
+    }
+
+def build_meal_plans(catalog, scored, candidates: np.ndarray, target_calories, top_recommendations: list) -> dict:
+    """Breakfast, lunch and dinner for ``target_calories`` with the best total health score"""
+    plan = plan_meals(scored, candidates, target_calories, MEAL_PLAN_BUDGET)
+    if plan is None:
+        # Too few candidates to fill three meals
+        return {'meal_plans': split_meal_plans(top_recommendations), 'meal_plan_summary': None}
+    
+    meal_plans = meal_plans_payload(scored, plan, target_calories, catalog.table['id'])
+    return {'meal_plans': meal_plans, 'meal_plan_summary': meal_plan_summary(meal_plans, target_calories, plan.optimal)}
+
+def build_ranking_entry(catalog, health_conditions: list) -> dict:
+    """Ingredient-free recommendations; suitable_for and meal plans are filled in per request"""
+    result = build_recommendations(catalog, health_conditions, [], None)
+    result['recommended_foods'] = [dict(food, suitable_for=[]) for food in result['recommended_foods']]
+    return result
+
+# Ingredient-free results for every health-condition combination, rebuilt in
+# the background whenever the catalog reloads; requests are computed live
+# (through the response cache) until it is ready or if it exceeds its budget
+ranking_tables = RankingTableStore(
+    build_ranking_entry, max_bytes=int(float(os.environ.get('RANKING_TABLE_MAX_MB', '32')) * 1024 * 1024)
+)
+if os.environ.get('RANKING_TABLE', '1') == '1':
+    catalog_store.subscribe(ranking_tables.rebuild)
+    if catalog_store.get() is not None:
+        ranking_tables.rebuild(catalog_store.get())
+
+def build_health_advice(health_conditions: list) -> list:
+    """Generate health advice based on conditions"""
+    health_advice = []
+    for condition in health_conditions:
+        if condition == 'diabetes':
+            health_advice.extend([
+                "Konsumsi makanan rendah gula dan tinggi serat",
+                "Pilih karbohidrat kompleks seperti nasi merah",
+                "Batasi makanan dengan indeks glikemik tinggi"
+            ])
+        elif condition == 'hipertensi':
+            health_advice.extend([
+                "Batasi konsumsi garam dan makanan tinggi lemak",
+                "Konsumsi makanan kaya kalium seperti pisang",
+                "Pilih makanan rendah sodium"
+            ])
+        elif condition == 'obesitas':
+            health_advice.extend([
+                "Pilih makanan rendah kalori dan tinggi serat",
+                "Konsumsi protein lean untuk kenyang lebih lama",
+                "Batasi makanan berlemak tinggi"
+            ])
+        elif condition == 'jantung':
+            health_advice.extend([
+                "Pilih makanan rendah lemak jenuh",
+                "Konsumsi makanan kaya omega-3",
+                "Batasi makanan tinggi kolesterol"
+            ])
+    
+    return health_advice
+
 @app.route('/api/recommendations', methods=['POST'])
 def get_recommendations():
     try:
         data = request.get_json()
         health_conditions = data.get('health_conditions', [])
         available_ingredients = data.get('available_ingredients', [])
-        target_calories = data.get('target_calories', 2000)
+        try:
+            target_calories = parse_target_calories(data.get('target_calories', 2000))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        df = load_dataset()
-        if df is None:
+        catalog = catalog_store.get()
+        if catalog is None:
             return jsonify({'error': 'Dataset not found'}), 404
         
-        recommended_foods = []
-        
-        for _, food in df.iterrows():
-            score = 0
-            
-            # Filter by available ingredients if provided
-            if available_ingredients:
-                food_name_lower = food['name'].lower()
-                ingredient_match = any(ingredient.lower() in food_name_lower for ingredient in available_ingredients)
-                if not ingredient_match:
-                    continue  # Skip foods that don't match available ingredients
-            
-            # Get category and estimate fiber/sugar
-            category = categorize_food(food['name'])
-            fiber, sugar = estimate_fiber_sugar(food['name'], category, food['calories'], food['carbohydrate'])
-            
-            # Calculate health score using new function
-            health_score = calculate_health_score(
-                food['name'], category, food['calories'], food['proteins'], 
-                food['fat'], food['carbohydrate'], fiber, sugar, health_conditions
-            )
-            
-            # Determine health labels
-            health_labels = []
-            if food['proteins'] >= 15:
-                health_labels.append("tinggi_protein")
-            if food['fat'] <= 5:
-                health_labels.append("rendah_lemak")
-            if food['carbohydrate'] <= 20:
-                health_labels.append("rendah_karbohidrat")
-            if fiber >= 3:
-                health_labels.append("tinggi_serat")
-            if food['calories'] <= 200:
-                health_labels.append("rendah_kalori")
-            if sugar <= 2:
-                health_labels.append("rendah_gula")
-            if category in ['Sayuran', 'Buah-buahan']:
-                health_labels.append("antioksidan")
-            
-            food_dict = {
-                'name': food['name'],
-                'category': category,
-                'calories': int(food['calories']),
-                'protein': float(food['proteins']),
-                'carbohydrates': float(food['carbohydrate']),
-                'fat': float(food['fat']),
-                'fiber': fiber,
-                'sugar': sugar,
-                'health_score': health_score,
-                'health_labels': health_labels,
-                'suitable_for': health_conditions,
-                'region': 'Indonesia',
-                'description': f"{food['name']} - {category}"
-            }
-            recommended_foods.append(food_dict)
-        
-        # Sort by health score and get top recommendations
-        recommended_foods.sort(key=lambda x: x['health_score'], reverse=True)
+        # Ingredient-free requests are a lookup in the materialized ranking
+        # table, plus meal plans for the calorie target; everything else is
+        # served from the response cache
+        key = recommendation_cache_key(health_conditions, available_ingredients, target_calories, catalog.version)
+        table = None if available_ingredients else ranking_tables.get(catalog.version)
+        if table is not None:
+            result = table.lookup(condition_mask(health_conditions))
+            meal_plans = recommendation_cache.get(('meal-plans',) + key)
+            if meal_plans is None:
+                scored = score_catalog(catalog.features, health_conditions)
+                meal_plans = build_meal_plans(catalog, scored, np.arange(len(scored)), target_calories,
+                                              result['recommended_foods'])
+                recommendation_cache.put(('meal-plans',) + key, meal_plans)
+            result = dict(result, **meal_plans)
+        else:
+            result = recommendation_cache.get(key)
+            if result is None:
+                result = build_recommendations(catalog, health_conditions, available_ingredients, target_calories)
+                recommendation_cache.put(key, result)
         
-        # Limit to top 10 recommendations for variety
-        top_recommendations = recommended_foods[:10]
+        return jsonify({
+            'success': True,
+            'recommended_foods': [
+                dict(food, suitable_for=health_conditions) for food in result['recommended_foods']
+            ],
+            'nutrition_analysis': result['nutrition_analysis'],
+            'health_advice': build_health_advice(health_conditions),
+            'meal_plans': result['meal_plans'],
+            'meal_plan_summary': result['meal_plan_summary']
+        })
+    except Exception as e:
+        print(f"Error in recommendations: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Longest plan /api/meal-plan returns
+MAX_PLAN_DAYS = 28
+
+def plan_rows(days: list, rows_by_id: dict) -> list:
+    """Food rows per meal of a previously returned ``days`` list (ValueError if malformed)"""
+    plans = []
+    for day in days:
+        meals = day.get('meal_plans') if isinstance(day, dict) else None
+        if meals == []:
+            # A day that could not be filled
+            plans.append(None)
+            continue
+        if not isinstance(meals, list) or len(meals) != len(MEALS):
+            raise ValueError(f"Every day of 'plan' needs {len(MEALS)} meal_plans")
+        try:
+            meal_rows = [np.array([rows_by_id[food['id']] for food in meal['foods']], dtype=np.int64) for meal in meals]
+        except (KeyError, TypeError):
+            raise ValueError("'plan' contains unknown foods")
+        optimal = bool((day.get('meal_plan_summary') or {}).get('optimal', True))
+        plans.append(MealPlan(meal_rows, 0.0, optimal, 0, 0.0))
+    return plans
+
+@app.route('/api/meal-plan', methods=['POST'])
+def get_meal_plan():
+    """N-day meal plan without foods repeated within variety_days; swap re-plans a single day"""
+    try:
+        data = request.get_json()
+        health_conditions = data.get('health_conditions', [])
+        available_ingredients = data.get('available_ingredients', [])
+        days = data.get('days', 7)
+        variety_days = data.get('variety_days', 3)
+        swap = data.get('swap')
+        try:
+            target_calories = parse_target_calories(data.get('target_calories', 2000))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= MAX_PLAN_DAYS:
+            return jsonify({'error': f"'days' must be an integer from 1 to {MAX_PLAN_DAYS}"}), 400
+        if not isinstance(variety_days, int) or isinstance(variety_days, bool) or variety_days < 1:
+            return jsonify({'error': "'variety_days' must be a positive integer"}), 400
+        
+        catalog = catalog_store.get()
+        if catalog is None:
+            return jsonify({'error': 'Dataset not found'}), 404
         
-        # If no recommendations found, provide general healthy foods
-        if not top_recommendations:
-            general_healthy = df[
-                (df['calories'] <= 300) & 
-                (df['fat'] <= 15) & 
-                (df['carbohydrate'] <= 40)
-            ].head(10)
-            
-            for _, food in general_healthy.iterrows():
-                category = categorize_food(food['name'])
-                fiber, sugar = estimate_fiber_sugar(food['name'], category, food['calories'], food['carbohydrate'])
-                health_score = calculate_health_score(
-                    food['name'], category, food['calories'], food['proteins'], 
-                    food['fat'], food['carbohydrate'], fiber, sugar, health_conditions
-                )
-                
-                food_dict = {
-                    'name': food['name'],
-                    'category': category,
-                    'calories': int(food['calories']),
-                    'protein': float(food['proteins']),
-                    'carbohydrates': float(food['carbohydrate']),
-                    'fat': float(food['fat']),
-                    'fiber': fiber,
-                    'sugar': sugar,
-                    'health_score': health_score,
-                    'health_labels': ['sehat'],
-                    'suitable_for': health_conditions,
-                    'region': 'Indonesia',
-                    'description': f"{food['name']} - {category}"
-                }
-                top_recommendations.append(food_dict)
+        # Scored and ranked once, shared by every day of the plan
+        scored = score_catalog(catalog.features, health_conditions)
+        candidates = catalog.ingredient_index.lookup(available_ingredients) if available_ingredients \
+            else np.arange(len(scored))
+        pool = PlanningPool(scored, candidates, target_calories, depth=min(variety_days, days))
         
-        # Calculate nutrition analysis
-        if top_recommendations:
-            total_calories = sum(food['calories'] for food in top_recommendations)
-            total_protein = sum(food['protein'] for food in top_recommendations)
-            total_carbs = sum(food['carbohydrates'] for food in top_recommendations)
-            total_fat = sum(food['fat'] for food in top_recommendations)
-            total_fiber = sum(food['fiber'] for food in top_recommendations)
-            total_sugar = sum(food['sugar'] for food in top_recommendations)
-            
-            nutrition_analysis = {
-                'total_calories': total_calories,
-                'protein_percentage': round((total_protein * 4 / total_calories * 100) if total_calories > 0 else 0, 1),
-                'carb_percentage': round((total_carbs * 4 / total_calories * 100) if total_calories > 0 else 0, 1),
-                'fat_percentage': round((total_fat * 9 / total_calories * 100) if total_calories > 0 else 0, 1),
-                'fiber_content': round(total_fiber, 1),
-                'sugar_content': round(total_sugar, 1)
-            }
+        if swap is None:
+            plans = plan_days(pool, days, variety_days, MEAL_PLAN_BUDGET)
         else:
-            nutrition_analysis = {
-                'total_calories': 0,
-                'protein_percentage': 0,
-                'carb_percentage': 0,
-                'fat_percentage': 0,
-                'fiber_content': 0,
-                'sugar_content': 0
-            }
-        
-        # Generate health advice based on conditions
-        health_advice = []
-        for condition in health_conditions:
-            if condition == 'diabetes':
-                health_advice.extend([
-                    "Konsumsi makanan rendah gula dan tinggi serat",
-                    "Pilih karbohidrat kompleks seperti nasi merah",
-                    "Batasi makanan dengan indeks glikemik tinggi"
-                ])
-            elif condition == 'hipertensi':
-                health_advice.extend([
-                    "Batasi konsumsi garam dan makanan tinggi lemak",
-                    "Konsumsi makanan kaya kalium seperti pisang",
-                    "Pilih makanan rendah sodium"
-                ])
-            elif condition == 'obesitas':
-                health_advice.extend([
-                    "Pilih makanan rendah kalori dan tinggi serat",
-                    "Konsumsi protein lean untuk kenyang lebih lama",
-                    "Batasi makanan berlemak tinggi"
-                ])
-            elif condition == 'jantung':
-                health_advice.extend([
-                    "Pilih makanan rendah lemak jenuh",
-                    "Konsumsi makanan kaya omega-3",
-                    "Batasi makanan tinggi kolesterol"
-                ])
-        
-        # Create meal plans
-        meal_plans = []
-        if top_recommendations:
-            # Breakfast plan
-            breakfast_foods = top_recommendations[:2]
-            breakfast_calories = sum(food['calories'] for food in breakfast_foods)
-            meal_plans.append({
-                'meal_type': 'Sarapan Sehat',
-                'total_calories': breakfast_calories,
-                'foods': [{'name': food['name'], 'calories': food['calories']} for food in breakfast_foods],
-                'nutrition': {
-                    'protein': sum(food['protein'] for food in breakfast_foods),
-                    'carbohydrates': sum(food['carbohydrates'] for food in breakfast_foods),
-                    'fat': sum(food['fat'] for food in breakfast_foods)
-                }
+            # Swap one meal: only its day is planned again, without that meal's foods
+            previous = data.get('plan')
+            if not isinstance(previous, list) or len(previous) != days:
+                return jsonify({'error': f"'swap' needs the {days}-day 'plan' it changes"}), 400
+            meal_types = [meal_type for meal_type, _ in MEALS]
+            day = swap.get('day') if isinstance(swap, dict) else None
+            meal_type = swap.get('meal_type') if isinstance(swap, dict) else None
+            if not isinstance(day, int) or isinstance(day, bool) or not 1 <= day <= days or meal_type not in meal_types:
+                return jsonify({'error': f"'swap' needs a 'day' from 1 to {days} and a 'meal_type' of {meal_types}"}), 400
+            try:
+                plans = plan_rows(previous, food_rows(catalog))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            banned = plans[day - 1].meals[meal_types.index(meal_type)] if plans[day - 1] is not None else ()
+            plans[day - 1] = replan_day(pool, plans, day - 1, variety_days, banned, MEAL_PLAN_BUDGET)
+        
+        ids = catalog.table['id']
+        plan_days_payload = []
+        for day, plan in enumerate(plans, start=1):
+            if plan is None:
+                # Not enough different foods left for this day
+                plan_days_payload.append({'day': day, 'meal_plans': [], 'meal_plan_summary': None})
+                continue
+            meal_plans = meal_plans_payload(scored, plan, target_calories, ids)
+            plan_days_payload.append({
+                'day': day,
+                'meal_plans': meal_plans,
+                'meal_plan_summary': meal_plan_summary(meal_plans, target_calories, plan.optimal)
             })
-            
-            # Lunch plan
-            lunch_foods = top_recommendations[2:5]
-            if lunch_foods:
-                lunch_calories = sum(food['calories'] for food in lunch_foods)
-                meal_plans.append({
-                    'meal_type': 'Makan Siang Bergizi',
-                    'total_calories': lunch_calories,
-                    'foods': [{'name': food['name'], 'calories': food['calories']} for food in lunch_foods],
-                    'nutrition': {
-                        'protein': sum(food['protein'] for food in lunch_foods),
-                        'carbohydrates': sum(food['carbohydrates'] for food in lunch_foods),
-                        'fat': sum(food['fat'] for food in lunch_foods)
-                    }
-                })
         
         return jsonify({
             'success': True,
-            'recommended_foods': top_recommendations,
-            'nutrition_analysis': nutrition_analysis,
-            'health_advice': health_advice,
-            'meal_plans': meal_plans
+            'days': plan_days_payload,
+            'target_calories': target_calories,
+            'variety_days': variety_days
         })
     except Exception as e:
-        print(f"Error in recommendations: {e}")
+        print(f"Error in meal plan: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Foods whose distance to the calorie target is within this fraction of the
+# target of the cut-off food's distance count as near-ties
+NEAR_TIE_FRACTION = 0.01
+MAX_FOOD_RECOMMENDATIONS = 50
+
+def build_food_recommendations(catalog, target_calories, max_recommendations: int, seed: int) -> list:
+    """The foods closest to ``target_calories``; near-ties at the cut-off are drawn with ``seed``"""
+    # Calorie-sorted index (searchsorted plus a walk outward), built once per catalog version
+    index = catalog.derived('calorie_index', lambda catalog: CalorieIndex(catalog.features.calories))
+    rows = index.sample_nearest(target_calories, max_recommendations, random.Random(seed),
+                                tolerance=abs(target_calories) * NEAR_TIE_FRACTION)
+    
+    table = catalog.table
+    images = table['image'][rows].tolist() if 'image' in table else [''] * len(rows)
+    return [
+        {
+            'name': name,
+            'calories': calories,
+            'protein': protein,
+            'fat': fat,
+            'carbohydrate': carbohydrate,
+            'image': image,
+            'category': CATEGORIES[code]
+        }
+        for name, calories, protein, fat, carbohydrate, image, code in zip(
+            table['name'][rows].tolist(), table['calories'][rows].tolist(), table['proteins'][rows].tolist(),
+            table['fat'][rows].tolist(), table['carbohydrate'][rows].tolist(), images,
+            catalog.features.category_codes[rows].tolist()
+        )
+    ]
+
 @app.route('/api/food-recommendations', methods=['POST'])
 def get_food_recommendations():
     try:
         data = request.get_json()
-        target_calories = data.get('target_calories', 500)
+        try:
+            target_calories = parse_target_calories(data.get('target_calories', 500))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         max_recommendations = data.get('max_recommendations', 5)
-        
-        df = load_dataset()
-        if df is None:
+        if not isinstance(max_recommendations, int) or isinstance(max_recommendations, bool) \
+                or not 1 <= max_recommendations <= MAX_FOOD_RECOMMENDATIONS:
+            return jsonify({'error': f"'max_recommendations' must be an integer from 1 to {MAX_FOOD_RECOMMENDATIONS}"}), 400
+        
+        # A client seed makes the response reproducible (and cacheable);
+        # without one a seed is drawn and returned so it can be replayed
+        seed = data.get('seed')
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+            return jsonify({'error': "'seed' must be an integer"}), 400
+        
+        catalog = catalog_store.get()
+        if catalog is None:
             return jsonify({'error': 'Dataset not found'}), 404
         
-        # Calculate calorie range (±20% of target)
-        calorie_range = target_calories * 0.2
-        min_calories = target_calories - calorie_range
-        max_calories = target_calories + calorie_range
-        
-        # Filter foods within calorie range
-        suitable_foods = df[
-            (df['calories'] >= min_calories) & 
-            (df['calories'] <= max_calories)
-        ].copy()
-        
-        # If not enough foods in range, expand the range
-        if len(suitable_foods) < max_recommendations:
-            calorie_range = target_calories * 0.4
-            min_calories = target_calories - calorie_range
-            max_calories = target_calories + calorie_range
-            suitable_foods = df[
-                (df['calories'] >= min_calories) & 
-                (df['calories'] <= max_calories)
-            ].copy()
-        
-        # If still not enough, use all foods
-        if len(suitable_foods) < max_recommendations:
-            suitable_foods = df.copy()
-        
-        # Calculate calorie difference and sort
-        suitable_foods['calorie_diff'] = abs(suitable_foods['calories'] - target_calories)
-        suitable_foods = suitable_foods.sort_values('calorie_diff')
-        
-        # Add some randomization to avoid same results
-        import random
-        suitable_foods = suitable_foods.sample(frac=1, random_state=random.randint(1, 1000)).reset_index(drop=True)
-        suitable_foods = suitable_foods.sort_values('calorie_diff')
-        
-        recommendations = []
-        for _, food in suitable_foods.head(max_recommendations).iterrows():
-            recommendations.append({
-                'name': food['name'],
-                'calories': food['calories'],
-                'protein': food['proteins'],
-                'fat': food['fat'],
-                'carbohydrate': food['carbohydrate'],
-                'image': food.get('image', ''),
-                'category': categorize_food(food['name'])
-            })
+        if seed is None:
+            seed = random.getrandbits(32)
+            recommendations = build_food_recommendations(catalog, target_calories, max_recommendations, seed)
+        else:
+            key = ('food-recommendations', target_calories, max_recommendations, seed, catalog.version)
+            recommendations = recommendation_cache.get(key)
+            if recommendations is None:
+                recommendations = build_food_recommendations(catalog, target_calories, max_recommendations, seed)
+                recommendation_cache.put(key, recommendations)
         
         return jsonify({
             'success': True,
             'recommendations': recommendations,
-            'target_calories': target_calories
+            'target_calories': target_calories,
+            'seed': seed
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/health-conditions', methods=['GET'])
 def get_health_conditions():
-    """Get available health conditions"""
-    health_conditions = [
-        'diabetes',
-        'hipertensi', 
-        'obesitas',
-        'jantung',
-        'kolesterol',
-        'asam_urat',
-        'ginjal',
-        'lambung',
-        'tiroid',
-        'alergi'
-    ]
+    """Get available health conditions (every condition has scoring rules)"""
     return jsonify({
         'success': True,
-        'data': health_conditions
+        'data': HEALTH_CONDITIONS
     })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    # Reports readiness only; never triggers the analyzer load itself
+    ready = analyzer_status['state'] == 'ready'
     return jsonify({
         'status': 'healthy',
-        'nutrition_analyzer': nutrition_analyzer is not None,
+        'nutrition_analyzer': ready,
+        'nutrition_analyzer_status': dict(analyzer_status),
+        'recommendation_cache': recommendation_cache.stats(),
+        'ranking_table': ranking_tables.stats(),
+        'prediction_cache': nutrition_analyzer.cache_stats() if ready else None,
         'timestamp': pd.Timestamp.now().isoformat()
     })
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start untuk setiap entry point NutriSuggest
+
+Every measurement runs in a fresh Python process, so module imports, dataset
+parsing and model loading are paid exactly as on a new worker or serverless
+instance.  For each entry point it reports the import time, the first request
+and a second (warm) request.
+
+    python benchmark_startup.py [--repeat 5] [--entry api_index]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+
+RECOMMENDATION_REQUEST = {'health_conditions': ['diabetes'], 'available_ingredients': ['ayam']}
+
+# Child process body: untimed setup (what the platform runtime has already
+# imported), then import the entry point and time two requests.  Prints one
+# JSON line.
+CHILD_TEMPLATE = '''
+import json, sys, time
+{setup_code}
+started = time.perf_counter()
+sys.path.insert(0, {path!r})
+{import_code}
+imported = time.perf_counter()
+{request_code}
+first = time.perf_counter()
+{request_code}
+second = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first - imported) * 1000,
+    'warm_request_ms': (second - first) * 1000,
+    'status': status,
+    'pandas_loaded': 'pandas' in sys.modules,
+    'sklearn_loaded': 'sklearn' in sys.modules
+}}))
+'''
+
+FLASK_REQUESTS = '''
+client = module.app.test_client()
+response = client.get('/api/foods')
+response = client.post('/api/recommendations', json={request!r})
+status = response.status_code
+'''
+
+# The Functions runtime serves requests through Flask, so it is loaded
+# before the user module
+FIREBASE_SETUP = '''
+from flask import Request
+from werkzeug.test import EnvironBuilder
+'''
+
+FIREBASE_REQUESTS = '''
+response = module.get_foods(EnvironBuilder(method='GET').get_request(Request))
+response = module.get_recommendations(EnvironBuilder(method='POST', json={request!r}).get_request(Request))
+status = response.status_code
+'''
+
+ENTRY_POINTS = {
+    'api_improved': {
+        'description': 'backend/api_improved.py (Flask)',
+        'cwd': BACKEND_DIR,
+        'path': BACKEND_DIR,
+        'setup': '',
+        'import_code': 'import api_improved as module',
+        'requests': FLASK_REQUESTS
+    },
+    'api_index': {
+        'description': 'backend/api/index.py (Vercel)',
+        'cwd': BACKEND_DIR,
+        'path': os.path.join(BACKEND_DIR, 'api'),
+        'setup': '',
+        'import_code': 'import index as module',
+        'requests': FLASK_REQUESTS
+    },
+    'functions_main': {
+        'description': 'functions/main.py (Firebase Functions)',
+        'cwd': os.path.join(ROOT_DIR, 'functions'),
+        'path': os.path.join(ROOT_DIR, 'functions'),
+        'setup': FIREBASE_SETUP,
+        'import_code': 'import main as module',
+        'requests': FIREBASE_REQUESTS
+    }
+}
+
+def run_once(entry: dict) -> dict:
+    code = CHILD_TEMPLATE.format(
+        setup_code=entry['setup'].strip(),
+        path=entry['path'],
+        import_code=entry['import_code'],
+        request_code=entry['requests'].format(request=RECOMMENDATION_REQUEST).strip()
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=entry['cwd'], capture_output=True, text=True)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"exit code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark(name: str, repeat: int) -> bool:
+    entry = ENTRY_POINTS[name]
+    print(f"\n🧪 {entry['description']}")
+    try:
+        runs = [run_once(entry) for _ in range(repeat)]
+    except Exception as e:
+        print(f"❌ Skipped: {e}")
+        return False
+
+    for metric in ('import_ms', 'first_request_ms', 'warm_request_ms'):
+        values = [run[metric] for run in runs]
+        print(f"  {metric:<18} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    last = runs[-1]
+    print(f"  status {last['status']}, pandas loaded: {last['pandas_loaded']}, sklearn loaded: {last['sklearn_loaded']}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import and first-request latency per entry point')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh processes per entry point')
+    parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), action='append', help='entry point(s) to run (default: all)')
+    args = parser.parse_args()
+
+    print("🚀 NutriSuggest startup benchmark")
+    print("=" * 50)
+    results = [benchmark(name, args.repeat) for name in (args.entry or list(ENTRY_POINTS))]
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1 @@
+"""In-memory food catalog shared by the NutriSuggest API handlers."""
@@ -0,0 +1,120 @@
+"""Versioned artifact directories behind an atomically replaced pointer.
+
+The catalog snapshot and the model bundle are both published this way::
+
+    output_dir/
+        <pointer file>              # {"format": ..., "version": ..., "directory": ...}
+        <prefix>-<version>/
+            manifest.json           # {"format": ..., "version": ..., "created": ..., ...}
+            ...
+
+Files are written into a staging directory, the version is the hash of
+their names and content, and the pointer is replaced only after the
+versioned directory is complete, so a reader never sees a half-written
+artifact.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def atomic_write_json(path: str, data: Dict) -> None:
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def _update_digest(digest, path: str) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+
+def files_version(paths: Iterable[str]) -> str:
+    """Short content hash of the given files, in order"""
+    digest = hashlib.sha256()
+    for path in paths:
+        _update_digest(digest, path)
+    return digest.hexdigest()[:16]
+
+
+def content_version(directory: str) -> str:
+    """Short hash of the file names and content of ``directory``"""
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(directory)):
+        digest.update(filename.encode())
+        _update_digest(digest, os.path.join(directory, filename))
+    return digest.hexdigest()[:16]
+
+
+def create_staging(output_dir: str, prefix: str) -> str:
+    """A new readable staging directory inside ``output_dir``"""
+    os.makedirs(output_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=output_dir, prefix=f'.{prefix}-')
+    os.chmod(staging, 0o755)
+    return staging
+
+
+def publish(staging: str, output_dir: str, prefix: str, pointer_file: str,
+            artifact_format: int, manifest: Dict) -> str:
+    """Version the staged files, add the manifest and point ``pointer_file`` at them.
+
+    Returns the version (a content hash).
+    """
+    version = content_version(staging)
+    manifest = {
+        'format': artifact_format,
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(),
+        **manifest
+    }
+    atomic_write_json(os.path.join(staging, MANIFEST_FILE), manifest)
+
+    directory = f'{prefix}-{version}'
+    target = os.path.join(output_dir, directory)
+    if os.path.isdir(target):
+        # Identical content is already published under this version
+        for filename in os.listdir(staging):
+            os.remove(os.path.join(staging, filename))
+        os.rmdir(staging)
+    else:
+        os.rename(staging, target)
+
+    atomic_write_json(os.path.join(output_dir, pointer_file),
+                      {'format': artifact_format, 'version': version, 'directory': directory})
+    return version
+
+
+def load_published(output_dir: str, pointer_file: str, artifact_format: int) -> Optional[Tuple[str, Dict]]:
+    """Directory and manifest ``pointer_file`` points at, or None if there is no usable one"""
+    pointer_path = os.path.join(output_dir, pointer_file)
+    if not os.path.isfile(pointer_path):
+        return None
+    with open(pointer_path) as f:
+        pointer = json.load(f)
+    if pointer.get('format') != artifact_format:
+        return None
+
+    path = os.path.join(output_dir, pointer['directory'])
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != artifact_format:
+        return None
+    return path, manifest
+
+
+def map_array(path: str) -> np.ndarray:
+    """Read-only memory mapping of a ``.npy`` file"""
+    # np.asarray drops the memmap subclass but keeps the mapping
+    return np.asarray(np.load(path, mmap_mode='r'))
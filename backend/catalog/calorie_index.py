@@ -0,0 +1,109 @@
+"""Calorie-sorted index for nearest-to-target food lookups.
+
+The catalog rows are sorted by calories once per catalog version.  The foods
+closest to a calorie target are then found with ``searchsorted`` and a
+two-pointer walk outward from the insertion point, in O(log n + k) and
+without filtering or copying the catalog.
+
+``sample_nearest`` adds variety without giving up reproducibility: only the
+foods at the cut-off that are within ``tolerance`` calories of the k-th
+closest one (near-ties) are drawn at random, from a caller-supplied
+``random.Random``, so the same seed always gives the same foods.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+class CalorieIndex:
+    """Row ids ordered by calories (ties by row id); foods without calories are kept apart."""
+
+    def __init__(self, calories: np.ndarray):
+        calories = np.asarray(calories, dtype=float)
+        known = np.flatnonzero(~np.isnan(calories))
+        self.rows = known[np.argsort(calories[known], kind='stable')]
+        self.calories = calories[self.rows]
+        self.missing = np.flatnonzero(np.isnan(calories))
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.missing)
+
+    def nearest(self, target: float, k: int, include_ties: bool = False,
+                tolerance: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids of the ``k`` foods closest to ``target`` calories and their distances, closest first.
+
+        Equally distant foods come in a fixed but arbitrary order; with
+        ``include_ties`` every food at most ``tolerance`` further away than
+        the k-th one is returned as well, so callers can choose among them
+        (``sample_nearest``).  Foods
+        without a calorie value (distance NaN) only fill up the result when
+        the catalog has fewer than ``k`` others.
+        """
+        if k <= 0:
+            return self.rows[:0], self.calories[:0]
+        calories = self.calories
+        n = len(calories)
+        right = int(np.searchsorted(calories, target, side='left'))
+        left = right - 1
+        picked = []
+        distances = []
+        limit = None
+        while left >= 0 or right < n:
+            below = target - calories[left] if left >= 0 else np.inf
+            above = calories[right] - target if right < n else np.inf
+            distance = below if below <= above else above
+            if limit is not None and distance > limit:
+                break
+            if below <= above:
+                picked.append(left)
+                left -= 1
+            else:
+                picked.append(right)
+                right += 1
+            distances.append(distance)
+            if len(picked) == k:
+                if not include_ties:
+                    break
+                limit = distance + tolerance
+
+        rows = self.rows[picked] if picked else self.rows[:0]
+        distances = np.array(distances, dtype=float)
+        if len(rows) < k and len(self.missing):
+            extra = self.missing[:k - len(rows)]
+            rows = np.concatenate([rows, extra])
+            distances = np.concatenate([distances, np.full(len(extra), np.nan)])
+        return rows, distances
+
+    def sample_nearest(self, target: float, k: int, rng, tolerance: float = 0.0) -> np.ndarray:
+        """``k`` foods closest to ``target``, near-ties at the cut-off drawn with ``rng``.
+
+        Foods clearly closer than the k-th one (by more than ``tolerance``)
+        are always returned.  The remaining places go to a random sample of
+        the foods within ``tolerance`` of the k-th distance.  The result is
+        closest first, with exactly equal distances in random order.
+        """
+        if k <= 0:
+            return self.rows[:0]
+        rows, distances = self.nearest(target, k, include_ties=True, tolerance=tolerance)
+        if len(rows) > k:
+            cutoff = distances[k - 1]
+            window = np.flatnonzero(distances >= cutoff - tolerance)
+            chosen = sorted(rng.sample(window.tolist(), k - int(window[0])))
+            keep = np.concatenate([np.arange(window[0]), chosen]).astype(np.int64)
+            rows, distances = rows[keep], distances[keep]
+        return shuffle_ties(rows, distances, rng)
+
+
+def shuffle_ties(rows: np.ndarray, distances: np.ndarray, rng) -> np.ndarray:
+    """``rows`` with every run of equal ``distances`` shuffled in place of the run"""
+    rows = rows.copy()
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if end == len(rows) or not distances[end] == distances[start]:
+            if end - start > 1:
+                run = rows[start:end].tolist()
+                rng.shuffle(run)
+                rows[start:end] = run
+            start = end
+    return rows
@@ -0,0 +1,276 @@
+"""Health-condition scoring rules.
+
+Every condition advertised by ``/api/health-conditions`` is described by data
+in ``CONDITION_RULES`` instead of an if/elif chain.  A condition has one or
+more rules, tried in order per food: the first rule whose ``requires``
+nutrients are measured for that food (not NaN) applies.  This is how the
+sodium, cholesterol and saturated-fat columns of the full food dataset are
+used where they exist, with the fat/calorie rules as the fallback for
+catalogs (or foods) without them.  A rule's tiers work like if/elif: the
+first tier whose clauses hold adds its delta to the score.
+
+A clause is ``(column, op, value)`` over a ``FeatureTable`` column (see
+``COLUMNS``) with ``op`` one of ``<=``, ``<``, ``>=``, ``>`` or ``in`` (a
+tuple of category names).  ``compile_conditions`` turns the table into
+column predicates once, on first use.  ``condition_delta_columns`` evaluates
+them over a whole catalog into one int8 delta column per condition, stored
+in the ``FeatureTable``; a request's conditions become a bitmask selecting
+the columns to sum (``condition_score_delta``).  ``scalar_condition_delta``
+evaluates the rules for a single food.
+
+Units follow the food dataset: sodium and saturated fat in grams per
+serving, cholesterol in milligrams.  The limits are the usual "low" and
+"high" (20% of the daily value) levels.
+"""
+
+import operator
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+SODIUM_LOW = 0.14
+SODIUM_HIGH = 0.46
+CHOLESTEROL_LOW = 20
+CHOLESTEROL_HIGH = 60
+SATURATED_FAT_LOW = 1
+SATURATED_FAT_HIGH = 4
+
+# Clause column -> FeatureTable attribute
+COLUMNS = {
+    'calories': 'calories',
+    'protein': 'proteins',
+    'fat': 'fat',
+    'carbs': 'carbohydrate',
+    'fiber': 'fiber',
+    'sugar': 'sugar',
+    'sodium': 'sodium',
+    'cholesterol': 'cholesterol',
+    'saturated_fat': 'saturated_fat',
+    'category': 'category_codes',
+}
+
+Clause = Tuple[str, str, object]
+
+
+class Tier(NamedTuple):
+    delta: int
+    clauses: Sequence[Clause]
+    any: bool = False  # clauses are joined with "or" instead of "and"
+
+
+class Rule(NamedTuple):
+    requires: Sequence[str]
+    tiers: Sequence[Tier]
+
+
+CONDITION_RULES: Dict[str, List[Rule]] = {
+    'diabetes': [
+        Rule((), [
+            Tier(1, [('carbs', '<=', 25), ('sugar', '<=', 5)]),
+            Tier(-1, [('carbs', '>', 40), ('sugar', '>', 15)], any=True),
+        ]),
+    ],
+    'hipertensi': [
+        Rule(('sodium',), [
+            Tier(1, [('sodium', '<=', SODIUM_LOW), ('fat', '<=', 10)]),
+            Tier(-1, [('sodium', '>=', SODIUM_HIGH), ('fat', '>', 20)], any=True),
+        ]),
+        Rule((), [
+            Tier(1, [('fat', '<=', 10), ('calories', '<=', 300)]),
+            Tier(-1, [('fat', '>', 20)]),
+        ]),
+    ],
+    'obesitas': [
+        Rule((), [
+            Tier(1, [('calories', '<=', 150), ('fat', '<=', 5)]),
+            Tier(-1, [('calories', '>', 300), ('fat', '>', 15)], any=True),
+        ]),
+    ],
+    'jantung': [
+        Rule(('saturated_fat', 'sodium'), [
+            Tier(1, [('saturated_fat', '<=', SATURATED_FAT_LOW), ('sodium', '<=', SODIUM_LOW)]),
+            Tier(-1, [('saturated_fat', '>=', SATURATED_FAT_HIGH), ('sodium', '>=', SODIUM_HIGH)], any=True),
+        ]),
+        Rule((), [
+            Tier(1, [('fat', '<=', 8), ('protein', '>=', 10)]),
+            Tier(-1, [('fat', '>', 15)]),
+        ]),
+    ],
+    'kolesterol': [
+        Rule(('cholesterol', 'saturated_fat'), [
+            Tier(1, [('cholesterol', '<=', CHOLESTEROL_LOW), ('saturated_fat', '<=', SATURATED_FAT_LOW)]),
+            Tier(-1, [('cholesterol', '>=', CHOLESTEROL_HIGH), ('saturated_fat', '>=', SATURATED_FAT_HIGH)], any=True),
+        ]),
+        Rule((), [
+            Tier(1, [('fat', '<=', 5), ('fiber', '>=', 1)]),
+            Tier(-1, [('fat', '>', 15)]),
+        ]),
+    ],
+    'asam_urat': [
+        # No purine data: animal protein is the main source, fructose raises uric acid
+        Rule((), [
+            Tier(-1, [('category', 'in', ('Protein Hewani',)), ('sugar', '>', 15)], any=True),
+            Tier(1, [('category', 'in', ('Sayuran', 'Buah-buahan', 'Makanan Pokok'))]),
+        ]),
+    ],
+    'ginjal': [
+        Rule(('sodium',), [
+            Tier(1, [('sodium', '<=', SODIUM_LOW), ('protein', '<=', 10)]),
+            Tier(-1, [('sodium', '>=', SODIUM_HIGH), ('protein', '>', 25)], any=True),
+        ]),
+        Rule((), [
+            Tier(1, [('protein', '<=', 10), ('calories', '<=', 300)]),
+            Tier(-1, [('protein', '>', 25)]),
+        ]),
+    ],
+    'lambung': [
+        Rule((), [
+            Tier(-1, [('fat', '>', 15), ('category', 'in', ('Bumbu dan Condiment',))], any=True),
+            Tier(1, [('fat', '<=', 5)]),
+        ]),
+    ],
+    'tiroid': [
+        Rule((), [
+            Tier(-1, [('sugar', '>', 15), ('category', 'in', ('Kue dan Snack',))], any=True),
+            Tier(1, [('protein', '>=', 10), ('sugar', '<=', 5)]),
+        ]),
+    ],
+    # The catalog has no allergen data; allergies are handled by the
+    # ingredient filter, so the score is left unchanged
+    'alergi': [],
+}
+
+HEALTH_CONDITIONS = list(CONDITION_RULES)
+# Bit of each condition in a request's condition mask
+CONDITION_BITS = {condition: bit for bit, condition in enumerate(HEALTH_CONDITIONS)}
+
+_OPERATORS = {'<=': operator.le, '<': operator.lt, '>=': operator.ge, '>': operator.gt}
+
+Predicate = Callable[[Dict[str, object]], object]
+
+
+def _compile_clause(clause: Clause) -> Predicate:
+    column, op, value = clause
+    attribute = COLUMNS[column]
+    if op == 'in':
+        # Imported here: catalog.scoring imports this module
+        from catalog.scoring import CATEGORY_CODES
+        codes = [CATEGORY_CODES[category] for category in value]
+        return lambda columns: np.isin(columns[attribute], codes)
+    compare = _OPERATORS[op]
+    return lambda columns: compare(columns[attribute], value)
+
+
+def _compile_tier(tier: Tier) -> Tuple[float, Predicate]:
+    predicates = [_compile_clause(clause) for clause in tier.clauses]
+    combine = operator.or_ if tier.any else operator.and_
+
+    def predicate(columns):
+        result = predicates[0](columns)
+        for other in predicates[1:]:
+            result = combine(result, other(columns))
+        return result
+    return float(tier.delta), predicate
+
+
+class CompiledRule(NamedTuple):
+    requires: Tuple[str, ...]
+    tiers: Tuple[Tuple[float, Predicate], ...]
+
+
+def compile_conditions(rules: Dict[str, List[Rule]]) -> Dict[str, List[CompiledRule]]:
+    """Turn the declarative rule table into column predicates"""
+    return {
+        condition: [
+            CompiledRule(tuple(COLUMNS[column] for column in rule.requires),
+                         tuple(_compile_tier(tier) for tier in rule.tiers))
+            for rule in condition_rules
+        ]
+        for condition, condition_rules in rules.items()
+    }
+
+
+@lru_cache(maxsize=None)
+def compiled_conditions() -> Dict[str, List[CompiledRule]]:
+    return compile_conditions(CONDITION_RULES)
+
+
+def _feature_columns(features) -> Dict[str, np.ndarray]:
+    return {attribute: getattr(features, attribute) for attribute in COLUMNS.values()}
+
+
+def _rule_delta(rule: CompiledRule, columns: Dict[str, np.ndarray]) -> np.ndarray:
+    if not rule.tiers:
+        return np.zeros(len(columns['calories']))
+    return np.select([predicate(columns) for _, predicate in rule.tiers],
+                     [delta for delta, _ in rule.tiers], default=0.0)
+
+
+def condition_delta(features, condition: str) -> np.ndarray:
+    """Score adjustment of one health condition for every food of a ``FeatureTable``"""
+    columns = _feature_columns(features)
+    delta = np.zeros(len(features))
+    pending = np.ones(len(features), dtype=bool)
+    for rule in compiled_conditions().get(condition, []):
+        applies = pending.copy()
+        for attribute in rule.requires:
+            applies &= ~np.isnan(columns[attribute])
+        if applies.any():
+            delta = np.where(applies, _rule_delta(rule, columns), delta)
+        pending &= ~applies
+    return delta
+
+
+def condition_delta_columns(features) -> np.ndarray:
+    """One int8 score-delta row per ``HEALTH_CONDITIONS`` entry, shape (conditions, foods)"""
+    deltas = np.zeros((len(HEALTH_CONDITIONS), len(features)), dtype=np.int8)
+    for row, condition in enumerate(HEALTH_CONDITIONS):
+        deltas[row] = condition_delta(features, condition)
+    return deltas
+
+
+def condition_mask(health_conditions: Iterable) -> int:
+    """Bit ``i`` is set when ``HEALTH_CONDITIONS[i]`` is requested; unknown conditions are ignored"""
+    mask = 0
+    for condition in health_conditions:
+        bit = CONDITION_BITS.get(condition) if isinstance(condition, str) else None
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def masked_delta(condition_deltas: np.ndarray, mask: int) -> np.ndarray:
+    """Sum of the delta rows selected by ``mask``"""
+    rows = [bit for bit in range(len(condition_deltas)) if mask >> bit & 1]
+    if not rows:
+        return np.zeros(condition_deltas.shape[1], dtype=np.int8)
+    if len(rows) == 1:
+        return condition_deltas[rows[0]]
+    return condition_deltas[rows].sum(axis=0, dtype=np.int8)
+
+
+def condition_score_delta(features, health_conditions: list) -> np.ndarray:
+    """Health-condition adjustments of ``calculate_health_score``.
+
+    Sums the feature table's precomputed per-condition columns, so the cost
+    is a few vector adds however many conditions are requested.  Each
+    condition counts once; unknown conditions add nothing.
+    """
+    return masked_delta(features.condition_deltas, condition_mask(health_conditions))
+
+
+def scalar_condition_delta(values: Dict[str, object], health_conditions: list) -> float:
+    """``condition_score_delta`` for one food; ``values`` maps FeatureTable attributes to scalars"""
+    delta = 0.0
+    for condition in dict.fromkeys(health_conditions):
+        for rule in compiled_conditions().get(condition, []):
+            if any(values.get(attribute) is None or values[attribute] != values[attribute]
+                   for attribute in rule.requires):
+                continue
+            for tier_delta, predicate in rule.tiers:
+                if predicate(values):
+                    delta += tier_delta
+                    break
+            break
+    return delta
@@ -0,0 +1,110 @@
+"""Per-food feature table derived from the raw catalog columns.
+
+Category, fiber/sugar (measured values where the catalog has them, estimates
+otherwise), the condition-independent part of the health score, the score
+delta of each health condition and the health-label bitmask depend only on
+a food's name and static nutrients, so they are computed once per catalog
+version instead of on every request.
+Catalog snapshots store these columns next to the raw ones, together with
+``feature_fingerprint()``, so they are recomputed only when the rules that
+produce them change.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from catalog.conditions import CONDITION_RULES, condition_delta_columns
+from catalog.scoring import (
+    ANTIOXIDANT_CATEGORIES, CATEGORIES, CATEGORY_KEYWORDS, DEFAULT_FIBER_SUGAR_RATIO, FIBER_SUGAR_OVERRIDES,
+    FIBER_SUGAR_RATIOS, HEALTH_LABELS, base_score_columns, categorize_names, estimate_fiber_sugar_columns,
+    health_label_masks
+)
+
+# Bump whenever the code deriving the feature columns changes; the rule
+# tables themselves are part of the fingerprint already
+FEATURE_REVISION = 4
+
+
+def feature_fingerprint() -> str:
+    """Identifies the rules the derived feature columns are computed with"""
+    rules = (
+        FEATURE_REVISION, CATEGORY_KEYWORDS, FIBER_SUGAR_RATIOS, DEFAULT_FIBER_SUGAR_RATIO,
+        FIBER_SUGAR_OVERRIDES, ANTIOXIDANT_CATEGORIES, HEALTH_LABELS, CONDITION_RULES
+    )
+    return hashlib.sha256(repr(rules).encode()).hexdigest()[:16]
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+
+class FeatureTable:
+    """Raw nutrient columns plus derived per-food features, all read-only."""
+
+    # Derived columns, in the order catalog snapshots store them
+    DERIVED = ('category_codes', 'fiber', 'sugar', 'base_score', 'label_masks', 'condition_deltas')
+
+    def __init__(self, table, derived: Optional[Dict[str, np.ndarray]] = None):
+        """``table`` is a ``CatalogTable`` or anything indexable the same way (a DataFrame).
+
+        ``derived`` supplies precomputed ``DERIVED`` columns (from a snapshot)
+        instead of computing them.
+        """
+        self.names = _read_only(np.array(table['name'], dtype=object))
+        self.names_lower = [name.lower() if isinstance(name, str) else name for name in self.names.tolist()]
+        self.calories = _read_only(np.array(table['calories'], dtype=float))
+        self.proteins = _read_only(np.array(table['proteins'], dtype=float))
+        self.fat = _read_only(np.array(table['fat'], dtype=float))
+        self.carbohydrate = _read_only(np.array(table['carbohydrate'], dtype=float))
+        # Only the full food dataset measures these; NaN selects the fallback condition rules.
+        # A food whose optional nutrients are all 0 was not measured either.
+        optional = {name: self._measured(table, name) for name in ('sodium', 'cholesterol', 'saturated_fat')}
+        present = [column for column in optional.values() if column is not None]
+        unmeasured = np.logical_and.reduce([column == 0 for column in present])
+        for name, measured in optional.items():
+            measured = np.full(len(self.names), np.nan) if measured is None else np.where(unmeasured, np.nan, measured)
+            setattr(self, name, _read_only(measured))
+        if derived is not None:
+            for name in self.DERIVED:
+                setattr(self, name, _read_only(derived[name]))
+            return
+
+        self.category_codes = _read_only(categorize_names(self.names_lower))
+        fiber, sugar = self._measured(table, 'fiber'), self._measured(table, 'sugar')
+        if fiber is None or sugar is None or np.isnan(fiber).any() or np.isnan(sugar).any():
+            # Estimated from name and carbohydrates where nothing was measured
+            estimated_fiber, estimated_sugar = estimate_fiber_sugar_columns(
+                self.names_lower, self.category_codes, self.carbohydrate
+            )
+            fiber = estimated_fiber if fiber is None else np.where(np.isnan(fiber), estimated_fiber, fiber)
+            sugar = estimated_sugar if sugar is None else np.where(np.isnan(sugar), estimated_sugar, sugar)
+        self.fiber = _read_only(fiber)
+        self.sugar = _read_only(sugar)
+        self.base_score = _read_only(base_score_columns(
+            self.category_codes, self.calories, self.proteins, self.fat,
+            self.carbohydrate, self.fiber, self.sugar
+        ))
+        self.label_masks = _read_only(health_label_masks(
+            self.category_codes, self.calories, self.proteins, self.fat,
+            self.carbohydrate, self.fiber, self.sugar
+        ))
+        # Score delta of every health condition, one int8 row per condition
+        self.condition_deltas = _read_only(condition_delta_columns(self))
+
+    @staticmethod
+    def _measured(table, name: str) -> Optional[np.ndarray]:
+        """A measured nutrient column (the full food dataset has them), or None"""
+        return np.array(table[name], dtype=float) if name in table else None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def derived_columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.DERIVED}
+
+    def categories(self) -> List[str]:
+        """Category name per food"""
+        return [CATEGORIES[code] for code in self.category_codes.tolist()]
@@ -0,0 +1,132 @@
+"""Server-side filtering, field projection and pagination for /api/foods.
+
+Filters are evaluated as NumPy masks over the in-memory catalog and only the
+requested page is turned into dicts, so response size and serialization time
+follow the page size instead of the catalog size.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from catalog.scoring import CATEGORIES, CATEGORY_CODES
+
+# API field -> catalog column
+FOOD_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'calories': 'calories',
+    'protein': 'proteins',
+    'fat': 'fat',
+    'carbohydrate': 'carbohydrate',
+    'image': 'image',
+    'category': None,  # derived, from the feature table
+}
+
+# Range-filterable nutrients: query suffix -> feature table attribute
+RANGE_FILTERS = {
+    'calories': 'calories',
+    'protein': 'proteins',
+    'fat': 'fat',
+    'carbohydrate': 'carbohydrate',
+}
+
+QUERY_PARAMS = {'offset', 'limit', 'fields', 'category'} | {
+    f"{bound}_{nutrient}" for nutrient in RANGE_FILTERS for bound in ('min', 'max')
+}
+
+MAX_LIMIT = 500
+
+
+def _parse_int(args, name: str, default: Optional[int], minimum: int) -> Optional[int]:
+    value = args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if number < minimum:
+        raise ValueError(f"'{name}' must be >= {minimum}")
+    return number
+
+
+def _parse_list(args, name: str) -> List[str]:
+    return [item.strip() for value in args.getlist(name) for item in value.split(',') if item.strip()]
+
+
+class FoodQuery:
+    """Parsed /api/foods query string."""
+
+    def __init__(self, args):
+        self.offset = _parse_int(args, 'offset', 0, 0)
+        self.limit = _parse_int(args, 'limit', None, 1)
+        if self.limit is not None:
+            self.limit = min(self.limit, MAX_LIMIT)
+
+        self.fields = _parse_list(args, 'fields') or list(FOOD_FIELDS)
+        unknown = [field for field in self.fields if field not in FOOD_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        self.categories = _parse_list(args, 'category')
+        unknown = [category for category in self.categories if category not in CATEGORY_CODES]
+        if unknown:
+            raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+
+        self.ranges = {}
+        for nutrient in RANGE_FILTERS:
+            for bound in ('min', 'max'):
+                value = args.get(f"{bound}_{nutrient}")
+                if value is None or value == '':
+                    continue
+                try:
+                    self.ranges[(nutrient, bound)] = float(value)
+                except ValueError:
+                    raise ValueError(f"'{bound}_{nutrient}' must be a number")
+            low, high = self.ranges.get((nutrient, 'min')), self.ranges.get((nutrient, 'max'))
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"'min_{nutrient}' must not be greater than 'max_{nutrient}'")
+
+    @staticmethod
+    def is_plain(args) -> bool:
+        """True when no query parameter changes the full catalog listing"""
+        return not any(name in args for name in QUERY_PARAMS)
+
+    def matching_rows(self, catalog) -> np.ndarray:
+        features = catalog.features
+        mask = np.ones(len(features), dtype=bool)
+        if self.categories:
+            mask &= np.isin(features.category_codes, [CATEGORY_CODES[category] for category in self.categories])
+        for (nutrient, bound), value in self.ranges.items():
+            column = getattr(features, RANGE_FILTERS[nutrient])
+            mask &= column >= value if bound == 'min' else column <= value
+        return np.flatnonzero(mask)
+
+    def run(self, catalog) -> Dict:
+        rows = self.matching_rows(catalog)
+        total = len(rows)
+        end = total if self.limit is None else min(self.offset + self.limit, total)
+        page = rows[self.offset:end]
+
+        table = catalog.table
+        columns = {}
+        for field in self.fields:
+            source = FOOD_FIELDS[field]
+            if field == 'category':
+                codes = catalog.features.category_codes[page].tolist()
+                columns[field] = [CATEGORIES[code] for code in codes]
+            elif source in table:
+                columns[field] = table[source][page].tolist()
+            else:
+                columns[field] = [''] * len(page)
+
+        foods = [dict(zip(self.fields, values)) for values in zip(*(columns[field] for field in self.fields))]
+        return {
+            'success': True,
+            'data': foods,
+            'total': total,
+            'offset': self.offset,
+            'limit': self.limit,
+            'next_offset': end if end < total else None
+        }
@@ -0,0 +1,147 @@
+"""Streaming ingestion of the full food dataset into a catalog snapshot.
+
+``data/food-nutrition-dataset.zip`` holds five ``FOOD-DATA-GROUP*.csv`` files
+(about 2,400 foods with 35 nutrient columns).  ``ingest_zip`` reads those
+members straight out of the archive as decompressing text streams, without
+extracting them, and processes them ``chunk_rows`` rows at a time: columns are
+renamed to the API schema (``food`` -> ``name``, ``Caloric Value`` ->
+``calories``, ``Dietary Fiber`` -> ``fiber``, ...), values are parsed into
+typed column buffers and foods already seen under the same name are dropped.
+Only the typed output columns grow with the dataset; CSV text and parsed rows
+are held one chunk at a time.  The result is written as a catalog snapshot
+(see ``catalog.snapshot``), whose measured fiber and sugar replace the
+estimates.
+
+    python -m catalog.ingest [zip_path] [output_dir]
+"""
+
+import csv
+import io
+import re
+import zipfile
+from array import array
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from catalog.snapshot import write_snapshot
+from catalog.table import CatalogTable, file_digest
+
+FOOD_GROUP_MEMBER = re.compile(r'(^|/)FOOD-DATA-GROUP\d+\.csv$')
+
+# Source column -> API column; other nutrients are snake_cased
+COLUMN_NAMES = {
+    'food': 'name',
+    'Caloric Value': 'calories',
+    'Protein': 'proteins',
+    'Fat': 'fat',
+    'Carbohydrates': 'carbohydrate',
+    'Dietary Fiber': 'fiber',
+    'Sugars': 'sugar',
+    'Saturated Fats': 'saturated_fat',
+    'Monounsaturated Fats': 'monounsaturated_fat',
+    'Polyunsaturated Fats': 'polyunsaturated_fat',
+}
+# Row numbers written by the exporting DataFrame
+DROPPED_COLUMNS = {'', 'Unnamed: 0'}
+
+
+def normalize_column(name: str) -> str:
+    name = name.strip()
+    return COLUMN_NAMES.get(name) or re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value) if value else np.nan
+    except ValueError:
+        return np.nan
+
+
+def iter_member_chunks(archive: zipfile.ZipFile, member: str,
+                       chunk_rows: int) -> Iterator[Tuple[List[str], List[List[str]]]]:
+    """Yield (normalized header, rows) chunks of one CSV member, streamed from the archive"""
+    with archive.open(member) as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        header = [normalize_column(name) if name.strip() not in DROPPED_COLUMNS else None
+                  for name in next(reader, [])]
+        while True:
+            rows = list(islice(reader, chunk_rows))
+            if not rows:
+                return
+            yield header, rows
+
+
+class _ColumnBuilder:
+    """Typed, append-only output columns; a column first seen late is NaN-filled."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.numeric: Dict[str, array] = {}
+        self.seen = set()
+        self.duplicates = 0
+
+    def add(self, header: List[str], rows: List[List[str]]) -> None:
+        for column in header:
+            if column is not None and column != 'name' and column not in self.numeric:
+                self.numeric[column] = array('d', [np.nan]) * len(self.names)
+        name_index = header.index('name')
+        positions = [(column, i) for i, column in enumerate(header) if column not in (None, 'name')]
+        missing = [column for column in self.numeric if column not in header]
+
+        for row in rows:
+            name = ' '.join(row[name_index].split()) if name_index < len(row) else ''
+            key = name.lower()
+            if not name or key in self.seen:
+                self.duplicates += bool(name)
+                continue
+            self.seen.add(key)
+            self.names.append(name)
+            for column, i in positions:
+                self.numeric[column].append(_parse_float(row[i]) if i < len(row) else np.nan)
+            for column in missing:
+                self.numeric[column].append(np.nan)
+
+    def table(self) -> CatalogTable:
+        columns = {
+            'id': np.arange(1, len(self.names) + 1, dtype=np.int64),
+            'name': np.array(self.names, dtype=object),
+        }
+        for column, values in self.numeric.items():
+            columns[column] = np.frombuffer(values, dtype=np.float64).copy()
+        return CatalogTable(columns)
+
+
+def read_food_groups(zip_path: str, chunk_rows: int = 256) -> Tuple[CatalogTable, Dict]:
+    """Stream every FOOD-DATA-GROUP member of the archive into one deduplicated table"""
+    builder = _ColumnBuilder()
+    stats = {'members': [], 'rows': 0}
+    with zipfile.ZipFile(zip_path) as archive:
+        members = sorted(name for name in archive.namelist() if FOOD_GROUP_MEMBER.search(name))
+        for member in members:
+            for header, rows in iter_member_chunks(archive, member, chunk_rows):
+                if 'name' not in header:
+                    raise ValueError(f"{member} has no food name column")
+                builder.add(header, rows)
+                stats['rows'] += len(rows)
+            stats['members'].append(member)
+    stats['duplicates'] = builder.duplicates
+    return builder.table(), stats
+
+
+def ingest_zip(zip_path: str, output_dir: str, chunk_rows: int = 256) -> Tuple[str, Dict]:
+    """Build a catalog snapshot from the dataset archive; returns (snapshot version, stats)"""
+    table, stats = read_food_groups(zip_path, chunk_rows)
+    stats['foods'] = len(table)
+    return write_snapshot(table, file_digest(zip_path), output_dir), stats
+
+
+if __name__ == '__main__':
+    import sys
+
+    zip_path = sys.argv[1] if len(sys.argv) > 1 else '../data/food-nutrition-dataset.zip'
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else '../data/catalog_full'
+    version, stats = ingest_zip(zip_path, output_dir)
+    print(f"✅ {stats['foods']} foods from {len(stats['members'])} groups "
+          f"({stats['duplicates']} duplicates dropped), snapshot {version} written to {output_dir}")
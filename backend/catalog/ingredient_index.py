@@ -0,0 +1,64 @@
+"""Inverted n-gram index over food names for ingredient lookups.
+
+``available_ingredients`` matches a food when an ingredient is a substring of
+its lowercased name.  Every substring of length 1-3 of every name is indexed,
+so short ingredients are answered directly from one posting list and longer
+ones by intersecting the posting lists of their trigrams and confirming the
+few remaining candidates with a plain substring check.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+MAX_GRAM = 3
+
+
+def _grams(text: str, size: int) -> Iterable[str]:
+    return (text[i:i + size] for i in range(len(text) - size + 1))
+
+
+class IngredientIndex:
+    """Maps name n-grams to sorted arrays of catalog row ids."""
+
+    def __init__(self, names_lower: Sequence[str]):
+        self.names_lower = [name if isinstance(name, str) else '' for name in names_lower]
+        self.all_rows = np.arange(len(self.names_lower), dtype=np.int32)
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for row, name in enumerate(self.names_lower):
+            grams = set()
+            for size in range(1, MAX_GRAM + 1):
+                grams.update(_grams(name, size))
+            for gram in grams:
+                postings[gram].append(row)
+        self._postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self._empty = np.array([], dtype=np.int32)
+
+    def rows_containing(self, ingredient: str) -> np.ndarray:
+        """Sorted row ids whose name contains ``ingredient`` (case-insensitive)"""
+        needle = ingredient.lower()
+        if not needle:
+            return self.all_rows
+        if len(needle) <= MAX_GRAM:
+            return self._postings.get(needle, self._empty)
+
+        # Intersect trigram postings, rarest first, then confirm the survivors
+        lists = sorted((self._postings.get(gram, self._empty) for gram in set(_grams(needle, MAX_GRAM))), key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        names = self.names_lower
+        return np.array([row for row in candidates.tolist() if needle in names[row]], dtype=np.int32)
+
+    def lookup(self, ingredients: Iterable[str]) -> np.ndarray:
+        """Sorted row ids whose name contains any of the ingredients"""
+        matches = [self.rows_containing(ingredient) for ingredient in ingredients]
+        if not matches:
+            return self._empty
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
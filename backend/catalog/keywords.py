@@ -0,0 +1,119 @@
+"""Multi-pattern keyword matching for food names.
+
+``KeywordMatcher`` compiles groups of keywords into a single Aho-Corasick
+automaton (stored as a fully expanded DFA), so classifying a name is one pass
+over its characters instead of one substring scan per keyword.  The result is
+the index of the first group that has a keyword anywhere in the text, which is
+exactly what checking ``any(word in text for word in group)`` group by group
+returns.  With ``whole_words`` a keyword only counts where it is not part of
+a longer word (the characters around it are not word characters, as with the
+regex ``\\b``), so ``'es'`` does not match ``'cheese'``.
+
+This module only uses the standard library.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over ordered keyword groups."""
+
+    def __init__(self, groups: Sequence[Sequence[str]], default: int = -1, whole_words: bool = False):
+        self.default = default
+        self.group_count = len(groups)
+        self.whole_words = whole_words
+
+        # Trie: goto[state][char] -> state, output[state] = lowest group index
+        # of any keyword ending at this state (or a suffix of it)
+        goto: List[Dict[str, int]] = [{}]
+        output = [self.group_count]
+        # (group, length) of the keywords ending at each state, for whole_words
+        ending: List[List[Tuple[int, int]]] = [[]]
+        for index, keywords in enumerate(groups):
+            for keyword in keywords:
+                state = 0
+                for char in keyword:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        goto.append({})
+                        output.append(self.group_count)
+                        ending.append([])
+                        next_state = len(goto) - 1
+                        goto[state][char] = next_state
+                    state = next_state
+                output[state] = min(output[state], index)
+                ending[state].append((index, len(keyword)))
+
+        # Breadth-first pass: resolve failure links into a complete DFA so the
+        # matcher never has to follow them at query time
+        transitions: List[Dict[str, int]] = [dict() for _ in goto]
+        transitions[0] = dict(goto[0])
+        failure = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] = min(output[state], output[failure[state]])
+            ending[state] = ending[state] + ending[failure[state]]
+            inherited = transitions[failure[state]]
+            transitions[state] = dict(inherited)
+            for char, child in goto[state].items():
+                failure[child] = inherited.get(char, 0)
+                transitions[state][char] = child
+                queue.append(child)
+
+        self._transitions = transitions
+        self._output = output
+        self._ending = [sorted(keywords) for keywords in ending]
+
+    def match(self, text: str) -> int:
+        """Index of the first group with a keyword contained in ``text`` (as a whole word with ``whole_words``)"""
+        if self.whole_words:
+            return self._match_words(text)
+        transitions = self._transitions
+        output = self._output
+        best = self.group_count
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if output[state] < best:
+                best = output[state]
+                if best == 0:
+                    break
+        return best if best < self.group_count else self.default
+
+    def _match_words(self, text: str) -> int:
+        transitions = self._transitions
+        output = self._output
+        ending = self._ending
+        best = self.group_count
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = transitions[state].get(char, 0)
+            if output[state] >= best or (end < len(text) and _is_word_char(text[end])):
+                continue
+            for group, length in ending[state]:
+                if group >= best:
+                    break
+                start = end - length
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    best = group
+                    break
+            if best == 0:
+                break
+        return best if best < self.group_count else self.default
+
+    def match_many(self, texts: Iterable[str]) -> List[int]:
+        """Batch ``match``; each distinct text is classified only once"""
+        seen: Dict[str, int] = {}
+        results = []
+        for text in texts:
+            group = seen.get(text)
+            if group is None:
+                group = seen[text] = self.match(text) if isinstance(text, str) else self.default
+            results.append(group)
+        return results
@@ -0,0 +1,245 @@
+"""Calorie-target-aware meal plans.
+
+``plan_meals`` picks one to ``MAX_FOODS_PER_MEAL`` foods for each of the
+``MEALS`` (breakfast, lunch and dinner, each with a share of the day's
+calorie target) so that the plan maximizes
+
+    total health score
+    - CALORIE_PENALTY per percent a meal misses its calorie share (beyond CALORIE_TOLERANCE)
+    - MACRO_PENALTY per percentage point the day's protein/carbohydrate/fat
+      energy shares fall outside MACRO_RANGES
+
+with no food served twice in a day.
+
+The search is a branch-and-bound over a pre-filtered pool.  For every meal
+and food count, only the healthiest ``POOL_PER_SIZE`` foods whose calories
+suit that count are kept, so the pool size does not grow with the catalog.
+All combinations of pool foods are scored at once with numpy for the
+per-meal part of the objective and sorted best first.  The macro penalty can
+only lower a plan's value, so the sum of the per-meal values bounds every
+plan below a branch, and the three nested loops stop as soon as that bound
+cannot beat the best plan found.  The search starts from the greedy plan and
+stops at ``time_budget``, returning the best plan found so far
+(``MealPlan.optimal`` tells whether the search finished).
+
+Multi-day plans (``plan_days``) score the catalog and rank the pool once,
+``depth`` times deeper, in a ``PlanningPool``; each day then plans from the
+best foods not served within the last ``variety_days`` days.  Swapping one
+meal (``replan_day``) re-plans only that day, around its neighbours.
+"""
+
+import time
+from itertools import combinations
+from typing import Collection, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from catalog.ranking import top_k
+
+# (meal type, share of the day's calories)
+MEALS = (
+    ('Sarapan Sehat', 0.25),
+    ('Makan Siang Bergizi', 0.40),
+    ('Makan Malam Seimbang', 0.35),
+)
+MAX_FOODS_PER_MEAL = 3
+POOL_PER_SIZE = 10
+
+# Meals within this fraction of their calorie share are not penalized
+CALORIE_TOLERANCE = 0.10
+CALORIE_PENALTY = 0.1
+# Acceptable share of the day's energy per macronutrient (AMDR)
+MACRO_RANGES = {
+    'protein': (0.10, 0.35),
+    'carbohydrates': (0.45, 0.65),
+    'fat': (0.20, 0.35),
+}
+MACRO_PENALTY = 0.1
+# kcal per gram, in MACRO_RANGES order
+MACRO_ENERGY = np.array([4.0, 4.0, 9.0])
+
+
+class MealPlan(NamedTuple):
+    meals: List[np.ndarray]  # row ids per entry of MEALS
+    value: float
+    optimal: bool
+    nodes: int
+    seconds: float
+
+
+class _MealOptions(NamedTuple):
+    """Every food combination for one meal, best per-meal value first"""
+    rows: np.ndarray  # (options, MAX_FOODS_PER_MEAL), -1 padded
+    value: np.ndarray
+    macros: np.ndarray  # (options, 3) energy from protein, carbohydrates, fat
+    masks: List[int]  # bit r set when row r is in the combination
+
+
+class PlanningPool:
+    """Candidate foods of every meal and food count, healthiest first, for one scored catalog and target.
+
+    ``depth`` keeps that many times ``POOL_PER_SIZE`` foods per meal and
+    count, so a day can still choose from a full pool when the foods of
+    earlier days are excluded.
+    """
+
+    def __init__(self, scored, candidates: np.ndarray, target_calories: float, depth: int = 1):
+        self.scored = scored
+        self.target_calories = target_calories
+        measured = scored.calories[candidates] > 0
+        for column in (scored.proteins, scored.carbohydrate, scored.fat):
+            measured &= ~np.isnan(column[candidates])
+        candidates = candidates[measured]
+        calories = scored.calories[candidates]
+        self.ranked = []
+        for _, share in MEALS:
+            by_count = []
+            for count in range(1, MAX_FOODS_PER_MEAL + 1):
+                ideal = target_calories * share / count
+                suitable = candidates[(calories >= ideal * 0.5) & (calories <= ideal * 1.5)]
+                by_count.append(top_k(scored.health_score, POOL_PER_SIZE * depth, suitable))
+            self.ranked.append(by_count)
+
+    def meal_pool(self, meal: int, excluded: Collection[int] = ()) -> np.ndarray:
+        """The ``POOL_PER_SIZE`` healthiest foods per count of one meal, without ``excluded``"""
+        pool = []
+        for ranked in self.ranked[meal]:
+            if excluded:
+                ranked = ranked[~np.isin(ranked, list(excluded))]
+            pool.append(ranked[:POOL_PER_SIZE])
+        return np.unique(np.concatenate(pool))
+
+    def options(self, excluded: Collection[int] = ()) -> List['_MealOptions']:
+        return [_meal_options(self.scored, self.meal_pool(meal, excluded), self.target_calories * share)
+                for meal, (_, share) in enumerate(MEALS)]
+
+    def plan(self, excluded: Collection[int] = (), time_budget: float = 0.05) -> Optional[MealPlan]:
+        """Best one-day plan without the ``excluded`` foods (None if they can't fill it)"""
+        return search_plan(self.options(excluded), time_budget)
+
+
+def _meal_options(scored, pool: np.ndarray, meal_calories: float) -> _MealOptions:
+    combos = [combo + (-1,) * (MAX_FOODS_PER_MEAL - len(combo))
+              for count in range(1, MAX_FOODS_PER_MEAL + 1)
+              for combo in combinations(pool.tolist(), count)]
+    rows = np.array(combos, dtype=np.int64).reshape(-1, MAX_FOODS_PER_MEAL)
+    present = rows >= 0
+    safe = np.where(present, rows, 0)
+
+    def total(column):
+        return np.where(present, column[safe], 0).sum(axis=1)
+
+    calories = total(scored.calories)
+    miss = np.abs(calories - meal_calories) / meal_calories - CALORIE_TOLERANCE
+    value = total(scored.health_score.astype(float)) - CALORIE_PENALTY * 100 * np.maximum(miss, 0)
+    macros = np.stack([total(scored.proteins), total(scored.carbohydrate), total(scored.fat)], axis=1) * MACRO_ENERGY
+
+    order = np.argsort(-value, kind='stable')
+    rows, value, macros = rows[order], value[order], macros[order]
+    masks = [sum(1 << row for row in combo if row >= 0) for combo in rows.tolist()]
+    return _MealOptions(rows, value, macros, masks)
+
+
+def macro_penalty(macros: np.ndarray) -> np.ndarray:
+    """Penalty for (protein, carbohydrate, fat) energy rows outside MACRO_RANGES"""
+    energy = macros.sum(axis=-1, keepdims=True)
+    shares = macros / np.where(energy > 0, energy, 1)
+    low, high = np.array(list(MACRO_RANGES.values())).T
+    return MACRO_PENALTY * 100 * np.maximum(np.maximum(low - shares, shares - high), 0).sum(axis=-1)
+
+
+def plan_meals(scored, candidates: np.ndarray, target_calories: float,
+               time_budget: float = 0.05) -> Optional[MealPlan]:
+    """Best plan of ``MEALS`` for ``target_calories`` from ``candidates`` (None if they can't fill it)"""
+    return PlanningPool(scored, candidates, target_calories).plan(time_budget=time_budget)
+
+
+def search_plan(options: List[_MealOptions], time_budget: float) -> Optional[MealPlan]:
+    """Branch-and-bound over the options of each meal"""
+    started = time.perf_counter()
+    deadline = started + time_budget
+    if any(not len(option.value) for option in options):
+        return None
+
+    first, second, third = options
+    best_rest = float(second.value[0] + third.value[0])
+    best_last = float(third.value[0])
+    # Descending per-meal values, negated for searchsorted
+    third_order = -third.value
+    best_value = -np.inf
+    best = None
+    nodes = 0
+    optimal = True
+
+    for i, first_mask in enumerate(first.masks):
+        if first.value[i] + best_rest <= best_value:
+            break
+        for j, second_mask in enumerate(second.masks):
+            bound = float(first.value[i] + second.value[j])
+            if bound + best_last <= best_value:
+                break
+            if first_mask & second_mask:
+                continue
+            if best is not None and time.perf_counter() > deadline:
+                optimal = False
+                break
+            # Every dinner that could still win, checked at once
+            n = int(np.searchsorted(third_order, bound - best_value, side='left')) if best is not None else len(third_order)
+            used = np.concatenate([first.rows[i], second.rows[j]])
+            values = bound + third.value[:n] - macro_penalty(first.macros[i] + second.macros[j] + third.macros[:n])
+            values[np.isin(third.rows[:n], used[used >= 0]).any(axis=1)] = -np.inf
+            nodes += n
+            k = int(np.argmax(values)) if n else 0
+            if n and values[k] > best_value:
+                best_value, best = float(values[k]), (i, j, k)
+        if not optimal:
+            break
+
+    if best is None:
+        return None
+    meal_rows = [option.rows[index][option.rows[index] >= 0] for option, index in zip(options, best)]
+    return MealPlan(meal_rows, best_value, optimal, nodes, time.perf_counter() - started)
+
+
+def _served(plans: Sequence[Optional[MealPlan]], days: range) -> set:
+    return {int(row) for day in days for meals in [plans[day]] if meals is not None
+            for rows in meals.meals for row in rows}
+
+
+def plan_days(pool: PlanningPool, days: int, variety_days: int,
+              time_budget: float = 0.05) -> List[Optional[MealPlan]]:
+    """One plan per day; no food is served again within ``variety_days`` days (None: day can't be filled)"""
+    plans: List[Optional[MealPlan]] = []
+    for day in range(days):
+        plans.append(pool.plan(_served(plans, range(max(day - variety_days + 1, 0), day)), time_budget))
+    return plans
+
+
+def replan_day(pool: PlanningPool, plans: Sequence[Optional[MealPlan]], day: int, variety_days: int,
+               banned: Collection[int] = (), time_budget: float = 0.05) -> Optional[MealPlan]:
+    """New plan for ``day`` alone, keeping variety with the days around it and avoiding ``banned``"""
+    window = range(max(day - variety_days + 1, 0), min(day + variety_days, len(plans)))
+    excluded = _served(plans, range(window.start, day)) | _served(plans, range(day + 1, window.stop))
+    return pool.plan(excluded | {int(row) for row in banned}, time_budget)
+
+
+def meal_plans_payload(scored, plan: MealPlan, target_calories: float, ids: np.ndarray) -> List[dict]:
+    """``meal_plans`` entries for a plan; ``ids`` are the catalog food ids by row"""
+    return [
+        {
+            'meal_type': meal_type,
+            'target_calories': int(round(target_calories * share)),
+            'total_calories': int(sum(int(scored.calories[i]) for i in rows)),
+            'foods': [
+                {'id': int(ids[i]), 'name': scored.names[i], 'calories': int(scored.calories[i]),
+                 'health_score': int(scored.health_score[i])}
+                for i in rows.tolist()
+            ],
+            'nutrition': {
+                'protein': round(float(scored.proteins[rows].sum()), 1),
+                'carbohydrates': round(float(scored.carbohydrate[rows].sum()), 1),
+                'fat': round(float(scored.fat[rows].sum()), 1)
+            }
+        }
+        for (meal_type, share), rows in zip(MEALS, plan.meals)
+    ]
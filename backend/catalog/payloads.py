@@ -0,0 +1,91 @@
+"""Pre-encoded JSON payloads served straight from memory.
+
+Responses that only change with the catalog version are serialized once,
+compressed once per content coding, and tagged with a strong ETag so
+unchanged clients get a ``304 Not Modified`` without any work.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Dict, List
+
+from flask import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip and identity are offered without it
+    brotli = None
+
+
+class EncodedPayload:
+    """A JSON document with its gzip/brotli variants and a strong ETag."""
+
+    def __init__(self, data):
+        # Same output as jsonify(): sorted keys, compact separators
+        self.body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8') + b'\n'
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded: Dict[str, bytes] = {'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body, quality=11)
+
+    def etag_for(self, encoding: str) -> str:
+        # Each content coding is a different representation, so each gets
+        # its own strong validator
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+    def choose_encoding(self, request: Request) -> str:
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and request.accept_encodings[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def response(self, request: Request) -> Response:
+        """Serve the best encoding the client accepts, or 304 if it is current"""
+        encoding = self.choose_encoding(request)
+        etag = self.etag_for(encoding)
+        if any(request.if_none_match.contains_weak(self.etag_for(candidate)) for candidate in ['identity', *self.encoded]):
+            response = Response(status=304)
+        else:
+            response = Response(self.encoded.get(encoding, self.body), mimetype='application/json')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+def food_list(catalog) -> List[Dict]:
+    """Every catalog food as a /api/foods entry"""
+    table = catalog.table
+    return [
+        {
+            'id': food_id,
+            'name': name,
+            'calories': calories,
+            'protein': protein,
+            'fat': fat,
+            'carbohydrate': carbohydrate,
+            'image': image,
+            'category': category
+        }
+        for food_id, name, calories, protein, fat, carbohydrate, image, category in zip(
+            table['id'].tolist(), table['name'].tolist(), table['calories'].tolist(),
+            table['proteins'].tolist(), table['fat'].tolist(), table['carbohydrate'].tolist(),
+            table['image'].tolist() if 'image' in table else [''] * len(table),
+            catalog.features.categories()
+        )
+    ]
+
+
+def foods_payload(catalog) -> EncodedPayload:
+    """The full /api/foods response, encoded once per catalog version"""
+    def build(catalog):
+        foods = food_list(catalog)
+        return EncodedPayload({
+            'success': True,
+            'data': foods,
+            'total': len(foods)
+        })
+    return catalog.derived('foods_payload', build)
@@ -0,0 +1,35 @@
+"""Ranking helpers for catalog score arrays."""
+
+from typing import Optional
+
+import numpy as np
+
+
+def top_k(scores: np.ndarray, k: int, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """Row ids of the ``k`` highest scores, best first.
+
+    ``candidates`` (default: every row) must be sorted ascending.  Ties are
+    broken by ascending row id, the same order a stable descending sort of
+    the whole catalog produces.  Only a partial selection
+    (``argpartition``) is done over the candidates; the full sort is limited
+    to the ``k`` winners.
+    """
+    if candidates is None:
+        candidates = np.arange(len(scores))
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+
+    candidate_scores = scores[candidates]
+    if k < len(candidates):
+        # Everything strictly above the k-th best score wins; the remaining
+        # slots go to the lowest row ids among the ties at that score
+        kth_score = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+        above = np.flatnonzero(candidate_scores > kth_score)
+        ties = np.flatnonzero(candidate_scores == kth_score)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(candidates))
+
+    winners = candidates[selected]
+    order = np.lexsort((winners, -candidate_scores[selected]))
+    return winners[order]
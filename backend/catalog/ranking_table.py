@@ -0,0 +1,143 @@
+"""Materialized /api/recommendations results for every health-condition set.
+
+Without ``available_ingredients`` a recommendation result depends only on the
+set of requested health conditions and the catalog version.  With the ten
+advertised conditions there are 1,024 such sets, so ``build_ranking_table``
+runs the live builder once for each condition mask (see
+``catalog.conditions.condition_mask``) and keeps the results in a list
+indexed by mask: an ingredient-free request is then a single list lookup.
+
+Results share most of their structure (the same food with the same score
+appears under many masks, as do identical analyses and meal plans), so every
+dict and list is interned (by content, children by identity) and stored once.
+``memory_report()`` gives the size of the interned table; a table over
+``max_bytes`` is dropped and requests fall back to live computation, as they
+do while the table is being built.
+"""
+
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from catalog.conditions import HEALTH_CONDITIONS
+
+
+def conditions_for_mask(mask: int) -> List[str]:
+    return [condition for bit, condition in enumerate(HEALTH_CONDITIONS) if mask >> bit & 1]
+
+
+def _intern_key(item: Any) -> Any:
+    # Interned children are compared by identity; type keeps 1, 1.0 and True apart
+    return ('ref', id(item)) if isinstance(item, (dict, list)) else (type(item), item)
+
+
+def _intern(value: Any, pool: Dict[Any, Any]) -> Any:
+    """``value`` with every dict and list replaced by one shared, equal copy"""
+    if isinstance(value, dict):
+        value = {key: _intern(item, pool) for key, item in value.items()}
+        key = ('dict',) + tuple((name, _intern_key(item)) for name, item in value.items())
+    elif isinstance(value, list):
+        value = [_intern(item, pool) for item in value]
+        key = ('list',) + tuple(_intern_key(item) for item in value)
+    else:
+        return value
+    return pool.setdefault(key, value)
+
+
+def _deep_size(value: Any, seen: set) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(item, seen) for item in value)
+    return size
+
+
+class RankingTable:
+    """Read-only results for masks ``0 .. 2**len(HEALTH_CONDITIONS) - 1`` of one catalog version."""
+
+    def __init__(self, version: str, results: List[Dict], unique_objects: int, build_seconds: float):
+        self.version = version
+        self.results = results
+        self.unique_objects = unique_objects
+        self.build_seconds = build_seconds
+        self.bytes = _deep_size(results, set())
+
+    def lookup(self, mask: int) -> Dict:
+        return self.results[mask]
+
+    def memory_report(self) -> Dict:
+        return {
+            'version': self.version,
+            'combinations': len(self.results),
+            'unique_objects': self.unique_objects,
+            'bytes': self.bytes,
+            'build_seconds': round(self.build_seconds, 3)
+        }
+
+
+def build_ranking_table(catalog, build: Callable[[Any, List[str]], Dict]) -> RankingTable:
+    """Run ``build(catalog, conditions)`` for every condition set and intern the results"""
+    started = time.perf_counter()
+    pool: Dict[Any, Any] = {}
+    results = [_intern(build(catalog, conditions_for_mask(mask)), pool)
+               for mask in range(1 << len(HEALTH_CONDITIONS))]
+    return RankingTable(catalog.version, results, len(pool), time.perf_counter() - started)
+
+
+class RankingTableStore:
+    """The ranking table of the current catalog, rebuilt in the background on reload."""
+
+    def __init__(self, build: Callable[[Any, List[str]], Dict], max_bytes: Optional[int] = None):
+        self.build = build
+        self.max_bytes = max_bytes
+        self._table: Optional[RankingTable] = None
+        self.state = 'not_built'
+        self._report: Optional[Dict] = None
+        self._latest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get(self, version: str) -> Optional[RankingTable]:
+        """The table for catalog ``version``, or None (compute live) if it isn't built"""
+        table = self._table
+        return table if table is not None and table.version == version else None
+
+    def rebuild(self, catalog, background: bool = True) -> Optional[threading.Thread]:
+        """Build the table for ``catalog``; usable as a ``CatalogStore`` listener"""
+        self._latest = catalog.version
+        if not background:
+            self._build(catalog)
+            return None
+        thread = threading.Thread(target=self._build, args=(catalog,), name='ranking-table', daemon=True)
+        thread.start()
+        return thread
+
+    def _build(self, catalog) -> None:
+        with self._lock:
+            if catalog.version != self._latest:
+                # A newer catalog was loaded while this build was queued
+                return
+            self.state = 'building'
+            try:
+                table = build_ranking_table(catalog, self.build)
+            except Exception as e:
+                print(f"❌ Error building ranking table: {e}")
+                self.state = 'failed'
+                return
+            self._report = table.memory_report()
+            if self.max_bytes is not None and table.bytes > self.max_bytes:
+                print(f"⚠️ Ranking table needs {table.bytes} bytes (budget {self.max_bytes}), using live ranking")
+                self._table = None
+                self.state = 'over_budget'
+                return
+            self._table = table
+            self.state = 'ready'
+            print(f"✅ Ranking table built: {table.unique_objects} unique objects, "
+                  f"{table.bytes / 1024:.0f} KiB in {table.build_seconds:.2f}s")
+
+    def stats(self) -> Dict:
+        return {'state': self.state, 'max_bytes': self.max_bytes, **(self._report or {})}
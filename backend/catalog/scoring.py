@@ -0,0 +1,305 @@
+"""Food categorization and health scoring.
+
+The scalar functions (``categorize_food``, ``estimate_fiber_sugar`` and
+``calculate_health_score``) are the reference implementation.  The column
+functions compute the same values for a whole catalog as NumPy operations:
+the condition-independent parts once per catalog version (see
+``catalog.features``) and the health-condition adjustments (rule table in
+``catalog.conditions``) per request in ``score_catalog``, so handlers only
+convert the final top-N rows into dicts.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from catalog.conditions import condition_score_delta, scalar_condition_delta
+from catalog.keywords import KeywordMatcher
+
+# Category keyword lists in precedence order: the first category with a
+# keyword appearing as a whole word in the lowercased name wins.
+CATEGORY_KEYWORDS = [
+    ('Protein Hewani', ['ayam', 'daging', 'sapi', 'kambing', 'babi', 'ikan', 'udang', 'telur', 'susu', 'keju', 'empal', 'cumi', 'penyu', 'domba']),
+    ('Makanan Pokok', ['nasi', 'beras', 'jagung', 'singkong', 'ubi', 'kentang', 'mie', 'pasta', 'roti', 'oatmeal', 'ketan', 'tepung']),
+    ('Sayuran', ['bayam', 'kangkung', 'brokoli', 'wortel', 'tomat', 'terung', 'labu', 'daun', 'sayur', 'selada', 'buncis', 'kacang panjang', 'pare', 'seledri', 'bawang', 'cabai']),
+    ('Buah-buahan', ['pisang', 'apel', 'jeruk', 'mangga', 'buah', 'nanas', 'pepaya', 'alpukat', 'jambu', 'kedondong', 'nangka', 'markisa']),
+    ('Protein Nabati', ['tahu', 'tempe', 'kacang', 'kedelai', 'oncom', 'koro']),
+    ('Kue dan Snack', ['kue', 'cake', 'biskuit', 'kerupuk', 'snack', 'martabak', 'putu', 'misro', 'getuk']),
+    ('Minuman', ['teh', 'kopi', 'jus', 'es', 'minuman', 'squash']),
+    ('Bumbu dan Condiment', ['bawang', 'cabai', 'merica', 'garam', 'gula', 'minyak', 'cuka', 'petis', 'rusip']),
+]
+DEFAULT_CATEGORY = 'Lainnya'
+CATEGORIES = [category for category, _ in CATEGORY_KEYWORDS] + [DEFAULT_CATEGORY]
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+# (fiber ratio, fiber floor, sugar ratio, sugar floor) applied to carbohydrates
+FIBER_SUGAR_RATIOS = {
+    'Sayuran': (0.3, 0.5, 0.1, 0.1),
+    'Buah-buahan': (0.15, 1.0, 0.6, 2.0),
+    'Protein Nabati': (0.25, 2.0, 0.05, 0.5),
+    'Makanan Pokok': (0.08, 0.5, 0.02, 0.1),
+    'Protein Hewani': (0.0, 0.0, 0.0, 0.0),
+    'Kue dan Snack': (0.02, 0.1, 0.4, 1.0),
+}
+DEFAULT_FIBER_SUGAR_RATIO = (0.05, 0.1, 0.1, 0.1)
+
+# Known fiber/sugar values that override the category estimate, first match wins
+FIBER_SUGAR_OVERRIDES = [
+    (('bayam',), 2.2, 0.4),
+    (('brokoli',), 2.6, 1.5),
+    (('wortel',), 2.8, 4.7),
+    (('pisang',), 2.6, 12.2),
+    (('apel',), 2.4, 10.4),
+    (('nasi merah', 'beras merah'), 1.8, 0.4),
+    (('oatmeal',), 2.8, 0.3),
+]
+
+ANTIOXIDANT_CATEGORIES = ['Sayuran', 'Buah-buahan']
+
+CATEGORY_MATCHER = KeywordMatcher(
+    [keywords for _, keywords in CATEGORY_KEYWORDS], default=CATEGORY_CODES[DEFAULT_CATEGORY], whole_words=True
+)
+FIBER_SUGAR_OVERRIDE_MATCHER = KeywordMatcher([words for words, _, _ in FIBER_SUGAR_OVERRIDES])
+
+# Health labels in output order; bit ``i`` of a label mask is HEALTH_LABELS[i]
+HEALTH_LABELS = [
+    'tinggi_protein',
+    'rendah_lemak',
+    'rendah_karbohidrat',
+    'tinggi_serat',
+    'rendah_kalori',
+    'rendah_gula',
+    'antioksidan',
+]
+
+
+def categorize_food(food_name: str) -> str:
+    """Categorize food based on its name"""
+    return CATEGORIES[CATEGORY_MATCHER.match(food_name.lower())]
+
+
+def estimate_fiber_sugar(food_name: str, category: str, calories: float, carbs: float) -> tuple:
+    """Estimate fiber and sugar content based on food category and characteristics"""
+    name_lower = food_name.lower()
+
+    fiber_ratio, fiber_floor, sugar_ratio, sugar_floor = FIBER_SUGAR_RATIOS.get(category, DEFAULT_FIBER_SUGAR_RATIO)
+    if category == 'Protein Hewani':
+        # Animal proteins typically have 0g fiber and 0g sugar
+        fiber = 0.0
+        sugar = 0.0
+    else:
+        fiber = max(fiber_floor, carbs * fiber_ratio)
+        sugar = max(sugar_floor, carbs * sugar_ratio)
+
+    # Adjust based on specific foods
+    override = FIBER_SUGAR_OVERRIDE_MATCHER.match(name_lower)
+    if override >= 0:
+        _, fiber, sugar = FIBER_SUGAR_OVERRIDES[override]
+
+    return round(fiber, 1), round(sugar, 1)
+
+
+def calculate_health_score(food_name: str, category: str, calories: float, protein: float, fat: float, carbs: float, fiber: float, sugar: float, health_conditions: list,
+                           sodium: Optional[float] = None, cholesterol: Optional[float] = None, saturated_fat: Optional[float] = None) -> int:
+    """Calculate health score (1-5) based on nutritional content and health conditions"""
+    score = 3  # Base score
+
+    # Calorie scoring
+    if calories <= 100:
+        score += 1
+    elif calories <= 200:
+        score += 0.5
+    elif calories > 400:
+        score -= 1
+
+    # Protein scoring
+    if protein >= 15:
+        score += 1
+    elif protein >= 10:
+        score += 0.5
+    elif protein < 2:
+        score -= 0.5
+
+    # Fat scoring
+    if fat <= 5:
+        score += 1
+    elif fat <= 10:
+        score += 0.5
+    elif fat > 20:
+        score -= 1
+
+    # Carb scoring
+    if carbs <= 20:
+        score += 0.5
+    elif carbs > 50:
+        score -= 0.5
+
+    # Fiber scoring
+    if fiber >= 3:
+        score += 1
+    elif fiber >= 1:
+        score += 0.5
+
+    # Sugar scoring
+    if sugar <= 2:
+        score += 1
+    elif sugar <= 5:
+        score += 0.5
+    elif sugar > 15:
+        score -= 1
+
+    # Category bonus
+    if category in ANTIOXIDANT_CATEGORIES:
+        score += 0.5
+
+    # Optional nutrients that are all 0 were not measured (see FeatureTable)
+    optional = [value for value in (sodium, cholesterol, saturated_fat) if value is not None]
+    if optional and all(value == 0 for value in optional):
+        sodium = cholesterol = saturated_fat = None
+
+    # Health condition specific scoring
+    score += scalar_condition_delta({
+        'calories': calories, 'proteins': protein, 'fat': fat, 'carbohydrate': carbs, 'fiber': fiber,
+        'sugar': sugar, 'sodium': sodium, 'cholesterol': cholesterol, 'saturated_fat': saturated_fat,
+        'category_codes': CATEGORY_CODES.get(category, CATEGORY_CODES[DEFAULT_CATEGORY])
+    }, health_conditions)
+
+    # Ensure score is between 1 and 5
+    return max(1, min(5, int(round(score))))
+
+
+def round1(values: np.ndarray) -> np.ndarray:
+    """Round to one decimal exactly like the builtin ``round(x, 1)``.
+
+    ``np.round`` scales by ten before rounding, which can land on the other
+    side of a tie than Python's correctly-rounded ``round``; the few values
+    sitting on a tie are rounded with the builtin instead.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, 1) for value in values[near_tie].tolist()]
+    return rounded
+
+
+def categorize_names(names_lower: Sequence[str]) -> np.ndarray:
+    """Batch ``categorize_food``: category code per lowercased name"""
+    return np.array(CATEGORY_MATCHER.match_many(names_lower), dtype=np.int8)
+
+
+def estimate_fiber_sugar_columns(names_lower: Sequence[str], category_codes: np.ndarray, carbs: np.ndarray) -> tuple:
+    """Vectorized ``estimate_fiber_sugar`` returning (fiber, sugar) arrays"""
+    ratios = [FIBER_SUGAR_RATIOS.get(category, DEFAULT_FIBER_SUGAR_RATIO) for category in CATEGORIES]
+    fiber_ratio, fiber_floor, sugar_ratio, sugar_floor = (np.array(column)[category_codes] for column in zip(*ratios))
+
+    # fmax keeps the floor for missing carbohydrates, like the builtin max()
+    fiber = np.fmax(fiber_floor, carbs * fiber_ratio)
+    sugar = np.fmax(sugar_floor, carbs * sugar_ratio)
+    animal = category_codes == CATEGORY_CODES['Protein Hewani']
+    fiber[animal] = 0.0
+    sugar[animal] = 0.0
+
+    overrides = np.array(FIBER_SUGAR_OVERRIDE_MATCHER.match_many(names_lower))
+    known = overrides >= 0
+    fiber[known] = np.array([known_fiber for _, known_fiber, _ in FIBER_SUGAR_OVERRIDES])[overrides[known]]
+    sugar[known] = np.array([known_sugar for _, _, known_sugar in FIBER_SUGAR_OVERRIDES])[overrides[known]]
+    return round1(fiber), round1(sugar)
+
+
+def _tiered(conditions: List[np.ndarray], deltas: List[float]) -> np.ndarray:
+    return np.select(conditions, deltas, default=0.0)
+
+
+def base_score_columns(category_codes: np.ndarray, calories: np.ndarray, protein: np.ndarray, fat: np.ndarray,
+                       carbs: np.ndarray, fiber: np.ndarray, sugar: np.ndarray) -> np.ndarray:
+    """Condition-independent part of ``calculate_health_score`` (unrounded)"""
+    score = np.full(len(calories), 3.0)
+    score += _tiered([calories <= 100, calories <= 200, calories > 400], [1, 0.5, -1])
+    score += _tiered([protein >= 15, protein >= 10, protein < 2], [1, 0.5, -0.5])
+    score += _tiered([fat <= 5, fat <= 10, fat > 20], [1, 0.5, -1])
+    score += _tiered([carbs <= 20, carbs > 50], [0.5, -0.5])
+    score += _tiered([fiber >= 3, fiber >= 1], [1, 0.5])
+    score += _tiered([sugar <= 2, sugar <= 5, sugar > 15], [1, 0.5, -1])
+    antioxidant = np.isin(category_codes, [CATEGORY_CODES[c] for c in ANTIOXIDANT_CATEGORIES])
+    score += np.where(antioxidant, 0.5, 0.0)
+    return score
+
+
+def finalize_scores(score: np.ndarray) -> np.ndarray:
+    """Round and clamp raw scores to int8 health scores in 1-5"""
+    # np.rint rounds half to even, like the builtin round()
+    return np.clip(np.rint(score), 1, 5).astype(np.int8)
+
+
+def health_label_masks(category_codes: np.ndarray, calories: np.ndarray, protein: np.ndarray, fat: np.ndarray,
+                       carbs: np.ndarray, fiber: np.ndarray, sugar: np.ndarray) -> np.ndarray:
+    """Bitmask of HEALTH_LABELS per food"""
+    antioxidant = np.isin(category_codes, [CATEGORY_CODES[c] for c in ANTIOXIDANT_CATEGORIES])
+    flags = [protein >= 15, fat <= 5, carbs <= 20, fiber >= 3, calories <= 200, sugar <= 2, antioxidant]
+    masks = np.zeros(len(calories), dtype=np.uint8)
+    for bit, flag in enumerate(flags):
+        masks |= flag.astype(np.uint8) << bit
+    return masks
+
+
+def labels_from_mask(mask: int) -> List[str]:
+    return [label for bit, label in enumerate(HEALTH_LABELS) if mask >> bit & 1]
+
+
+class ScoredCatalog:
+    """Health scores for one set of health conditions over a feature table.
+
+    Only the condition adjustments are computed here; everything else is
+    read from the precomputed ``FeatureTable``.
+    """
+
+    def __init__(self, features, health_conditions: list):
+        self.features = features
+        self.names = features.names
+        self.calories = features.calories
+        self.proteins = features.proteins
+        self.fat = features.fat
+        self.carbohydrate = features.carbohydrate
+        self.fiber = features.fiber
+        self.sugar = features.sugar
+        self.category_codes = features.category_codes
+        self.label_masks = features.label_masks
+        self.health_score = finalize_scores(features.base_score + condition_score_delta(features, health_conditions))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def category(self, i: int) -> str:
+        return CATEGORIES[self.category_codes[i]]
+
+    def recommendation(self, i: int, health_conditions: list, health_labels: Optional[List[str]] = None) -> Dict:
+        """Materialize one food as a /api/recommendations entry"""
+        name = self.names[i]
+        category = self.category(i)
+        return {
+            'name': name,
+            'category': category,
+            'calories': int(self.calories[i]),
+            'protein': float(self.proteins[i]),
+            'carbohydrates': float(self.carbohydrate[i]),
+            'fat': float(self.fat[i]),
+            'fiber': float(self.fiber[i]),
+            'sugar': float(self.sugar[i]),
+            'health_score': int(self.health_score[i]),
+            'health_labels': labels_from_mask(int(self.label_masks[i])) if health_labels is None else health_labels,
+            'suitable_for': health_conditions,
+            'region': 'Indonesia',
+            'description': f"{name} - {category}"
+        }
+
+
+def score_catalog(features, health_conditions: list) -> ScoredCatalog:
+    """Score every food of a ``FeatureTable`` for the given health conditions.
+
+    Each known condition counts once however often it is listed (see
+    ``condition_mask``); unknown conditions are ignored.
+    """
+    return ScoredCatalog(features, health_conditions)
+
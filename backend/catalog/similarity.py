@@ -0,0 +1,138 @@
+"""Nutrient-similarity index for "foods like this one" lookups.
+
+Every food is a point of standardized ``SIMILARITY_FEATURES`` (each nutrient
+minus its catalog mean, divided by its standard deviation; missing values
+sit at the mean).  ``NutrientKDTree`` is a static KD-tree over those points,
+kept in flat NumPy arrays: nodes split at the median of their widest
+dimension and leaves hold up to ``LEAF_SIZE`` points, which are compared
+with one vector operation.  A query descends to the nearest leaf first and
+skips every subtree whose splitting plane is further away than the current
+k-th neighbour by the time it is reached.
+
+``SimilarityIndex`` is built once per catalog version (``Catalog.derived``).
+Queries can be restricted to an ``allowed`` mask (e.g. foods with a higher
+health score); when few foods are allowed they are compared directly
+instead of walking a tree that is mostly filtered out.
+"""
+
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# FeatureTable attributes forming the nutrient vector
+SIMILARITY_FEATURES = ('calories', 'proteins', 'fat', 'carbohydrate', 'fiber', 'sugar')
+LEAF_SIZE = 16
+# Allowed sets up to this size are searched by brute force
+BRUTE_FORCE_ROWS = 256
+
+
+class NutrientKDTree:
+    """Static KD-tree over the rows of ``points`` (n, d)."""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.points = np.ascontiguousarray(points, dtype=float)
+        self.leaf_size = leaf_size
+        # Row ids, permuted so that every node covers order[start:end]
+        self.order = np.arange(len(self.points))
+        self.start: List[int] = []
+        self.end: List[int] = []
+        self.dim: List[int] = []  # -1 for leaves
+        self.split: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def _build(self, start: int, end: int) -> int:
+        node = len(self.start)
+        self.start.append(start)
+        self.end.append(end)
+        self.dim.append(-1)
+        self.split.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        if end - start <= self.leaf_size:
+            return node
+
+        rows = self.order[start:end]
+        values = self.points[rows]
+        dim = int(np.argmax(values.max(axis=0) - values.min(axis=0)))
+        middle = (end - start) // 2
+        partition = np.argpartition(values[:, dim], middle)
+        self.order[start:end] = rows[partition]
+        self.dim[node] = dim
+        self.split[node] = float(self.points[self.order[start + middle], dim])
+        self.left[node] = self._build(start, start + middle)
+        self.right[node] = self._build(start + middle, end)
+        return node
+
+    def query(self, point: np.ndarray, k: int,
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids of the ``k`` nearest ``allowed`` points and their distances, nearest first (ties by row id)"""
+        if k <= 0 or not len(self.points):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        point = np.asarray(point, dtype=float)
+        # Max-heap of (-squared distance, -row) holding the best k so far
+        best: List[Tuple[float, int]] = []
+        # (node, squared distance of its splitting plane): a lower bound
+        # checked when the node is popped, after nearer nodes have run
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound > -best[0][0]:
+                continue
+            dim = self.dim[node]
+            if dim < 0:
+                rows = self.order[self.start[node]:self.end[node]]
+                if allowed is not None:
+                    rows = rows[allowed[rows]]
+                distances = ((self.points[rows] - point) ** 2).sum(axis=1)
+                for distance, row in zip(distances.tolist(), rows.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, -row))
+                    elif (distance, row) < (-best[0][0], -best[0][1]):
+                        heapq.heapreplace(best, (-distance, -row))
+                continue
+
+            gap = point[dim] - self.split[node]
+            near, far = (self.left[node], self.right[node]) if gap < 0 else (self.right[node], self.left[node])
+            stack.append((far, max(bound, gap * gap)))
+            stack.append((near, bound))
+
+        ranked = sorted((-distance, -row) for distance, row in best)
+        rows = np.array([row for _, row in ranked], dtype=np.int64)
+        return rows, np.sqrt(np.array([distance for distance, _ in ranked]))
+
+
+def standardize(columns: List[np.ndarray]) -> np.ndarray:
+    """Stack nutrient columns into z-scores; NaN becomes the column mean (0)"""
+    points = np.column_stack([np.asarray(column, dtype=float) for column in columns])
+    mean = np.nanmean(points, axis=0) if len(points) else np.zeros(points.shape[1])
+    std = np.nanstd(points, axis=0) if len(points) else np.ones(points.shape[1])
+    mean = np.nan_to_num(mean)
+    std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+    return np.nan_to_num((points - mean) / std)
+
+
+class SimilarityIndex:
+    """KD-tree over the standardized nutrient vectors of one ``FeatureTable``."""
+
+    def __init__(self, features):
+        self.points = standardize([getattr(features, name) for name in SIMILARITY_FEATURES])
+        self.tree = NutrientKDTree(self.points)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def similar(self, row: int, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The ``k`` foods closest to food ``row`` (not itself), optionally only ``allowed`` ones"""
+        allowed = np.ones(len(self.points), dtype=bool) if allowed is None else allowed.copy()
+        allowed[row] = False
+        point = self.points[row]
+        candidates = np.flatnonzero(allowed) if np.count_nonzero(allowed) <= BRUTE_FORCE_ROWS else None
+        if candidates is not None:
+            distances = np.sqrt(((self.points[candidates] - point) ** 2).sum(axis=1))
+            order = np.lexsort((candidates, distances))[:max(k, 0)]
+            return candidates[order], distances[order]
+        return self.tree.query(point, k, allowed)
@@ -0,0 +1,132 @@
+"""Binary columnar snapshot of the catalog.
+
+The CSV is the authoring format; ``write_snapshot`` converts it, together
+with the derived feature columns (category, fiber, sugar, base score, label
+masks), into a directory of uncompressed ``.npy`` files::
+
+    catalog_snapshot/
+        snapshot.json                   # {"format": 1, "version": ..., "directory": ...}
+        snapshot-<version>/
+            manifest.json
+            calories.npy                # raw columns, one file each
+            name.npy, name.missing.npy  # text as fixed-width unicode plus a NaN mask
+            features.base_score.npy     # derived columns
+            ...
+
+Numeric and feature columns are memory-mapped read-only on load, so a server
+starts without parsing text or recomputing features.  The manifest records
+the content hash of the source CSV, so a snapshot only stands in for the
+exact file it was built from, and the feature fingerprint, so stale derived
+columns are recomputed from the raw ones instead of being served.
+
+``snapshot.json`` is replaced atomically after the new snapshot directory is
+complete.  Build one with ``python -m catalog.snapshot <csv> <output_dir>``.
+"""
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from catalog.artifacts import create_staging, load_published, map_array, publish
+from catalog.features import FeatureTable, feature_fingerprint
+from catalog.table import CatalogTable, file_digest, read_csv_table
+
+SNAPSHOT_FORMAT = 1
+POINTER_FILE = 'snapshot.json'
+
+
+def _save(directory: str, filename: str, values: np.ndarray) -> str:
+    np.save(os.path.join(directory, filename), np.ascontiguousarray(values), allow_pickle=False)
+    return filename
+
+
+def write_snapshot(table: CatalogTable, source_hash: str, output_dir: str) -> str:
+    """Write ``table`` and its features into ``output_dir`` and point ``snapshot.json`` at it.
+
+    Returns the snapshot version (a content hash).
+    """
+    staging = create_staging(output_dir, 'snapshot')
+
+    columns = []
+    for name in table:
+        values = table[name]
+        if values.dtype == object:
+            missing = np.array([not isinstance(value, str) for value in values.tolist()])
+            text = np.array([value if isinstance(value, str) else '' for value in values.tolist()], dtype=str)
+            columns.append({
+                'name': name,
+                'kind': 'text',
+                'file': _save(staging, f'{name}.npy', text),
+                'missing': _save(staging, f'{name}.missing.npy', missing)
+            })
+        else:
+            columns.append({'name': name, 'kind': 'numeric', 'file': _save(staging, f'{name}.npy', values)})
+
+    features = FeatureTable(table)
+    derived = {
+        name: _save(staging, f'features.{name}.npy', values)
+        for name, values in features.derived_columns().items()
+    }
+
+    return publish(staging, output_dir, 'snapshot', POINTER_FILE, SNAPSHOT_FORMAT, {
+        'source_hash': source_hash,
+        'rows': len(table),
+        'columns': columns,
+        'feature_fingerprint': feature_fingerprint(),
+        'features': derived
+    })
+
+
+def build_snapshot(csv_path: str, output_dir: str) -> str:
+    """Convert the authoring CSV into a snapshot; returns the snapshot version"""
+    return write_snapshot(read_csv_table(csv_path), file_digest(csv_path), output_dir)
+
+
+class CatalogSnapshot:
+    """A published snapshot directory."""
+
+    def __init__(self, path: str, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.source_hash = manifest['source_hash']
+
+    def _map(self, filename: str) -> np.ndarray:
+        return map_array(os.path.join(self.path, filename))
+
+    def load_table(self) -> CatalogTable:
+        columns = {}
+        for column in self.manifest['columns']:
+            if column['kind'] == 'text':
+                values = np.array(np.load(os.path.join(self.path, column['file'])).tolist(), dtype=object)
+                values[self._map(column['missing'])] = np.nan
+            else:
+                values = self._map(column['file'])
+            columns[column['name']] = values
+        return CatalogTable(columns)
+
+    def load_features(self, table: CatalogTable) -> FeatureTable:
+        """The stored feature columns, or freshly computed ones if the rules changed"""
+        if self.manifest.get('feature_fingerprint') != feature_fingerprint():
+            return FeatureTable(table)
+        derived = {name: self._map(filename) for name, filename in self.manifest['features'].items()}
+        return FeatureTable(table, derived)
+
+
+def load_snapshot(snapshot_dir: str) -> Optional[CatalogSnapshot]:
+    """The snapshot ``snapshot.json`` points at, or None if there is no usable one"""
+    published = load_published(snapshot_dir, POINTER_FILE, SNAPSHOT_FORMAT)
+    if published is None:
+        return None
+    return CatalogSnapshot(*published)
+
+
+if __name__ == '__main__':
+    # python -m catalog.snapshot [csv_path] [output_dir]
+    import sys
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else '../data/nutrition_sampled_500.csv'
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else '../data/catalog_snapshot'
+    version = build_snapshot(csv_path, output_dir)
+    print(f"✅ Catalog snapshot {version} written to {output_dir}")
@@ -0,0 +1,168 @@
+"""Process-wide food catalog store.
+
+The dataset is parsed once and every request handler receives the same
+read-only ``Catalog`` snapshot.  ``CatalogStore.get()`` re-checks the backing
+file at most every ``check_interval`` seconds and swaps in a new snapshot when
+the file's mtime and content hash change, so an updated dataset takes effect
+without restarting the server.
+
+If ``snapshot_paths`` lists catalog snapshot directories (see
+``catalog.snapshot``), a snapshot built from the current CSV content is
+memory-mapped instead of parsing the CSV, and a snapshot alone is served when
+no CSV is deployed at all.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from catalog.features import FeatureTable
+from catalog.ingredient_index import IngredientIndex
+from catalog.snapshot import POINTER_FILE, CatalogSnapshot, load_snapshot
+from catalog.table import CatalogTable, file_digest, read_csv_table
+
+
+class Catalog:
+    """Immutable snapshot of the food dataset.
+
+    ``table`` holds the raw columns as read-only NumPy arrays and is shared
+    between all handlers.  ``features`` (derived per-food feature table) is
+    built, or read from a catalog snapshot, once for this version, and
+    ``ingredient_index`` (name n-gram index) on its first lookup.
+    ``frame`` is a pandas DataFrame of the same data, built (and pandas
+    imported) only on first access; it is shared too and must not be
+    modified in place.
+    """
+
+    def __init__(self, table: CatalogTable, path: str, mtime_ns: int, content_hash: str,
+                 features: Optional[FeatureTable] = None):
+        self.table = table
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        self.version = content_hash[:16]
+        self.loaded_at = time.time()
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+        self.features = features if features is not None else FeatureTable(table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def ingredient_index(self) -> IngredientIndex:
+        return self.derived('ingredient_index', lambda catalog: IngredientIndex(catalog.features.names_lower))
+
+    @property
+    def frame(self):
+        """The catalog as a pandas DataFrame, for code paths that still need one"""
+        return self.derived('frame', lambda catalog: catalog.table.to_frame())
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only NumPy array of a catalog column"""
+        return self.table[name]
+
+    def derived(self, name: str, builder: Callable[['Catalog'], Any]) -> Any:
+        """Build ``name`` from this catalog on first use and memoize it.
+
+        Derived artifacts (encoded payloads, indexes, ...) live exactly as long
+        as the catalog version they were built from.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = builder(self)
+        return value
+
+
+class CatalogStore:
+    """Loads the catalog once and reloads it only when the file changes."""
+
+    def __init__(self, candidate_paths: Sequence[str], check_interval: float = 1.0,
+                 snapshot_paths: Sequence[str] = ()):
+        self.candidate_paths = list(candidate_paths)
+        self.snapshot_paths = list(snapshot_paths)
+        self.check_interval = check_interval
+        self._catalog: Optional[Catalog] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Catalog], None]] = []
+
+    def _resolve_path(self) -> Optional[str]:
+        """The first CSV found, else the pointer file of the first snapshot found"""
+        for path in self.candidate_paths:
+            if os.path.isfile(path):
+                return path
+        for snapshot_dir in self.snapshot_paths:
+            pointer_path = os.path.join(snapshot_dir, POINTER_FILE)
+            if os.path.isfile(pointer_path):
+                return pointer_path
+        return None
+
+    def _matching_snapshot(self, content_hash: str) -> Optional[CatalogSnapshot]:
+        for snapshot_dir in self.snapshot_paths:
+            snapshot = load_snapshot(snapshot_dir)
+            if snapshot is not None and snapshot.source_hash == content_hash:
+                return snapshot
+        return None
+
+    def subscribe(self, listener: Callable[[Catalog], None]) -> None:
+        """Register a callback invoked with the new catalog after every (re)load"""
+        self._listeners.append(listener)
+
+    def get(self) -> Optional[Catalog]:
+        """Return the current catalog, reloading it first if the file changed"""
+        if self._catalog is None or time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+        return self._catalog
+
+    def reload(self, force: bool = False) -> Optional[Catalog]:
+        """Re-read the dataset if its mtime and content hash changed (or if forced)"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            current = self._catalog
+            path = self._resolve_path()
+            if path is None:
+                if current is None:
+                    print("❌ Dataset not found in any of the expected paths")
+                return current
+
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                if not force and current is not None and current.path == path and current.mtime_ns == mtime_ns:
+                    return current
+
+                if os.path.basename(path) == POINTER_FILE:
+                    snapshot = load_snapshot(os.path.dirname(path))
+                    content_hash = snapshot.source_hash
+                else:
+                    snapshot = None
+                    content_hash = file_digest(path)
+                if not force and current is not None and current.content_hash == content_hash:
+                    # Touched but unchanged: keep the parsed snapshot
+                    current.mtime_ns = mtime_ns
+                    return current
+
+                if snapshot is None:
+                    snapshot = self._matching_snapshot(content_hash)
+                if snapshot is not None:
+                    table = snapshot.load_table()
+                    catalog = Catalog(table, path, mtime_ns, content_hash, snapshot.load_features(table))
+                else:
+                    catalog = Catalog(read_csv_table(path), path, mtime_ns, content_hash)
+            except Exception as e:
+                print(f"❌ Error loading dataset: {e}")
+                return current
+
+            self._catalog = catalog
+            source = f", snapshot {snapshot.version}" if snapshot is not None else ""
+            print(f"✅ Dataset loaded successfully from: {path} (version {catalog.version}{source})")
+
+        for listener in self._listeners:
+            listener(catalog)
+        return catalog
@@ -0,0 +1,81 @@
+"""Column store for the catalog file, read without pandas.
+
+The dataset is parsed with the stdlib ``csv`` module into one NumPy array per
+column, using the same type inference ``pandas.read_csv`` applies to this
+file: all-integer columns become ``int64``, numeric columns ``float64``
+(empty cells are NaN) and everything else an object array of strings (empty
+cells are NaN).  Importing pandas costs more than parsing the whole catalog,
+so it is only loaded if a caller explicitly asks for a DataFrame.
+"""
+
+import csv
+import hashlib
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+def _parse_column(values: List[str]) -> np.ndarray:
+    if all(values):
+        try:
+            return np.array([int(value) for value in values], dtype=np.int64)
+        except (ValueError, OverflowError):
+            pass
+    try:
+        return np.array([float(value) if value else np.nan for value in values], dtype=np.float64)
+    except ValueError:
+        return np.array([value if value else np.nan for value in values], dtype=object)
+
+
+class CatalogTable:
+    """Read-only named columns of equal length."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        for values in columns.values():
+            values.setflags(write=False)
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def to_frame(self):
+        """The table as a pandas DataFrame (imports pandas)"""
+        import pandas as pd
+        return pd.DataFrame({name: values.copy() for name, values in self.columns.items()})
+
+
+def read_csv_table(path: str) -> CatalogTable:
+    """Parse a CSV file into a ``CatalogTable``"""
+    # utf-8-sig: tolerate a byte-order mark, as pandas does
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        raw_columns: List[List[str]] = [[] for _ in header]
+        for row in reader:
+            if not row:
+                continue
+            for values, value in zip(raw_columns, row):
+                values.append(value)
+            # Short rows are padded with empty cells
+            for values in raw_columns[len(row):]:
+                values.append('')
+    return CatalogTable({name: _parse_column(values) for name, values in zip(header, raw_columns)})
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,198 @@
+"""Array-compiled RandomForest inference.
+
+The fitted trees of a scikit-learn ``RandomForestRegressor`` or
+``RandomForestClassifier`` are flattened into contiguous node arrays
+(feature, threshold, left/right child, leaf value) and evaluated for all
+trees and all rows at once with vectorized traversal.
+
+The ``StandardScaler`` that precedes the forest is folded into the split
+thresholds: for every split the largest raw value that still goes left is
+found once, so prediction compares raw inputs directly.  Predictions are
+bit-for-bit identical to ``forest.predict(scaler.transform(X))``.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+_MAGNITUDE = np.int64(0x7FFFFFFFFFFFFFFF)
+_SIGN = np.int64(-0x8000000000000000)
+
+
+def _ordered_keys(values: np.ndarray) -> np.ndarray:
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = values.view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & _MAGNITUDE))
+
+
+def _from_ordered_keys(keys: np.ndarray) -> np.ndarray:
+    bits = np.where(keys >= 0, keys, (-keys) | _SIGN)
+    return bits.view(np.float64)
+
+
+def _goes_left(x: np.ndarray, threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    # The exact test sklearn performs: transform in float64, cast to the
+    # trees' float32 input dtype, compare against the float64 threshold
+    with np.errstate(over='ignore'):
+        scaled = ((x - mean) / scale).astype(np.float32)
+    return scaled.astype(np.float64) <= threshold
+
+
+def fold_thresholds(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Raw-space thresholds equivalent to scaled-space ones.
+
+    ``x <= result`` holds exactly when the scaled, float32-cast ``x`` goes
+    left at the original split.  That test is monotone in ``x``, so the
+    boundary is found by bisection over the ordered float64 bit patterns.
+    """
+    lo = np.full(len(threshold), _ordered_keys(np.array([-np.inf]))[0])
+    hi = np.full(len(threshold), _ordered_keys(np.array([np.inf]))[0])
+    always_left = _goes_left(np.full(len(threshold), np.inf), threshold, mean, scale)
+
+    # Invariant: lo goes left, hi does not (unless always_left)
+    for _ in range(64):
+        mid = (lo & hi) + ((lo ^ hi) >> 1)
+        left = _goes_left(_from_ordered_keys(mid), threshold, mean, scale)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+
+    return np.where(always_left, np.inf, _from_ordered_keys(lo))
+
+
+class CompiledForest:
+    """A fitted RandomForest (plus optional StandardScaler) as flat node arrays."""
+
+    # Array attributes that fully describe a compiled forest
+    ARRAYS = ('roots', 'feature', 'threshold', 'children', 'values', 'classes')
+
+    def __init__(self, roots: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 children: np.ndarray, values: np.ndarray, depth: int, n_features: int,
+                 classes: Optional[np.ndarray] = None):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        # children[node, 0] is taken when the row goes left
+        self.children = children
+        self.values = values
+        self.depth = depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        self.classes = classes
+        self.is_classifier = classes is not None
+
+    @classmethod
+    def from_forest(cls, forest, scaler=None) -> 'CompiledForest':
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_features = forest.n_features_in_
+
+        node_counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+
+        feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+        threshold = np.concatenate([tree.threshold for tree in trees])
+        left = np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)])
+        right = np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)])
+
+        # Leaves point back at themselves, so every row can take the same
+        # number of steps regardless of where its path ends
+        nodes = np.arange(len(feature))
+        is_leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+        left = np.where(is_leaf, nodes, left).astype(np.intp)
+        right = np.where(is_leaf, nodes, right).astype(np.intp)
+        feature[is_leaf] = 0
+
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, 'mean_', None) is not None:
+                mean = scaler.mean_.astype(np.float64)
+            if getattr(scaler, 'scale_', None) is not None:
+                scale = scaler.scale_.astype(np.float64)
+        threshold = fold_thresholds(threshold, mean[feature], scale[feature])
+        threshold[is_leaf] = np.inf
+
+        classes = getattr(forest, 'classes_', None)
+        if classes is not None:
+            n_classes = forest.n_classes_
+            values = np.concatenate([tree.value[:, 0, :n_classes] for tree in trees])
+            normalizer = values.sum(axis=1)[:, np.newaxis]
+            if (normalizer > 1.0 + 1e-9).any():
+                # Older scikit-learn stores class weights per leaf and
+                # normalizes them in predict_proba; newer versions store
+                # the fractions themselves and use them as they are
+                normalizer[normalizer == 0.0] = 1.0
+                values = values / normalizer
+        else:
+            values = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+
+        return cls(
+            roots=offsets.astype(np.intp),
+            feature=feature,
+            threshold=threshold,
+            children=np.stack([left, right], axis=1),
+            values=values,
+            depth=max(tree.max_depth for tree in trees),
+            n_features=n_features,
+            classes=classes
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """The node arrays, for storing with ``np.save``"""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        if arrays['classes'] is None:
+            del arrays['classes']
+        return arrays
+
+    def metadata(self) -> Dict:
+        return {'depth': int(self.depth), 'n_features': int(self.n_features)}
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node (global index) reached by each row in each tree, shape (n, n_trees)"""
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        rows = np.arange(len(X))[:, np.newaxis]
+        for _ in range(self.depth):
+            goes_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, goes_right.view(np.int8)]
+        return nodes
+
+    def _averaged(self, X: np.ndarray) -> np.ndarray:
+        # Trees are summed one after another, then divided, like the
+        # forest's own accumulation
+        leaf_values = self.values[self.apply(X)]
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+
+    def _validate(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity.")
+        return X
+
+    def predict(self, X) -> np.ndarray:
+        X = self._validate(X)
+        if self.is_classifier:
+            return self.classes.take(np.argmax(self._averaged(X), axis=1), axis=0)
+        return self._averaged(X)
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._averaged(self._validate(X))
+
+
+def compile_forest(model, scaler=None) -> Optional[CompiledForest]:
+    """Compile ``model`` if it is a single-output RandomForest, else None"""
+    # Imported here: evaluating an already compiled forest needs only NumPy
+    try:
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+    except ImportError:
+        return None
+    if not isinstance(model, (RandomForestRegressor, RandomForestClassifier)):
+        return None
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return None
+    if scaler is not None and not isinstance(scaler, StandardScaler):
+        return None
+    return CompiledForest.from_forest(model, scaler)
@@ -0,0 +1,183 @@
+"""Versioned, memory-mappable artifact bundle for the nutrition models.
+
+``write_model_bundle`` stores the trained models in one directory::
+
+    models/
+        bundle.json                 # {"format": 1, "version": ..., "directory": ...}
+        bundle-<version>/
+            manifest.json
+            regression.feature.npy  # compiled forest node arrays, uncompressed
+            ...
+            labels.npy              # calorie level names (encoder classes)
+
+RandomForests are stored as compiled node arrays (see ``compiled_forest``),
+so loading them needs neither unpickling nor scikit-learn: the ``.npy``
+files are memory-mapped read-only, and every worker process on a host
+shares the same page-cache copy.  Any other model is stored with
+``joblib.dump`` (uncompressed) together with its scaler and loaded with
+``mmap_mode='r'`` the first time it is used.
+
+``bundle.json`` is replaced atomically after the new bundle directory is
+complete, so a running process never sees a half-written bundle.
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from catalog.artifacts import create_staging, files_version, load_published, map_array, publish
+from ml_models.compiled_forest import CompiledForest, compile_forest
+
+BUNDLE_FORMAT = 1
+POINTER_FILE = "bundle.json"
+MODEL_NAMES = ("regression", "classification")
+
+PICKLED_MODEL_FILES = {
+    "regression": ("best_regression_model.pkl", "regression_scaler.pkl"),
+    "classification": ("best_classification_model.pkl", "classification_scaler.pkl"),
+}
+PICKLED_ENCODER_FILE = "classification_encoder.pkl"
+
+
+class ScaledModel:
+    """A fitted sklearn model behind its StandardScaler."""
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.predict(self.scaler.transform(X))
+
+
+def write_model_bundle(output_dir: str, regression_model, regression_scaler,
+                       classification_model, classification_scaler, classification_encoder) -> str:
+    """Write a new bundle into ``output_dir`` and point ``bundle.json`` at it.
+
+    Returns the bundle version (a content hash).
+    """
+    import joblib
+
+    staging = create_staging(output_dir, "bundle")
+    models = {}
+
+    fitted = {
+        "regression": (regression_model, regression_scaler),
+        "classification": (classification_model, classification_scaler),
+    }
+    for name, (model, scaler) in fitted.items():
+        compiled = compile_forest(model, scaler)
+        if compiled is not None:
+            files = {}
+            for array_name, array in compiled.to_arrays().items():
+                filename = f"{name}.{array_name}.npy"
+                np.save(os.path.join(staging, filename), np.ascontiguousarray(array), allow_pickle=False)
+                files[array_name] = filename
+            models[name] = {"kind": "compiled_forest", "arrays": files, **compiled.metadata()}
+        else:
+            filename = f"{name}.joblib"
+            # Uncompressed so the estimator's arrays can be memory-mapped
+            joblib.dump(ScaledModel(model, scaler), os.path.join(staging, filename), compress=0)
+            models[name] = {"kind": "estimator", "file": filename}
+
+    labels = np.asarray(classification_encoder.classes_).astype(str)
+    np.save(os.path.join(staging, "labels.npy"), labels, allow_pickle=False)
+
+    return publish(staging, output_dir, "bundle", POINTER_FILE, BUNDLE_FORMAT,
+                   {"models": models, "labels": "labels.npy"})
+
+
+class ModelBundle:
+    """A published bundle; each model is materialized on first use."""
+
+    def __init__(self, path: str, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self._predictors = {}
+        self._labels = None
+        self._lock = threading.Lock()
+
+    def _load_predictor(self, name: str):
+        entry = self.manifest["models"][name]
+        if entry["kind"] == "compiled_forest":
+            arrays = {
+                array_name: map_array(os.path.join(self.path, filename))
+                for array_name, filename in entry["arrays"].items()
+            }
+            return CompiledForest(depth=entry["depth"], n_features=entry["n_features"], **arrays)
+        # joblib (and scikit-learn) are only imported for non-forest models
+        import joblib
+        return joblib.load(os.path.join(self.path, entry["file"]), mmap_mode="r")
+
+    def predictor(self, name: str):
+        predictor = self._predictors.get(name)
+        if predictor is None:
+            with self._lock:
+                predictor = self._predictors.get(name)
+                if predictor is None:
+                    predictor = self._predictors[name] = self._load_predictor(name)
+        return predictor
+
+    def labels(self) -> np.ndarray:
+        if self._labels is None:
+            self._labels = np.load(os.path.join(self.path, self.manifest["labels"]), allow_pickle=False)
+        return self._labels
+
+
+class PickledModels:
+    """The five legacy joblib pickles, loaded eagerly."""
+
+    def __init__(self, models_path: str, compiled: bool = True):
+        import joblib
+
+        self._predictors = {}
+        for name, (model_file, scaler_file) in PICKLED_MODEL_FILES.items():
+            model = joblib.load(os.path.join(models_path, model_file))
+            scaler = joblib.load(os.path.join(models_path, scaler_file))
+            compiled_model = compile_forest(model, scaler) if compiled else None
+            self._predictors[name] = compiled_model if compiled_model is not None else ScaledModel(model, scaler)
+        self.encoder = joblib.load(os.path.join(models_path, PICKLED_ENCODER_FILE))
+
+        filenames = [filename for name in MODEL_NAMES for filename in PICKLED_MODEL_FILES[name]]
+        self.version = files_version(os.path.join(models_path, filename)
+                                     for filename in filenames + [PICKLED_ENCODER_FILE])
+
+    def predictor(self, name: str):
+        return self._predictors[name]
+
+    def labels(self) -> np.ndarray:
+        return self.encoder.classes_
+
+
+def load_model_bundle(models_path: str) -> Optional[ModelBundle]:
+    """The bundle ``bundle.json`` points at, or None if there is no usable one"""
+    published = load_published(models_path, POINTER_FILE, BUNDLE_FORMAT)
+    if published is None:
+        return None
+    return ModelBundle(*published)
+
+
+def load_models(models_path: str, compiled: bool = True):
+    """Prefer the artifact bundle; fall back to the legacy pickles"""
+    if compiled:
+        bundle = load_model_bundle(models_path)
+        if bundle is not None:
+            return bundle
+    return PickledModels(models_path, compiled=compiled)
+
+
+if __name__ == "__main__":
+    # Build a bundle from already trained pickles: python -m ml_models.model_bundle [models_dir]
+    import sys
+
+    import joblib
+
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else "ml_models/models/"
+    fitted = [joblib.load(os.path.join(models_dir, filename))
+              for name in MODEL_NAMES for filename in PICKLED_MODEL_FILES[name]]
+    encoder = joblib.load(os.path.join(models_dir, PICKLED_ENCODER_FILE))
+    version = write_model_bundle(models_dir, *fitted, encoder)
+    print(f"✅ Model bundle {version} written to {models_dir}")
@@ -1,12 +1,17 @@
 import pandas as pd
 import numpy as np
-import joblib
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import warnings
+from catalog.cache import LRUCache
+from ml_models.model_bundle import load_models
 warnings.filterwarnings('ignore')
 
+# Inputs are rounded to this many decimals before prediction and caching
+INPUT_PRECISION = 4
+
 class ImprovedNutritionAnalyzer:
-    def __init__(self, data_path: str = "../data/nutrition_sampled_500.csv", models_path: str = "ml_models/models/"):
+    def __init__(self, data_path: str = "../data/nutrition_sampled_500.csv", models_path: str = "ml_models/models/",
+                 compiled_models: bool = True, cache_size: int = 4096, warm_cache: bool = True):
         self.data = pd.read_csv(data_path)
         self.data = self.data.rename(columns={
             'proteins': 'protein',
@@ -15,48 +20,125 @@ class ImprovedNutritionAnalyzer:
         })
         
         self.models_path = models_path
+        self.compiled_models = compiled_models
+        # Entries are keyed on the model version, so they never go stale
+        self.prediction_cache = LRUCache(maxsize=cache_size, ttl=None)
         self.load_trained_models()
+        if warm_cache:
+            self.warm_prediction_cache()
     
     def load_trained_models(self):
+        """Load the models: the artifact bundle if one was published, else the pickles.
+
+        Bundled models are memory-mapped and only materialized on first use.
+        """
         try:
-            self.regression_model = joblib.load(f"{self.models_path}best_regression_model.pkl")
-            self.regression_scaler = joblib.load(f"{self.models_path}regression_scaler.pkl")
-            self.classification_model = joblib.load(f"{self.models_path}best_classification_model.pkl")
-            self.classification_scaler = joblib.load(f"{self.models_path}classification_scaler.pkl")
-            self.classification_encoder = joblib.load(f"{self.models_path}classification_encoder.pkl")
-            print("✅ Models loaded successfully!")
+            self.models = load_models(self.models_path, compiled=self.compiled_models)
+            self.model_version = self.models.version
+            print(f"✅ Models loaded successfully! (version {self.model_version})")
         except FileNotFoundError as e:
             print(f"❌ Error loading models: {e}")
-            self.regression_model = None
-            self.classification_model = None
+            self.models = None
+            self.model_version = None
+        self.prediction_cache.clear()
+    
+    @staticmethod
+    def _round_inputs(proteins: float, fat: float, carbohydrate: float) -> Tuple[float, float, float]:
+        return (round(proteins, INPUT_PRECISION), round(fat, INPUT_PRECISION), round(carbohydrate, INPUT_PRECISION))
+    
+    def _cached(self, kind: str, inputs: Tuple[float, float, float], compute):
+        key = (kind, self.model_version) + inputs
+        value = self.prediction_cache.get(key)
+        if value is None:
+            value = compute(np.array([inputs]))[0]
+            self.prediction_cache.put(key, value)
+        return value
     
     def predict_calories(self, proteins: float, fat: float, carbohydrate: float) -> float:
-        if self.regression_model is None:
+        inputs = self._round_inputs(proteins, fat, carbohydrate)
+        return self._cached('calories', inputs, self.predict_calories_batch)
+    
+    def predict_calorie_level(self, proteins: float, fat: float, carbohydrate: float) -> str:
+        inputs = self._round_inputs(proteins, fat, carbohydrate)
+        return self._cached('calorie_level', inputs, self.predict_calorie_levels_batch)
+    
+    def predict_calories_batch(self, input_data: np.ndarray) -> List[float]:
+        """Predict calories for an N x 3 (proteins, fat, carbohydrate) matrix"""
+        if self.models is None:
             raise ValueError("Regression model not loaded.")
         
-        input_data = np.array([[proteins, fat, carbohydrate]])
-        input_scaled = self.regression_scaler.transform(input_data)
-        predicted_calories = self.regression_model.predict(input_scaled)[0]
-        return round(predicted_calories, 2)
+        predicted_calories = self.models.predictor('regression').predict(input_data)
+        return [round(value, 2) for value in predicted_calories]
     
-    def predict_calorie_level(self, proteins: float, fat: float, carbohydrate: float) -> str:
-        if self.classification_model is None:
+    def predict_calorie_levels_batch(self, input_data: np.ndarray) -> List[str]:
+        """Predict calorie levels for an N x 3 (proteins, fat, carbohydrate) matrix"""
+        if self.models is None:
             raise ValueError("Classification model not loaded.")
         
-        input_data = np.array([[proteins, fat, carbohydrate]])
-        input_scaled = self.classification_scaler.transform(input_data)
-        predicted_encoded = self.classification_model.predict(input_scaled)[0]
-        predicted_level = self.classification_encoder.inverse_transform([predicted_encoded])[0]
-        return predicted_level
+        predicted_encoded = self.models.predictor('classification').predict(input_data)
+        # Same as LabelEncoder.inverse_transform
+        return list(self.models.labels()[predicted_encoded.astype(np.intp)])
     
     def analyze_food_nutrition(self, food_data: Dict) -> Dict:
-        proteins = food_data.get('proteins', 0)
-        fat = food_data.get('fat', 0)
-        carbohydrate = food_data.get('carbohydrate', 0)
+        return self.analyze_foods_nutrition([food_data])[0]
+    
+    def analyze_foods_nutrition(self, foods: List[Dict]) -> List[Dict]:
+        """Analyze N foods; cache misses share one predict per model"""
+        if not foods:
+            return []
         
-        predicted_calories = self.predict_calories(proteins, fat, carbohydrate)
-        calorie_level = self.predict_calorie_level(proteins, fat, carbohydrate)
+        nutrients = [
+            self._round_inputs(food.get('proteins', 0), food.get('fat', 0), food.get('carbohydrate', 0))
+            for food in foods
+        ]
+        analyses = {}
+        for inputs in nutrients:
+            if inputs not in analyses:
+                analyses[inputs] = self.prediction_cache.get(('analysis', self.model_version) + inputs)
+        
+        missing = [inputs for inputs, analysis in analyses.items() if analysis is None]
+        if missing:
+            input_data = np.array(missing)
+            predicted_calories = self.predict_calories_batch(input_data)
+            calorie_levels = self.predict_calorie_levels_batch(input_data)
+            for inputs, calories, level in zip(missing, predicted_calories, calorie_levels):
+                analyses[inputs] = self._summarize_nutrition(*inputs, calories, level)
+                self.prediction_cache.put(('analysis', self.model_version) + inputs, analyses[inputs])
+                self.prediction_cache.put(('calories', self.model_version) + inputs, calories)
+                self.prediction_cache.put(('calorie_level', self.model_version) + inputs, level)
+        
+        # Cached analyses are shared, so callers get their own copies
+        return [
+            dict(analyses[inputs], recommendations=list(analyses[inputs]['recommendations']))
+            for inputs in nutrients
+        ]
+    
+    def warm_prediction_cache(self) -> int:
+        """Pre-compute analyses for every catalog food; returns how many were added"""
+        if self.models is None:
+            return 0
         
+        nutrients = self.data[['protein', 'fat', 'carbohydrates']].dropna()
+        # Each food fills three entries (analysis, calories, calorie level)
+        nutrients = nutrients.head(self.prediction_cache.maxsize // 3)
+        foods = [
+            {'proteins': proteins, 'fat': fat, 'carbohydrate': carbohydrate}
+            for proteins, fat, carbohydrate in nutrients.itertuples(index=False)
+        ]
+        before = len(self.prediction_cache)
+        self.analyze_foods_nutrition(foods)
+        added = len(self.prediction_cache) - before
+        # Hit rate should describe request traffic, not the warm-up itself
+        self.prediction_cache.reset_stats()
+        print(f"✅ Prediction cache warmed with {len(foods)} catalog foods")
+        return added
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss statistics of the prediction cache"""
+        return dict(self.prediction_cache.stats(), model_version=self.model_version)
+    
+    def _summarize_nutrition(self, proteins: float, fat: float, carbohydrate: float,
+                             predicted_calories: float, calorie_level: str) -> Dict:
         total_calories = predicted_calories
         if total_calories > 0:
             protein_pct = (proteins * 4 / total_calories) * 100
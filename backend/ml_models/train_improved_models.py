@@ -7,6 +7,10 @@ from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classi
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import joblib
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models.model_bundle import write_model_bundle
 
 def load_and_clean_data(data_path):
     """Load dan clean dataset"""
@@ -176,6 +180,11 @@ def save_models(regression_model, classification_model, regression_scaler,
     joblib.dump(classification_scaler, os.path.join(output_dir, "classification_scaler.pkl"))
     joblib.dump(classification_encoder, os.path.join(output_dir, "classification_encoder.pkl"))
     
+    # Single versioned bundle of memory-mappable arrays for fast worker start-up
+    version = write_model_bundle(output_dir, regression_model, regression_scaler,
+                                 classification_model, classification_scaler, classification_encoder)
+    print(f"Model bundle {version} written")
+    
     print(f"\nAll models saved to {output_dir}")
 
 def main():
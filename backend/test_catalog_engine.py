@@ -0,0 +1,1014 @@
+#!/usr/bin/env python3
+"""
+Test script untuk catalog engine (vectorized scoring) NutriSuggest
+"""
+
+import re
+import sys
+import os
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from catalog.calorie_index import CalorieIndex, shuffle_ties
+from catalog.conditions import HEALTH_CONDITIONS, condition_mask
+from catalog.features import FeatureTable
+from catalog.ingest import read_food_groups
+from catalog.ingredient_index import IngredientIndex
+from catalog.keywords import KeywordMatcher
+from catalog.meal_plan import MEALS, PlanningPool, macro_penalty, plan_days, plan_meals, replan_day
+from catalog.ranking import top_k
+from catalog.ranking_table import RankingTableStore, build_ranking_table
+from catalog.similarity import SimilarityIndex
+from catalog.snapshot import build_snapshot
+from catalog.store import CatalogStore
+from catalog.table import read_csv_table
+from catalog.scoring import (
+    CATEGORY_KEYWORDS, CATEGORY_MATCHER, categorize_food, estimate_fiber_sugar, calculate_health_score, score_catalog
+)
+
+DATA_PATH = '../data/nutrition_sampled_500.csv'
+
+def load_test_frame():
+    """Dataset asli, ditambah nama sintetis untuk kasus tepi"""
+    frames = []
+    if os.path.exists(DATA_PATH):
+        frames.append(pd.read_csv(DATA_PATH))
+    frames.append(pd.DataFrame({
+        'name': ['Nasi Merah', 'Bayam Rebus', 'Kacang Panjang Tumis', 'Bawang Goreng', 'Es Teh Manis', 'Ayam Bakar', 'Roti Pisang', 'Cream Cheese'],
+        'calories': [110.0, 36.0, 60.0, 450.0, 90.0, 250.0, 300.0, 340.0],
+        'proteins': [2.5, 3.0, 2.1, 1.5, 0.0, 25.0, 8.0, 6.0],
+        'fat': [0.9, 0.3, 4.0, 30.0, 0.0, 12.0, 10.0, 34.0],
+        'carbohydrate': [23.0, 4.5, 45.5, 50.0, 22.5, 0.0, 50.5, 5.5],
+        'sodium': [0.005, 0.07, float('nan'), 0.9, 0.01, 0.5, 0.3, 0.0],
+        'cholesterol': [0.0, 0.0, float('nan'), 10.0, 0.0, 85.0, 30.0, 0.0],
+        'saturated_fat': [0.2, 0.05, float('nan'), 12.0, 0.0, 3.5, 4.2, 0.0]
+    }))
+    return pd.concat(frames, ignore_index=True)
+
+def synthetic_food_frame(count=120, seed=7):
+    """Katalog sintetis yang cukup besar, tanpa bergantung pada file data"""
+    import numpy as np
+
+    rng = np.random.RandomState(seed)
+    dishes = ['Nasi', 'Ayam', 'Ikan', 'Tempe', 'Tahu', 'Bayam', 'Brokoli', 'Pisang', 'Roti', 'Telur', 'Kentang', 'Apel']
+    styles = ['Rebus', 'Goreng', 'Bakar', 'Kukus', 'Tumis']
+    # Multiples of 5 kcal, so some foods tie on calories
+    calories = np.round(rng.uniform(40, 700, count) / 5) * 5
+    protein_share = rng.uniform(0.10, 0.35, count)
+    fat_share = rng.uniform(0.20, 0.35, count)
+    return pd.DataFrame({
+        'id': np.arange(1, count + 1),
+        'name': [f"{dishes[i % len(dishes)]} {styles[i // len(dishes) % len(styles)]} {i}" for i in range(count)],
+        'calories': calories,
+        'proteins': np.round(calories * protein_share / 4, 1),
+        'fat': np.round(calories * fat_share / 9, 1),
+        'carbohydrate': np.round(calories * (1 - protein_share - fat_share) / 4, 1),
+    })
+
+@contextmanager
+def api_client(frame):
+    """Flask test client untuk API dengan katalog sementara dari ``frame``"""
+    import tempfile
+    import api_improved
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'foods.csv')
+        frame.to_csv(csv_path, index=False)
+        store = api_improved.catalog_store
+        api_improved.catalog_store = CatalogStore([csv_path], check_interval=0)
+        api_improved.catalog_store.subscribe(lambda catalog: api_improved.recommendation_cache.clear())
+        api_improved.recommendation_cache.clear()
+        try:
+            yield api_improved.app.test_client()
+        finally:
+            api_improved.catalog_store = store
+            api_improved.recommendation_cache.clear()
+
+class StubAnalyzer:
+    """Pengganti ImprovedNutritionAnalyzer tanpa model: kalori = 4P + 9L + 4K"""
+
+    def __init__(self):
+        self.batches = []
+
+    def analyze_foods_nutrition(self, foods):
+        self.batches.append(len(foods))
+        return [{'predicted_calories': round(4 * food['proteins'] + 9 * food['fat'] + 4 * food['carbohydrate'], 2),
+                 'calorie_level': 'Sedang', 'recommendations': []} for food in foods]
+
+    def analyze_food_nutrition(self, food):
+        return self.analyze_foods_nutrition([food])[0]
+
+    def cache_stats(self):
+        return {'hits': 0, 'misses': sum(self.batches)}
+
+@contextmanager
+def stub_analyzer(loaded=True):
+    """Pasang ``StubAnalyzer`` di API (sudah dimuat, atau dimuat saat pertama dipakai)"""
+    import api_improved
+
+    stub = StubAnalyzer()
+    saved = (api_improved.nutrition_analyzer, dict(api_improved.analyzer_status), api_improved.initialize_nutrition_analyzer)
+    api_improved.initialize_nutrition_analyzer = lambda: stub
+    api_improved.nutrition_analyzer = stub if loaded else None
+    api_improved.analyzer_status.update(state='ready' if loaded else 'not_loaded', load_seconds=None)
+    try:
+        yield stub
+    finally:
+        api_improved.nutrition_analyzer, status, api_improved.initialize_nutrition_analyzer = saved
+        api_improved.analyzer_status.clear()
+        api_improved.analyzer_status.update(status)
+
+def test_keyword_matcher():
+    """Automaton harus sama dengan pencarian kata utuh (dan substring) per kategori"""
+    print("=== Testing Keyword Matcher ===")
+
+    names = load_test_frame()['name'].str.lower().tolist()
+    names += ['kacang panjang', 'kacang', 'bawang putih', 'es kelapa', 'tahu telur', 'xyz', '',
+              'cream cheese', 'sayur bayam', 'teh-es', 'ayam_goreng', 'es']
+    for name in names:
+        expected = len(CATEGORY_KEYWORDS)
+        for index, (_, keywords) in enumerate(CATEGORY_KEYWORDS):
+            if any(re.search(rf'(?<!\w){re.escape(word)}(?!\w)', name) for word in keywords):
+                expected = index
+                break
+        assert CATEGORY_MATCHER.match(name) == expected, \
+            f"Mismatch for {name!r}: {CATEGORY_MATCHER.match(name)} != {expected}"
+
+    assert CATEGORY_MATCHER.match_many(names) == [CATEGORY_MATCHER.match(name) for name in names], \
+        "match_many differs from match"
+
+    substrings = KeywordMatcher([keywords for _, keywords in CATEGORY_KEYWORDS])
+    for name in names:
+        expected = next((index for index, (_, keywords) in enumerate(CATEGORY_KEYWORDS)
+                         if any(word in name for word in keywords)), -1)
+        assert substrings.match(name) == expected, f"Substring mismatch for {name!r}: {substrings.match(name)} != {expected}"
+
+    print(f"✅ {len(names)} names classified like the keyword scans")
+
+def test_ingredient_index():
+    """Lookup index harus sama dengan pencarian substring"""
+    print("=== Testing Ingredient Index ===")
+
+    names = load_test_frame()['name'].str.lower().tolist()
+    index = IngredientIndex(names)
+    queries = ['ayam', 'a', 'ng', 'Kacang Panjang', 'nasi merah', 'es', '', 'tidak ada']
+    for query in queries:
+        expected = [i for i, name in enumerate(names) if query.lower() in name]
+        assert index.rows_containing(query).tolist() == expected, f"Mismatch for {query!r}"
+
+    expected = [i for i, name in enumerate(names) if 'bayam' in name or 'teh' in name]
+    assert index.lookup(['Bayam', 'teh']).tolist() == expected, "Union lookup mismatch"
+
+    print(f"✅ {len(queries)} ingredient queries match substring scans")
+
+def test_vectorized_scoring():
+    """Vectorized scoring harus identik dengan fungsi skalar"""
+    print("=== Testing Vectorized Scoring ===")
+
+    df = load_test_frame()
+    condition_sets = [
+        [], ['diabetes'], ['hipertensi', 'jantung'], ['obesitas', 'diabetes', 'kolesterol'],
+        ['asam_urat', 'ginjal', 'lambung'], ['tiroid', 'alergi', 'tidak_dikenal'], ['diabetes', 'diabetes'],
+        HEALTH_CONDITIONS
+    ]
+
+    for conditions in condition_sets:
+        scored = score_catalog(FeatureTable(df), conditions)
+        for i, food in df.iterrows():
+            category = categorize_food(food['name'])
+            fiber, sugar = estimate_fiber_sugar(food['name'], category, food['calories'], food['carbohydrate'])
+            health_score = calculate_health_score(
+                food['name'], category, food['calories'], food['proteins'],
+                food['fat'], food['carbohydrate'], fiber, sugar, conditions,
+                sodium=food['sodium'], cholesterol=food['cholesterol'], saturated_fat=food['saturated_fat']
+            )
+            expected = (category, fiber, sugar, health_score)
+            actual = (scored.category(i), scored.fiber[i], scored.sugar[i], scored.health_score[i])
+            assert expected == actual, f"Mismatch for {food['name']} {conditions}: {expected} != {actual}"
+
+    print(f"✅ {len(df)} foods x {len(condition_sets)} condition sets match the scalar functions")
+
+def test_csv_table():
+    """Pembaca CSV stdlib harus sama dengan pandas.read_csv"""
+    print("=== Testing CSV Table ===")
+
+    import tempfile
+
+    synthetic = (
+        '\ufeffid,calories,proteins,name,image\n'
+        '1,100,2.5,Nasi Merah,a.jpg\n'
+        '2,,3,"Bayam, Rebus",\n'
+        '3,36.5,0.1,Es Teh,\n'
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic_path = os.path.join(directory, 'synthetic.csv')
+        with open(synthetic_path, 'w', encoding='utf-8') as f:
+            f.write(synthetic)
+        paths = ([DATA_PATH] if os.path.exists(DATA_PATH) else []) + [synthetic_path]
+
+        for path in paths:
+            table = read_csv_table(path)
+            frame = pd.read_csv(path)
+            assert list(table) == list(frame.columns), f"Columns differ for {path}"
+            for column in frame.columns:
+                expected = frame[column].tolist()
+                actual = table[column].tolist()
+                assert len(expected) == len(actual), f"Column {column!r} differs for {path}"
+                assert all(a == b or (a != a and b != b) for a, b in zip(expected, actual)), \
+                    f"Column {column!r} differs for {path}"
+                if frame[column].dtype.kind in 'if':
+                    assert frame[column].dtype == table[column].dtype, \
+                        f"Column {column!r} dtype {table[column].dtype} != {frame[column].dtype}"
+
+    print(f"✅ {len(paths)} files parsed like pandas.read_csv")
+
+def test_snapshot():
+    """Snapshot biner harus memuat tabel dan fitur yang sama dengan CSV"""
+    print("=== Testing Catalog Snapshot ===")
+
+    import json
+    import tempfile
+
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'foods.csv')
+        if os.path.exists(DATA_PATH):
+            read_csv_table(DATA_PATH).to_frame().to_csv(csv_path, index=False)
+        else:
+            load_test_frame().to_csv(csv_path, index=False)
+        snapshot_dir = os.path.join(directory, 'catalog_snapshot')
+        build_snapshot(csv_path, snapshot_dir)
+
+        expected = CatalogStore([csv_path]).get()
+        loaded = [
+            CatalogStore([csv_path], snapshot_paths=[snapshot_dir]).get(),
+            CatalogStore([os.path.join(directory, 'missing.csv')], snapshot_paths=[snapshot_dir]).get()
+        ]
+
+        # Stale feature rules: raw columns are still used, features recomputed
+        with open(os.path.join(snapshot_dir, 'snapshot.json')) as f:
+            manifest_path = os.path.join(snapshot_dir, json.load(f)['directory'], 'manifest.json')
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['feature_fingerprint'] = 'stale'
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        loaded.append(CatalogStore([csv_path], snapshot_paths=[snapshot_dir]).get())
+
+        for catalog in loaded:
+            assert catalog.version == expected.version, f"Version {catalog.version} != {expected.version}"
+            for column in expected.table:
+                a, b = expected.table[column], catalog.table[column]
+                assert a.dtype == b.dtype and len(a) == len(b), f"Column {column!r} differs"
+                assert all(x == y or (x != x and y != y) for x, y in zip(a.tolist(), b.tolist())), \
+                    f"Column {column!r} differs"
+            for name, values in expected.features.derived_columns().items():
+                assert np.array_equal(values, getattr(catalog.features, name)), f"Feature {name!r} differs"
+
+    print(f"✅ Snapshot of {len(expected)} foods matches the CSV")
+
+def test_catalog_store():
+    """Store hanya boleh memuat ulang saat isi file berubah, dan get() tidak pernah melihat katalog setengah jadi"""
+    print("=== Testing Catalog Store ===")
+
+    import tempfile
+    import threading
+
+    def write(path, frame, mtime_ns):
+        # Replaced atomically, as a deployment would
+        frame.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    small, large = synthetic_food_frame(30, seed=1), synthetic_food_frame(50, seed=2)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'foods.csv')
+        mtime_ns = 1_700_000_000 * 10 ** 9
+        write(csv_path, small, mtime_ns)
+        store = CatalogStore([csv_path], check_interval=0)
+        loads = []
+        store.subscribe(loads.append)
+        first = store.get()
+        assert first is not None and len(first) == 30 and loads == [first]
+        index = first.derived('test_index', lambda catalog: len(catalog))
+
+        # Touched with the same content: same catalog, nothing rebuilt
+        mtime_ns += 10 ** 9
+        os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+        assert store.get() is first and first.mtime_ns == mtime_ns and loads == [first], "Touch reloaded the catalog"
+        assert first.derived('test_index', lambda catalog: -1) == index
+
+        # New content: new version, derived tables rebuilt for it
+        mtime_ns += 10 ** 9
+        write(csv_path, large, mtime_ns)
+        second = store.get()
+        assert second is not first and second.version != first.version and loads == [first, second]
+        assert len(second) == 50 and len(second.features) == 50
+        assert second.derived('test_index', lambda catalog: len(catalog)) == 50
+        assert first.derived('test_index', lambda catalog: -1) == 30
+
+        # Readers racing with reloads see one complete version or the other
+        expected = {first.version: small['name'].tolist(), second.version: large['name'].tolist()}
+        seen, errors = set(), []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                catalog = store.get()
+                names = catalog.table['name'].tolist()
+                if expected.get(catalog.version) != names or len(catalog.features) != len(names):
+                    errors.append(catalog.version)
+                seen.add(catalog.version)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for step in range(20):
+                mtime_ns += 10 ** 9
+                write(csv_path, small if step % 2 == 0 else large, mtime_ns)
+                store.reload()
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+        assert not errors, f"Readers saw partial catalogs: {errors[:3]}"
+        assert seen and seen <= set(expected), f"Readers saw versions {seen}"
+
+    print(f"✅ Store reloaded {len(loads)} times, only on content changes")
+
+def test_ingest():
+    """Ingest zip harus menormalkan kolom, membuang duplikat dan memakai serat/gula asli"""
+    print("=== Testing Zip Ingestion ===")
+
+    import tempfile
+    import zipfile
+
+    import numpy as np
+
+    header = ',Unnamed: 0,food,Caloric Value,Fat,Carbohydrates,Sugars,Protein,Dietary Fiber,Sodium\n'
+    groups = {
+        'FINAL FOOD DATASET/FOOD-DATA-GROUP1.csv': header + (
+            '0,0,cream cheese,51,5,0.8,0.5,0.9,0,0.016\n'
+            '1,1,Nasi  Merah,110,0.9,23,,2.5,,0.005\n'
+            '2,2,apple,52,0.2,14,10.4,0.3,2.4,0.001\n'
+        ),
+        'FINAL FOOD DATASET/FOOD-DATA-GROUP2.csv': header.replace(',Sodium', '') + (
+            '0,0,Cream Cheese,99,9,1,1,1,1\n'
+            '1,1,bayam rebus,36,0.3,4.5,0.4,3,2.2\n'
+        ),
+        'FINAL FOOD DATASET/METADATA/GROUP-1_analysis_summary.csv': ',Mean\nCaloric Value,1\n'
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path = os.path.join(directory, 'foods.zip')
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            for member, content in groups.items():
+                archive.writestr(member, content)
+        table, stats = read_food_groups(zip_path, chunk_rows=2)
+
+    expected_columns = ['id', 'name', 'calories', 'fat', 'carbohydrate', 'sugar', 'proteins', 'fiber', 'sodium']
+    assert list(table) == expected_columns, f"Columns {list(table)}"
+    assert table['name'].tolist() == ['cream cheese', 'Nasi Merah', 'apple', 'bayam rebus'], f"Names {table['name'].tolist()}"
+    assert stats['duplicates'] == 1
+    assert np.isnan(table['sodium'][3]), "Missing column not NaN-filled"
+    assert table['id'].tolist() == [1, 2, 3, 4]
+
+    # Measured fiber/sugar are used as they are, missing ones estimated
+    features = FeatureTable(table)
+    estimated_fiber, estimated_sugar = estimate_fiber_sugar('Nasi Merah', 'Makanan Pokok', 110, 23)
+    assert features.fiber.tolist() == [0.0, estimated_fiber, 2.4, 2.2], f"Fiber {features.fiber.tolist()}"
+    assert features.sugar.tolist() == [0.5, estimated_sugar, 10.4, 0.4], f"Sugar {features.sugar.tolist()}"
+
+    real_zip = '../data/food-nutrition-dataset.zip'
+    if os.path.exists(real_zip):
+        table, stats = read_food_groups(real_zip)
+        print(f"   {len(table)} foods from {len(stats['members'])} groups in the dataset archive")
+
+    print("✅ Zip ingestion works correctly")
+
+def test_ranking_table():
+    """Tabel ranking harus sama dengan perhitungan langsung untuk setiap kombinasi kondisi"""
+    print("=== Testing Ranking Table ===")
+
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'foods.csv')
+        load_test_frame().to_csv(csv_path, index=False)
+        catalog = CatalogStore([csv_path]).get()
+
+    def build(catalog, conditions):
+        scored = score_catalog(catalog.features, conditions)
+        return {'foods': [
+            {'name': scored.names[i], 'health_score': int(scored.health_score[i])}
+            for i in top_k(scored.health_score, 10)
+        ]}
+
+    table = build_ranking_table(catalog, build)
+    report = table.memory_report()
+    assert report['combinations'] == 2 ** len(HEALTH_CONDITIONS), f"Unexpected report {report}"
+    assert report['unique_objects'] < report['combinations'] * 11, f"Unexpected report {report}"
+
+    random.seed(7)
+    for _ in range(100):
+        conditions = random.sample(HEALTH_CONDITIONS + ['tidak_dikenal'], random.randint(0, 4))
+        assert table.lookup(condition_mask(conditions)) == build(catalog, conditions), f"Lookup differs for {conditions}"
+
+    # Over budget: no table, requests are computed live
+    store = RankingTableStore(build, max_bytes=1)
+    store.rebuild(catalog, background=False)
+    assert store.get(catalog.version) is None and store.stats()['state'] == 'over_budget', "Table over budget was kept"
+
+    print(f"✅ {report['combinations']} combinations in {report['bytes']} bytes match live ranking")
+
+def test_top_k():
+    """Top-K parsial harus sama dengan sort penuh, seri diputus berdasarkan indeks katalog"""
+    print("=== Testing Top-K Selection ===")
+
+    import numpy as np
+
+    rng = np.random.RandomState(3)
+    # Few distinct scores, so most of the cut-offs fall inside a run of ties
+    for scores in [rng.randint(1, 6, 200).astype(np.int8), rng.randint(0, 3, 57).astype(float),
+                   np.full(40, 4, dtype=np.int8), np.zeros(0, dtype=np.int8)]:
+        n = len(scores)
+        candidates = np.flatnonzero(rng.rand(n) < 0.6)
+        for k in [0, 1, 5, 10, n // 2, n - 1, n, n + 5]:
+            expected = sorted(range(n), key=lambda i: (-scores[i], i))[:max(k, 0)]
+            assert top_k(scores, k).tolist() == expected, f"top_k({k}) over {n} rows differs from the full sort"
+            expected = sorted(candidates.tolist(), key=lambda i: (-scores[i], i))[:max(k, 0)]
+            assert top_k(scores, k, candidates).tolist() == expected, f"top_k({k}) over candidates differs"
+        assert top_k(scores, -1).tolist() == []
+
+    print("✅ Top-K selection matches a stable full sort, ties included")
+
+def test_recommendation_cache():
+    """Cache rekomendasi: permintaan sama kena cache, berbeda tidak, reload dan LRU membuang entri"""
+    print("=== Testing Recommendation Cache ===")
+
+    import time
+
+    import numpy as np
+    import api_improved
+    from api_improved import recommendation_cache_key
+    from catalog.cache import LRUCache
+
+    # Keys follow the scoring: each condition counts once, order and unknown conditions don't matter
+    key = recommendation_cache_key(['diabetes', 'hipertensi'], ['Ayam', 'nasi'], 2000, 'v1')
+    assert key == recommendation_cache_key(['hipertensi', 'diabetes', 'diabetes', 'tidak_dikenal'], ['nasi', 'ayam', 'AYAM'], 2000, 'v1')
+    for other in [(['diabetes'], ['ayam', 'nasi'], 2000, 'v1'), (['diabetes', 'hipertensi'], ['ayam'], 2000, 'v1'),
+                  (['diabetes', 'hipertensi'], ['ayam', 'nasi'], 1800, 'v1'), (['diabetes', 'hipertensi'], ['ayam', 'nasi'], 2000, 'v2')]:
+        assert recommendation_cache_key(*other) != key, f"{other} shares a key with a different request"
+    features = FeatureTable(synthetic_food_frame())
+    for conditions, same in [(['diabetes', 'diabetes'], ['diabetes']), (['hipertensi', 'diabetes', 'tidak_dikenal'], ['diabetes', 'hipertensi'])]:
+        assert np.array_equal(score_catalog(features, conditions).health_score, score_catalog(features, same).health_score)
+
+    # LRU eviction and TTL
+    cache = LRUCache(maxsize=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3, "Least recently used entry was not evicted"
+    assert cache.stats()['evictions'] == 1 and cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+    expiring = LRUCache(maxsize=2, ttl=0.01)
+    expiring.put('a', 1)
+    time.sleep(0.02)
+    assert expiring.get('a') is None and len(expiring) == 0, "Expired entry was served"
+
+    cache = api_improved.recommendation_cache
+    request = {'health_conditions': ['diabetes', 'hipertensi'], 'available_ingredients': ['Ayam'], 'target_calories': 2000}
+    with api_client(synthetic_food_frame()) as client:
+        cache.reset_stats()
+        first = client.post('/api/recommendations', json=request)
+        assert first.status_code == 200 and cache.stats()['misses'] == 1 and len(cache) == 1
+        # Same request, differently spelled: served from the cache, suitable_for still echoes the request
+        again = client.post('/api/recommendations', json=dict(request, health_conditions=['hipertensi', 'diabetes', 'diabetes'],
+                                                              available_ingredients=['ayam'], target_calories='2000'))
+        assert cache.stats()['hits'] == 1 and len(cache) == 1, f"Equivalent request missed the cache: {cache.stats()}"
+        assert [food['name'] for food in again.get_json()['recommended_foods']] == \
+            [food['name'] for food in first.get_json()['recommended_foods']]
+        assert again.get_json()['recommended_foods'][0]['suitable_for'] == ['hipertensi', 'diabetes', 'diabetes']
+        # A different request misses
+        client.post('/api/recommendations', json=dict(request, health_conditions=['diabetes']))
+        assert cache.stats()['misses'] == 2 and len(cache) == 2
+
+        # Reloading the catalog empties the cache
+        store = api_improved.catalog_store
+        synthetic_food_frame(80).to_csv(store.candidate_paths[0], index=False)
+        store.reload(force=True)
+        assert len(cache) == 0, "Catalog reload kept cached responses"
+        client.post('/api/recommendations', json=request)
+        assert cache.stats()['misses'] == 3 and len(cache) == 1
+
+    print("✅ Equivalent requests hit the cache, reloads and LRU eviction drop entries")
+
+def test_foods_payload():
+    """/api/foods harus memberi ETag kuat, 304 untuk If-None-Match, varian gzip, dan ETag baru setelah reload"""
+    print("=== Testing Foods Payload ===")
+
+    import gzip
+    import json
+    import api_improved
+
+    frame = synthetic_food_frame()
+    with api_client(frame) as client:
+        response = client.get('/api/foods')
+        etag, weak = response.get_etag()
+        assert response.status_code == 200 and etag and not weak, "No strong ETag"
+        assert response.headers['Vary'] == 'Accept-Encoding' and 'Content-Encoding' not in response.headers
+        body = json.loads(response.data)
+        assert body['total'] == len(frame) and [food['id'] for food in body['data']] == frame['id'].tolist()
+
+        # Current ETag: 304 with an empty body
+        cached = client.get('/api/foods', headers={'If-None-Match': f'"{etag}"'})
+        assert cached.status_code == 304 and cached.data == b'', "If-None-Match was not answered with 304"
+        assert cached.get_etag() == (etag, False)
+
+        # gzip variant: same document, its own strong ETag
+        compressed = client.get('/api/foods', headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['Content-Encoding'] == 'gzip' and compressed.headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(compressed.data) == response.data
+        gzip_etag, weak = compressed.get_etag()
+        assert gzip_etag != etag and not weak
+        revalidated = client.get('/api/foods', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{gzip_etag}"'})
+        assert revalidated.status_code == 304 and revalidated.data == b''
+        assert client.get('/api/foods', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+        # New catalog content: new ETag, the old one no longer matches
+        store = api_improved.catalog_store
+        synthetic_food_frame(80).to_csv(store.candidate_paths[0], index=False)
+        store.reload(force=True)
+        reloaded = client.get('/api/foods', headers={'If-None-Match': f'"{etag}"'})
+        assert reloaded.status_code == 200 and reloaded.get_etag()[0] != etag, "ETag survived a catalog reload"
+        assert json.loads(reloaded.data)['total'] == 80
+
+    print("✅ /api/foods validates with ETags, serves gzip and changes its ETag on reload")
+
+def test_food_query():
+    """/api/foods harus mendukung offset/limit, proyeksi fields, filter kategori dan rentang nutrisi"""
+    print("=== Testing Food Query ===")
+
+    frame = pd.DataFrame({
+        'id': [11, 12, 13, 14, 15, 16, 17],
+        'name': ['Nasi Putih', 'Ayam Bakar', 'Bayam Rebus', 'Pisang Ambon', 'Tempe Goreng', 'Es Teh', 'Air Putih'],
+        'calories': [180.0, 250.0, 36.0, 90.0, 200.0, 90.0, 0.0],
+        'proteins': [3.0, 25.0, 3.0, 1.0, 14.0, 0.0, 0.0],
+        'fat': [0.3, 12.0, 0.3, 0.2, 11.0, 0.0, 0.0],
+        'carbohydrate': [40.0, 0.0, 4.5, 23.0, 9.0, 22.5, 0.0],
+        'image': ['nasi.jpg', 'ayam.jpg', 'bayam.jpg', 'pisang.jpg', 'tempe.jpg', 'teh.jpg', 'air.jpg'],
+    })
+    with api_client(frame) as client:
+        def foods(query):
+            response = client.get(f'/api/foods?{query}')
+            assert response.status_code == 200, f"{query}: {response.get_json()}"
+            return response.get_json()
+
+        # Pages: ids in catalog order, next_offset until the last page
+        page = foods('offset=0&limit=3')
+        assert [food['id'] for food in page['data']] == [11, 12, 13]
+        assert (page['total'], page['offset'], page['limit'], page['next_offset']) == (7, 0, 3, 3)
+        last = foods('offset=6&limit=3')
+        assert [food['id'] for food in last['data']] == [17] and last['next_offset'] is None
+        exact = foods('offset=4&limit=3')
+        assert [food['id'] for food in exact['data']] == [15, 16, 17] and exact['next_offset'] is None
+        for offset in (7, 50):
+            beyond = foods(f'offset={offset}&limit=3')
+            assert beyond['data'] == [] and beyond['total'] == 7 and beyond['next_offset'] is None
+        assert [food['id'] for food in foods('offset=5')['data']] == [16, 17]
+        assert foods('limit=100000')['limit'] == 500
+
+        # Projection keeps exactly the requested fields
+        projected = foods('fields=name,category&fields=image&limit=2')['data']
+        assert projected == [{'name': 'Nasi Putih', 'category': 'Makanan Pokok', 'image': 'nasi.jpg'},
+                             {'name': 'Ayam Bakar', 'category': 'Protein Hewani', 'image': 'ayam.jpg'}]
+
+        # Category and nutrient-range filters combine; bounds are inclusive
+        assert [food['id'] for food in foods('category=Sayuran,Buah-buahan&fields=id')['data']] == [13, 14]
+        assert [food['id'] for food in foods('min_calories=90&max_calories=200&fields=id')['data']] == [11, 14, 15, 16]
+        assert [food['id'] for food in foods('min_protein=10&max_fat=11&fields=id')['data']] == [15]
+        assert foods('category=Minuman&min_carbohydrate=30')['total'] == 0
+        filtered = foods('max_calories=100&limit=2&offset=1&fields=id')
+        assert [food['id'] for food in filtered['data']] == [14, 16] and filtered['total'] == 4 and filtered['next_offset'] == 3
+
+        for query in ['limit=0', 'limit=abc', 'offset=-1', 'fields=name,price', 'category=Jajanan',
+                      'min_fat=abc', 'min_calories=300&max_calories=100']:
+            response = client.get(f'/api/foods?{query}')
+            assert response.status_code == 400 and 'error' in response.get_json(), f"{query} gave {response.status_code}"
+
+    print("✅ Pagination, projection, filters and bad queries behave as documented")
+
+def test_analyze_nutrition_batch():
+    """Batch analisis harus menjalankan model sekali per batch, dengan error per item"""
+    print("=== Testing Analyze Nutrition Batch ===")
+
+    from api_improved import MAX_ANALYSIS_BATCH
+
+    foods = [
+        {'protein': 25, 'fat': 15, 'carbohydrate': 30},
+        {'protein': 'abc', 'fat': 1},
+        {'protein': '2.5', 'fat': 0.9, 'carbohydrate': 23},
+        'nasi',
+        {'fat': -1},
+        {'protein': True},
+        {},
+    ]
+    with api_client(synthetic_food_frame()) as client, stub_analyzer() as stub:
+        response = client.post('/api/analyze-nutrition/batch', json={'foods': foods})
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        assert body['total'] == len(foods) and body['errors'] == 4
+        analyses = body['analyses']
+        assert analyses[0]['predicted_calories'] == 355 and analyses[2]['predicted_calories'] == 110.1
+        assert analyses[6]['predicted_calories'] == 0
+        assert analyses[1] == {'error': "'protein' must be a non-negative number"}
+        assert analyses[3] == {'error': 'Each food must be an object'}
+        assert analyses[4] == {'error': "'fat' must be a non-negative number"} and 'error' in analyses[5]
+        # The valid foods went through the analyzer together
+        assert stub.batches == [3], f"Analyzer batches {stub.batches}"
+
+        # Same results as the single-food endpoint
+        single = client.post('/api/analyze-nutrition', json=foods[0]).get_json()['analysis']
+        assert single == analyses[0]
+
+        assert client.post('/api/analyze-nutrition/batch', json={'foods': []}).get_json()['analyses'] == []
+        for invalid in [{'foods': 'nasi'}, {'foods': None}, {}, {'foods': [{}] * (MAX_ANALYSIS_BATCH + 1)}]:
+            response = client.post('/api/analyze-nutrition/batch', json=invalid)
+            assert response.status_code == 400, f"{str(invalid)[:40]} gave {response.status_code}"
+        assert stub.batches == [3, 1, 0]
+
+    print("✅ Batch analysis: one analyzer call, per-item errors, size limit enforced")
+
+def test_lazy_analyzer():
+    """Analyzer dimuat saat pertama dipakai, atau langsung dengan ANALYZER_WARMUP=1"""
+    print("=== Testing Lazy Analyzer Loading ===")
+
+    import importlib.util
+    import threading
+    import api_improved
+    import ml_models.nutrition_analyzer_improved as analyzer_module
+
+    with api_client(synthetic_food_frame()) as client, stub_analyzer(loaded=False) as stub:
+        health = client.get('/api/health').get_json()
+        assert health['nutrition_analyzer'] is False and health['prediction_cache'] is None
+        assert health['nutrition_analyzer_status']['state'] == 'not_loaded'
+        # Health checks never trigger the load
+        assert api_improved.nutrition_analyzer is None
+
+        response = client.post('/api/analyze-nutrition', json={'protein': 10, 'fat': 5, 'carbohydrate': 20})
+        assert response.status_code == 200 and stub.batches == [1]
+
+        health = client.get('/api/health').get_json()
+        assert health['nutrition_analyzer'] is True
+        assert health['nutrition_analyzer_status']['state'] == 'ready'
+        assert health['nutrition_analyzer_status']['load_seconds'] is not None
+        assert health['prediction_cache'] == stub.cache_stats()
+
+    # A fresh import with ANALYZER_WARMUP=1 builds the analyzer in the background
+    original_class = analyzer_module.ImprovedNutritionAnalyzer
+    original_warmup = os.environ.get('ANALYZER_WARMUP')
+    analyzer_module.ImprovedNutritionAnalyzer = StubAnalyzer
+    os.environ['ANALYZER_WARMUP'] = '1'
+    try:
+        spec = importlib.util.spec_from_file_location('api_improved_warmup', api_improved.__file__)
+        warm_api = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(warm_api)
+        for thread in threading.enumerate():
+            if thread.name == 'analyzer-warmup':
+                thread.join(timeout=10)
+        assert warm_api.analyzer_status['state'] == 'ready', warm_api.analyzer_status
+        assert isinstance(warm_api.nutrition_analyzer, StubAnalyzer)
+        health = warm_api.app.test_client().get('/api/health').get_json()
+        assert health['nutrition_analyzer'] is True
+    finally:
+        analyzer_module.ImprovedNutritionAnalyzer = original_class
+        if original_warmup is None:
+            os.environ.pop('ANALYZER_WARMUP', None)
+        else:
+            os.environ['ANALYZER_WARMUP'] = original_warmup
+
+    print("✅ Analyzer loads on first use, or eagerly with ANALYZER_WARMUP=1")
+
+def test_calorie_index():
+    """Indeks kalori harus memberi jarak yang sama dengan pencarian brute force"""
+    print("=== Testing Calorie Index ===")
+
+    import random
+    import numpy as np
+
+    calories = synthetic_food_frame()['calories'].to_numpy(dtype=float, copy=True)
+    missing = [len(calories) // 3, len(calories) - 1]
+    calories[missing] = np.nan
+    index = CalorieIndex(calories)
+    known = np.flatnonzero(~np.isnan(calories))
+    assert len(index) == len(calories)
+
+    for target in [0, 35.5, 110, 250, 333.3, 450, 10_000, -5]:
+        for k in [1, 5, 20]:
+            rows, distances = index.nearest(target, k)
+            expected = np.sort(np.abs(calories[known] - target))[:k]
+            assert len(set(rows.tolist())) == k, f"Nearest {k} to {target} repeat foods"
+            assert np.array_equal(distances, expected), f"Nearest {k} to {target} differ from brute force"
+            assert np.array_equal(np.abs(calories[rows] - target), distances)
+
+            # With ties: every food as close as the k-th one
+            rows, distances = index.nearest(target, k, include_ties=True)
+            assert len(rows) == np.count_nonzero(np.abs(calories[known] - target) <= expected[-1]), \
+                f"Ties at {target} are incomplete"
+            shuffled = shuffle_ties(rows, distances, random.Random(target))
+            assert sorted(shuffled.tolist()) == sorted(rows.tolist())
+            assert np.array_equal(np.abs(calories[shuffled] - target), distances), \
+                f"Shuffling ties at {target} changed the distances"
+
+    # Near-ties: the same seed gives the same foods, different seeds vary
+    # only within the tolerance of the cut-off
+    for target in [100, 250, 400]:
+        _, distances = index.nearest(target, 5)
+        picks = {tuple(index.sample_nearest(target, 5, random.Random(seed), tolerance=10).tolist())
+                 for seed in range(30)}
+        again = tuple(index.sample_nearest(target, 5, random.Random(0), tolerance=10).tolist())
+        assert again in picks and all(len(rows) == 5 for rows in picks), f"Seeded sample at {target} is not reproducible"
+        for rows in picks:
+            picked = np.abs(calories[list(rows)] - target)
+            assert not (np.diff(picked) < 0).any() and picked[-1] <= distances[-1] + 10, \
+                f"Seeded sample at {target} left the near-tie window"
+            assert set(np.flatnonzero(np.abs(calories - target) < distances[-1] - 10)) <= set(rows)
+
+    # Foods without calories only fill up a short result
+    rows, distances = index.nearest(100, len(calories))
+    assert sorted(rows[-2:].tolist()) == missing and np.isnan(distances[-2:]).all(), \
+        "Foods without calories were not appended last"
+    assert len(index.nearest(100, 0)[0]) == 0, "k = 0 returned foods"
+    assert len(index.sample_nearest(100, 0, random.Random(0))) == 0
+    assert len(index.sample_nearest(100, -3, random.Random(0))) == 0, "k < 0 returned foods"
+
+    print(f"✅ Nearest-calorie lookups over {len(index)} foods match brute force")
+
+def test_food_recommendations_endpoint():
+    """/api/food-recommendations harus memvalidasi target_calories dan max_recommendations"""
+    print("=== Testing Food Recommendations Endpoint ===")
+
+    import api_improved
+
+    with api_client(synthetic_food_frame()) as client:
+        response = client.post('/api/food-recommendations',
+                               json={'target_calories': 300, 'max_recommendations': 4, 'seed': 1})
+        assert response.status_code == 200, response.get_json()
+        recommendations = response.get_json()['recommendations']
+        assert len(recommendations) == 4
+        again = client.post('/api/food-recommendations',
+                            json={'target_calories': 300, 'max_recommendations': 4, 'seed': 1})
+        assert again.get_json()['recommendations'] == recommendations
+
+        for invalid in [0, -1, '5', 2.5, True, None, 10_000]:
+            response = client.post('/api/food-recommendations',
+                                   json={'target_calories': 300, 'max_recommendations': invalid})
+            assert response.status_code == 400, f"max_recommendations={invalid!r} gave {response.status_code}"
+
+        for invalid in ['abc', '', -5, 0, True, 'nan', 'inf', None, [300]]:
+            response = client.post('/api/food-recommendations', json={'target_calories': invalid, 'seed': 1})
+            assert response.status_code == 400, f"target_calories={invalid!r} gave {response.status_code}"
+
+        # Equal targets share one cache entry, however they are written
+        api_improved.recommendation_cache.clear()
+        api_improved.recommendation_cache.reset_stats()
+        for target in ['300', 300, 300.0, '300.0']:
+            response = client.post('/api/food-recommendations',
+                                   json={'target_calories': target, 'max_recommendations': 4, 'seed': 1})
+            assert response.status_code == 200, response.get_json()
+            body = response.get_json()
+            assert body['recommendations'] == recommendations and body['target_calories'] == 300
+        stats = api_improved.recommendation_cache.stats()
+        assert stats['size'] == 1 and stats['misses'] == 1 and stats['hits'] == 3, stats
+
+    print("✅ Food recommendations validate target_calories and max_recommendations")
+
+def test_meal_plan():
+    """Branch-and-bound harus menemukan rencana makan terbaik seperti pencarian menyeluruh"""
+    print("=== Testing Meal Plan Optimizer ===")
+
+    import numpy as np
+    from catalog.meal_plan import CALORIE_PENALTY, CALORIE_TOLERANCE, MAX_FOODS_PER_MEAL
+
+    features = FeatureTable(synthetic_food_frame())
+    # A small candidate set keeps the exhaustive search fast
+    candidates = np.arange(0, len(features), 12)
+    for conditions, target in [([], 2000), (['diabetes'], 1500), (['hipertensi', 'obesitas'], 2500)]:
+        scored = score_catalog(features, conditions)
+        plan = plan_meals(scored, candidates, target, time_budget=60)
+        assert plan is not None and plan.optimal, f"No complete plan for {conditions}"
+        assert len(plan.meals) == len(MEALS)
+        rows = np.concatenate(plan.meals)
+        assert len(set(rows.tolist())) == len(rows) and set(rows.tolist()) <= set(candidates.tolist())
+
+        # The plan's value, recomputed from its calories and macros
+        value = 0.0
+        for meal, (_, share) in zip(plan.meals, MEALS):
+            assert 1 <= len(meal) <= MAX_FOODS_PER_MEAL
+            miss = abs(scored.calories[meal].sum() - target * share) / (target * share) - CALORIE_TOLERANCE
+            value += scored.health_score[meal].sum() - CALORIE_PENALTY * 100 * max(miss, 0)
+        macros = np.array([scored.proteins[rows].sum(), scored.carbohydrate[rows].sum(), scored.fat[rows].sum()])
+        value -= macro_penalty(macros * np.array([4.0, 4.0, 9.0]))
+        assert np.isclose(plan.value, value), f"Plan value {plan.value} != {value}"
+        assert abs(scored.calories[rows].sum() - target) <= target * 0.5
+
+        # Every combination of one option per meal
+        first, second, third = PlanningPool(scored, candidates, target).options()
+        overlap = ((second.rows[:, None, :, None] == third.rows[None, :, None, :])
+                   & (second.rows[:, None, :, None] >= 0)).any(axis=(2, 3))
+        best = -np.inf
+        for i in range(len(first.value)):
+            used = first.rows[i][first.rows[i] >= 0]
+            values = first.value[i] + second.value[:, None] + third.value[None, :] - \
+                macro_penalty(first.macros[i] + second.macros[:, None] + third.macros[None, :])
+            values[overlap | np.isin(second.rows, used).any(axis=1)[:, None]
+                   | np.isin(third.rows, used).any(axis=1)[None, :]] = -np.inf
+            best = max(best, values.max())
+        assert np.isclose(plan.value, best), f"Plan for {conditions} scores {plan.value}, exhaustive search {best}"
+
+    # Without time the best plan found so far is still returned
+    plan = plan_meals(scored, np.arange(len(scored)), 2000, time_budget=0)
+    assert plan is not None and len(plan.meals) == len(MEALS), "No plan within the time budget"
+    # Foods that can't fill every meal give no plan
+    assert plan_meals(scored, candidates[:1], 2000) is None
+
+    print("✅ Meal plans match exhaustive search")
+
+def test_target_calories():
+    """Endpoint rekomendasi dan meal plan harus menerima target kalori berupa angka atau string angka"""
+    print("=== Testing Target Calories ===")
+
+    with api_client(synthetic_food_frame()) as client:
+        for endpoint in ['/api/recommendations', '/api/meal-plan']:
+            for target in [2000, '2000', '1800.5']:
+                response = client.post(endpoint, json={'health_conditions': ['diabetes'], 'target_calories': target,
+                                                       'days': 1})
+                assert response.status_code == 200, f"{endpoint} rejected {target!r}: {response.get_json()}"
+                body = response.get_json()
+                summary = body['meal_plan_summary'] if endpoint == '/api/recommendations' else body
+                assert summary['target_calories'] == float(target)
+            for target in ['abc', '', -5, 0, True, 'nan', 'inf', None, [2000]]:
+                response = client.post(endpoint, json={'target_calories': target})
+                assert response.status_code == 400, f"{endpoint} accepted {target!r}"
+
+        plan = client.post('/api/recommendations', json={'target_calories': '2000'}).get_json()
+        assert len(plan['meal_plans']) == len(MEALS)
+        assert plan['meal_plan_summary']['total_calories'] == sum(meal['total_calories'] for meal in plan['meal_plans'])
+        for meal in plan['meal_plans']:
+            assert meal['total_calories'] == sum(food['calories'] for food in meal['foods'])
+
+        # Foods offered when no ingredient matches are not planned into meals
+        body = client.post('/api/recommendations', json={'available_ingredients': ['durian'],
+                                                         'target_calories': 1500}).get_json()
+        assert body['recommended_foods'] and all(food['health_labels'] == ['sehat'] for food in body['recommended_foods'])
+        assert body['meal_plans'] == [] and body['meal_plan_summary'] is None
+
+    print("✅ Numeric strings accepted, invalid targets rejected")
+
+def test_multi_day_meal_plan():
+    """Rencana beberapa hari tidak boleh mengulang makanan dalam jendela variety_days"""
+    print("=== Testing Multi-Day Meal Plan ===")
+
+    import numpy as np
+
+    def served(plan):
+        return set(np.concatenate(plan.meals).tolist())
+
+    def repeats(plans, variety_days):
+        return [(first, second) for first in range(len(plans)) for second in range(first + 1, len(plans))
+                if second - first < variety_days and served(plans[first]) & served(plans[second])]
+
+    scored = score_catalog(FeatureTable(synthetic_food_frame()), ['diabetes'])
+    pool = PlanningPool(scored, np.arange(len(scored)), 2000, depth=3)
+    plans = plan_days(pool, 7, 3, time_budget=0.02)
+    assert len(plans) == 7 and all(plan is not None for plan in plans), "Not every day could be planned"
+    assert all(len(plan.meals) == len(MEALS) for plan in plans)
+    assert not repeats(plans, 3), f"Foods repeated within 3 days: {repeats(plans, 3)}"
+    for plan in plans:
+        rows = np.concatenate(plan.meals)
+        assert abs(scored.calories[rows].sum() - 2000) <= 1000
+
+    # Swapping a meal re-plans only its day, without that meal's foods
+    lunch = plans[3].meals[1]
+    swapped = list(plans)
+    swapped[3] = replan_day(pool, plans, 3, 3, banned=lunch, time_budget=0.02)
+    assert swapped[3] is not None, "Swapped day could not be planned"
+    assert not served(swapped[3]) & set(lunch.tolist()), "Swapped day still serves the swapped meal"
+    assert not repeats(swapped, 3), "Swap broke variety"
+    assert all(swapped[day] is plans[day] for day in range(7) if day != 3), "Swap changed other days"
+
+    print("✅ 7-day plan without repeats within 3 days, swap re-planned one day")
+
+def test_meal_plan_swap_endpoint():
+    """Swap lewat /api/meal-plan hanya boleh mengubah hari yang ditukar"""
+    print("=== Testing Meal Plan Swap Endpoint ===")
+
+    def foods(day):
+        return {food['id'] for meal in day['meal_plans'] for food in meal['foods']}
+
+    request = {'health_conditions': ['diabetes'], 'target_calories': 2000, 'days': 5, 'variety_days': 2}
+    with api_client(synthetic_food_frame()) as client:
+        response = client.post('/api/meal-plan', json=request)
+        assert response.status_code == 200, response.get_json()
+        days = response.get_json()['days']
+        assert [day['day'] for day in days] == [1, 2, 3, 4, 5]
+        assert all(len(day['meal_plans']) == len(MEALS) for day in days)
+
+        meal_type = MEALS[1][0]
+        lunch = {food['id'] for food in days[2]['meal_plans'][1]['foods']}
+        response = client.post('/api/meal-plan', json=dict(request, swap={'day': 3, 'meal_type': meal_type}, plan=days))
+        assert response.status_code == 200, response.get_json()
+        swapped = response.get_json()['days']
+        assert [swapped[i] for i in (0, 1, 3, 4)] == [days[i] for i in (0, 1, 3, 4)], "Swap changed other days"
+        assert swapped[2] != days[2] and not foods(swapped[2]) & lunch, "Swapped day still serves the swapped meal"
+        assert not foods(swapped[2]) & (foods(swapped[1]) | foods(swapped[3])), "Swap broke variety"
+
+        for swap in [{'day': 0, 'meal_type': meal_type}, {'day': 3, 'meal_type': 'Brunch'}, 'day 3']:
+            response = client.post('/api/meal-plan', json=dict(request, swap=swap, plan=days))
+            assert response.status_code == 400, f"swap={swap!r} gave {response.status_code}"
+
+    print("✅ Swap re-planned only the swapped day")
+
+def test_similarity_index():
+    """KD-tree harus memberi tetangga terdekat yang sama dengan pencarian brute force"""
+    print("=== Testing Similarity Index ===")
+
+    import numpy as np
+
+    features = FeatureTable(load_test_frame())
+    index = SimilarityIndex(features)
+    health_score = score_catalog(features, ['diabetes']).health_score
+
+    for row in range(0, len(index), 7):
+        for allowed in (None, health_score > health_score[row], health_score >= health_score[row]):
+            rows, distances = index.similar(row, 10, allowed)
+            candidates = np.ones(len(index), dtype=bool) if allowed is None else allowed.copy()
+            candidates[row] = False
+            candidates = np.flatnonzero(candidates)
+            expected = np.sqrt(((index.points[candidates] - index.points[row]) ** 2).sum(axis=1))
+            order = np.lexsort((candidates, expected))[:10]
+            assert np.array_equal(rows, candidates[order]), f"Neighbours of row {row} differ from brute force"
+            assert np.allclose(distances, expected[order])
+
+    print(f"✅ KD-tree neighbours over {len(index)} foods match brute force")
+
+def main():
+    """Main test function"""
+    print("🚀 Testing NutriSuggest Catalog Engine")
+    print("=" * 50)
+
+    tests = [
+        ("Keyword Matcher", test_keyword_matcher),
+        ("Ingredient Index", test_ingredient_index),
+        ("Vectorized Scoring", test_vectorized_scoring),
+        ("CSV Table", test_csv_table),
+        ("Catalog Snapshot", test_snapshot),
+        ("Catalog Store", test_catalog_store),
+        ("Zip Ingestion", test_ingest),
+        ("Top-K Selection", test_top_k),
+        ("Ranking Table", test_ranking_table),
+        ("Recommendation Cache", test_recommendation_cache),
+        ("Foods Payload", test_foods_payload),
+        ("Food Query", test_food_query),
+        ("Analyze Nutrition Batch", test_analyze_nutrition_batch),
+        ("Lazy Analyzer", test_lazy_analyzer),
+        ("Calorie Index", test_calorie_index),
+        ("Food Recommendations Endpoint", test_food_recommendations_endpoint),
+        ("Meal Plan", test_meal_plan),
+        ("Target Calories", test_target_calories),
+        ("Multi-Day Meal Plan", test_multi_day_meal_plan),
+        ("Meal Plan Swap Endpoint", test_meal_plan_swap_endpoint),
+        ("Similarity Index", test_similarity_index)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n🧪 Running {test_name} test...")
+        try:
+            test_func()
+            result = True
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            result = False
+        results.append((test_name, result))
+
+    print("\n" + "=" * 50)
+    print("📋 Test Results Summary:")
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+
+    all_passed = all(result for _, result in results)
+    if all_passed:
+        print("\n🎉 All tests passed! Catalog engine is ready to use.")
+    else:
+        print("\n⚠️ Some tests failed. Please check the errors above.")
+
+    return all_passed
+
+if __name__ == "__main__":
+    main()
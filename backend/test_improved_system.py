@@ -8,15 +8,79 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from ml_models.nutrition_analyzer_improved import ImprovedNutritionAnalyzer
+import numpy as np
 import pandas as pd
 
+def train_tiny_models(seed=0, n_samples=400):
+    """Model RandomForest kecil + scaler dari data sintetis, urutannya seperti write_model_bundle"""
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    
+    rng = np.random.default_rng(seed)
+    X = np.round(rng.uniform(0, 60, (n_samples, 3)), 1)
+    calories = 4 * X[:, 0] + 9 * X[:, 1] + 4 * X[:, 2] + rng.normal(0, 15, n_samples)
+    levels = np.select([calories < 300, calories < 600], ['Rendah', 'Sedang'], 'Tinggi')
+    encoder = LabelEncoder().fit(levels)
+    
+    regression_scaler = StandardScaler().fit(X)
+    regression_model = RandomForestRegressor(n_estimators=8, random_state=seed)
+    regression_model.fit(regression_scaler.transform(X), calories)
+    classification_scaler = StandardScaler().fit(X)
+    classification_model = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=seed)
+    classification_model.fit(classification_scaler.transform(X), encoder.transform(levels))
+    return regression_model, regression_scaler, classification_model, classification_scaler, encoder
+
+def write_test_models(models_dir, fitted):
+    """Simpan model kecil sebagai pickle dengan nama file yang dipakai analyzer"""
+    import joblib
+    from ml_models.model_bundle import MODEL_NAMES, PICKLED_ENCODER_FILE, PICKLED_MODEL_FILES
+    
+    filenames = [filename for name in MODEL_NAMES for filename in PICKLED_MODEL_FILES[name]]
+    for filename, obj in zip(filenames + [PICKLED_ENCODER_FILE], fitted):
+        joblib.dump(obj, os.path.join(models_dir, filename))
+
+def write_test_foods(path, count=40, seed=3):
+    """CSV katalog sintetis dengan kolom seperti nutrition_sampled_500.csv"""
+    rng = np.random.default_rng(seed)
+    nutrients = np.round(rng.uniform(0, 40, (count, 3)), 1)
+    pd.DataFrame({
+        'id': np.arange(1, count + 1),
+        'calories': np.round(4 * nutrients[:, 0] + 9 * nutrients[:, 1] + 4 * nutrients[:, 2], 1),
+        'proteins': nutrients[:, 0],
+        'fat': nutrients[:, 1],
+        'carbohydrate': nutrients[:, 2],
+        'name': [f'Makanan {i}' for i in range(1, count + 1)],
+        'image': [f'https://example.com/{i}.jpg' for i in range(1, count + 1)]
+    }).to_csv(path, index=False)
+    return path
+
+def split_boundary_inputs(model, scaler, seed=1):
+    """Raw inputs on and next to every split threshold of the first tree (after un-scaling)"""
+    tree = model.estimators_[0].tree_
+    rng = np.random.default_rng(seed)
+    rows = []
+    for feature, threshold in zip(tree.feature, tree.threshold):
+        if feature < 0:
+            continue
+        raw = threshold * scaler.scale_[feature] + scaler.mean_[feature]
+        for value in (np.nextafter(raw, -np.inf), raw, np.nextafter(raw, np.inf)):
+            row = rng.uniform(0, 60, 3)
+            row[feature] = value
+            rows.append(row)
+    return np.array(rows)
+
 def test_nutrition_analyzer():
     """Test nutrition analyzer"""
     print("=== Testing Improved Nutrition Analyzer ===")
     
-    try:
-        # Initialize analyzer
-        analyzer = ImprovedNutritionAnalyzer()
+    import tempfile
+    
+    fitted = train_tiny_models()
+    regression_model, regression_scaler, classification_model, classification_scaler, encoder = fitted
+    with tempfile.TemporaryDirectory() as models_dir:
+        write_test_models(models_dir, fitted)
+        data_path = write_test_foods(os.path.join(models_dir, 'foods.csv'))
+        analyzer = ImprovedNutritionAnalyzer(data_path=data_path, models_path=models_dir, warm_cache=False)
         print("✅ Nutrition Analyzer initialized successfully")
         
         # Test nutrition analysis
@@ -30,23 +94,48 @@ def test_nutrition_analyzer():
         print("\n📊 Nutrition Analysis Result:")
         print(f"Predicted Calories: {result['predicted_calories']}")
         print(f"Calorie Level: {result['calorie_level']}")
-        print(f"Protein: {result['protein_percentage']}%")
-        print(f"Fat: {result['fat_percentage']}%")
-        print(f"Carbohydrate: {result['carbohydrate_percentage']}%")
         print(f"Balance Score: {result['nutrition_balance']:.1f}%")
-        print("Recommendations:", result['recommendations'])
+        
+        test_input = np.array([[25.0, 15.0, 30.0]])
+        expected_calories = regression_model.predict(regression_scaler.transform(test_input))[0]
+        expected_level = encoder.inverse_transform(classification_model.predict(classification_scaler.transform(test_input)))[0]
+        assert result['predicted_calories'] == round(expected_calories, 2)
+        assert result['calorie_level'] == expected_level
+        
+        # Repeated inputs are served from the prediction cache
+        before = analyzer.cache_stats()
+        result['recommendations'].append("diubah oleh pemanggil")
+        assert analyzer.analyze_food_nutrition(test_food) != result
+        result['recommendations'].pop()
+        assert analyzer.analyze_food_nutrition(test_food) == result
+        assert analyzer.analyze_food_nutrition({'proteins': 25.00001, 'fat': 15.0, 'carbohydrate': 30.0}) == result
+        after = analyzer.cache_stats()
+        assert after['hits'] == before['hits'] + 3 and after['misses'] == before['misses']
+        assert analyzer.predict_calories(25.0, 15.0, 30.0) == result['predicted_calories']
+        print(f"Prediction cache: {analyzer.cache_stats()}")
+        
+        # A batch mixes cached and new inputs and matches single analyses
+        foods = [test_food, {'proteins': 3.0, 'fat': 1.0, 'carbohydrate': 50.0}, test_food]
+        batch = analyzer.analyze_foods_nutrition(foods)
+        assert batch == [analyzer.analyze_food_nutrition(food) for food in foods]
+        
+        # Warming fills the cache with the catalog foods without counting as traffic
+        warmed = ImprovedNutritionAnalyzer(data_path=data_path, models_path=models_dir)
+        stats = warmed.cache_stats()
+        assert stats['size'] == 3 * len(warmed.data) and stats['hits'] == stats['misses'] == 0
+        food = warmed.data.iloc[0]
+        warmed.analyze_food_nutrition({'proteins': food['protein'], 'fat': food['fat'], 'carbohydrate': food['carbohydrates']})
+        assert warmed.cache_stats()['hits'] == 1
         
         # Test food recommendations
         recommendations = analyzer.get_food_recommendations(500, 3)
         print(f"\n🍽️ Food Recommendations (target: 500 calories):")
         for i, rec in enumerate(recommendations, 1):
             print(f"{i}. {rec['name']} - {rec['calories']} cal")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error testing nutrition analyzer: {e}")
-        return False
+        differences = [abs(rec['calories'] - 500) for rec in recommendations]
+        assert len(recommendations) == 3 and differences == sorted(differences)
+    
+    print("✅ Analyzer predictions match the models and repeat inputs hit the cache")
 
 def test_dataset():
     """Test dataset loading"""
@@ -105,6 +194,105 @@ def test_models():
         print(f"❌ Error testing models: {e}")
         return False
 
+def test_compiled_models():
+    """Test compiled RandomForest inference against sklearn"""
+    print("\n=== Testing Compiled Models ===")
+    
+    from sklearn.linear_model import LinearRegression
+    from ml_models.compiled_forest import compile_forest
+    
+    regression_model, regression_scaler, classification_model, classification_scaler, _ = train_tiny_models()
+    rng = np.random.default_rng(42)
+    random_input = np.round(rng.uniform(-10, 100, (2000, 3)), 1)
+    
+    for name, model, scaler in [
+        ('Regression', regression_model, regression_scaler),
+        ('Classification', classification_model, classification_scaler)
+    ]:
+        compiled = compile_forest(model, scaler)
+        assert compiled is not None, f"{name} forest was not compiled"
+        # The folded thresholds must agree with sklearn right at each split
+        test_input = np.vstack([random_input, split_boundary_inputs(model, scaler)])
+        scaled_input = scaler.transform(test_input)
+        
+        expected = model.predict(scaled_input)
+        actual = compiled.predict(test_input)
+        assert np.array_equal(expected, actual), f"{name}: {(expected != actual).sum()} predictions differ"
+        if name == 'Classification':
+            assert np.array_equal(model.predict_proba(scaled_input), compiled.predict_proba(test_input))
+        print(f"✅ {name}: compiled predictions match sklearn exactly")
+    
+    # Without a scaler the raw thresholds are used as they are
+    compiled = compile_forest(regression_model)
+    assert np.array_equal(compiled.predict(random_input), regression_model.predict(random_input))
+    
+    linear = LinearRegression().fit(random_input, random_input.sum(axis=1))
+    assert compile_forest(linear, regression_scaler) is None
+    print("✅ Non-forest models are left to sklearn")
+
+def test_model_bundle():
+    """Test the memory-mapped model bundle against the pickled models"""
+    print("\n=== Testing Model Bundle ===")
+    
+    import json
+    import tempfile
+    from sklearn.linear_model import LinearRegression
+    from ml_models.compiled_forest import compile_forest
+    from ml_models.model_bundle import MODEL_NAMES, POINTER_FILE, PickledModels, load_models, write_model_bundle
+    
+    fitted = train_tiny_models()
+    test_input = np.round(np.random.default_rng(7).uniform(0, 100, (500, 3)), 1)
+    with tempfile.TemporaryDirectory() as models_dir:
+        write_test_models(models_dir, fitted)
+        pickled = PickledModels(models_dir, compiled=False)
+        
+        version = write_model_bundle(models_dir, *fitted)
+        bundle = load_models(models_dir)
+        assert bundle.version == version
+        print(f"✅ Bundle {version} written and loaded")
+        
+        for name, (model, scaler) in zip(MODEL_NAMES, [fitted[0:2], fitted[2:4]]):
+            predictor = bundle.predictor(name)
+            assert bundle.manifest['models'][name]['kind'] == 'compiled_forest'
+            for array_name, expected in compile_forest(model, scaler).to_arrays().items():
+                array = getattr(predictor, array_name)
+                # Read-only views of the memory-mapped .npy files
+                assert isinstance(array.base, np.memmap) and not array.flags.writeable
+                assert array.dtype == expected.dtype and np.array_equal(array, expected)
+            expected = pickled.predictor(name).predict(test_input)
+            assert np.array_equal(expected, predictor.predict(test_input)), f"{name}: bundle predictions differ"
+        assert list(bundle.labels()) == list(fitted[4].classes_)
+        print("✅ Bundle predictions match the pickled models exactly")
+        
+        # Same content publishes the same version
+        assert write_model_bundle(models_dir, *fitted) == version
+        
+        # Non-forest models are stored with joblib next to their scaler
+        linear = LinearRegression().fit(fitted[1].transform(test_input), test_input.sum(axis=1))
+        linear_version = write_model_bundle(models_dir, linear, *fitted[1:])
+        linear_bundle = load_models(models_dir)
+        assert linear_version != version and linear_bundle.version == linear_version
+        assert linear_bundle.manifest['models']['regression']['kind'] == 'estimator'
+        assert np.array_equal(linear_bundle.predictor('regression').predict(test_input),
+                              linear.predict(fitted[1].transform(test_input)))
+        
+        # The analyzer picks up a newly published bundle on reload
+        write_model_bundle(models_dir, *fitted)
+        analyzer = ImprovedNutritionAnalyzer(data_path=write_test_foods(os.path.join(models_dir, 'foods.csv')),
+                                             models_path=models_dir, warm_cache=False)
+        assert analyzer.model_version == version
+        before = analyzer.predict_calories(25.0, 15.0, 30.0)
+        
+        retrained = train_tiny_models(seed=1)
+        new_version = write_model_bundle(models_dir, *retrained)
+        with open(os.path.join(models_dir, POINTER_FILE)) as f:
+            assert json.load(f)['version'] == new_version != version
+        analyzer.load_trained_models()
+        assert analyzer.model_version == new_version
+        expected = round(retrained[0].predict(retrained[1].transform([[25.0, 15.0, 30.0]]))[0], 2)
+        assert analyzer.predict_calories(25.0, 15.0, 30.0) == expected != before
+        print(f"✅ Analyzer reloaded bundle {new_version}")
+
 def main():
     """Main test function"""
     print("🚀 Testing NutriSuggest Improved System")
@@ -113,13 +301,20 @@ def main():
     tests = [
         ("Dataset", test_dataset),
         ("Models", test_models),
+        ("Compiled Models", test_compiled_models),
+        ("Model Bundle", test_model_bundle),
         ("Nutrition Analyzer", test_nutrition_analyzer)
     ]
     
     results = []
     for test_name, test_func in tests:
         print(f"\n🧪 Running {test_name} test...")
-        result = test_func()
+        try:
+            # Tests fail by raising; the data-file checks also return False
+            result = test_func() is not False
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            result = False
         results.append((test_name, result))
     
     print("\n" + "=" * 50)
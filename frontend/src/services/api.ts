@@ -38,6 +38,25 @@ export interface ApiResponse<T> {
   success: boolean;
   data: T;
   total?: number;
+  offset?: number;
+  limit?: number | null;
+  next_offset?: number | null;
+}
+
+// Server-side filtering, projection and pagination for /foods
+export interface FoodQuery {
+  offset?: number;
+  limit?: number;
+  fields?: string[];
+  category?: string[];
+  min_calories?: number;
+  max_calories?: number;
+  min_protein?: number;
+  max_protein?: number;
+  min_fat?: number;
+  max_fat?: number;
+  min_carbohydrate?: number;
+  max_carbohydrate?: number;
 }
 
 class ApiService {
@@ -70,9 +89,15 @@ class ApiService {
     }
   }
 
-  // Get all foods
-  async getFoods(): Promise<ApiResponse<FoodItem[]>> {
-    return this.request<ApiResponse<FoodItem[]>>('/foods');
+  // Get foods (all of them, or one filtered page when a query is given)
+  async getFoods(query?: FoodQuery): Promise<ApiResponse<FoodItem[]>> {
+    const params = new URLSearchParams();
+    Object.entries(query || {}).forEach(([key, value]) => {
+      if (value === undefined || value === null) return;
+      params.append(key, Array.isArray(value) ? value.join(',') : String(value));
+    });
+    const queryString = params.toString();
+    return this.request<ApiResponse<FoodItem[]>>(`/foods${queryString ? `?${queryString}` : ''}`);
   }
 
   // Get food categories
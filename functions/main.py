@@ -1,12 +1,22 @@
 # NutriSuggest Firebase Functions
 # Converted from Flask app to Firebase Functions
+#
+# This directory is deployed on its own (stdlib only, no access to
+# backend/), so it deliberately keeps its own dataset cache, categorizer and
+# scorer instead of using backend/catalog.  Its scoring is the original one:
+# only diabetes, hipertensi, obesitas and jantung adjust the health score,
+# and none of the backend's later catalog changes (condition rule table,
+# measured nutrients, ranking table, meal plans) apply here.
 
 from firebase_functions import https_fn
 from firebase_functions.options import set_global_options
 from firebase_admin import initialize_app
-import pandas as pd
-import numpy as np
+import csv
 import json
+import hashlib
+import os
+from array import array
+from datetime import datetime
 from typing import Dict, List, Any
 
 # Set global options for cost control
@@ -15,6 +25,39 @@ set_global_options(max_instances=10)
 # Initialize Firebase app
 initialize_app()
 
+# Dataset cache: parsed once per instance and shared by every invocation.
+# The file is re-read only when its mtime and content hash change.
+_dataset_cache = {'path': None, 'mtime_ns': None, 'hash': None, 'table': None}
+
+# Numeric dataset columns, stored as array('d') (missing cells are NaN)
+NUMERIC_COLUMNS = ['calories', 'proteins', 'fat', 'carbohydrate']
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_food_table(path: str) -> Dict[str, Any]:
+    """Parse the dataset into columns with the stdlib csv module.
+
+    pandas is not needed for a few hundred rows and would dominate the cold
+    start.  Empty cells become NaN, like pandas.read_csv.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.DictReader(f) if row]
+    
+    nan = float('nan')
+    table = {
+        'id': [int(row['id']) for row in rows],
+        'name': [row['name'] or nan for row in rows],
+        'image': [row.get('image') or nan for row in rows]
+    }
+    for column in NUMERIC_COLUMNS:
+        table[column] = array('d', (float(row[column]) if row[column] else nan for row in rows))
+    return table
+
 # Load dataset function
 def load_dataset():
     try:
@@ -27,11 +70,21 @@ def load_dataset():
         
         for path in possible_paths:
             try:
-                df = pd.read_csv(path)
-                print(f"✅ Dataset loaded successfully from: {path}")
-                return df
+                mtime_ns = os.stat(path).st_mtime_ns
             except FileNotFoundError:
                 continue
+            
+            if _dataset_cache['path'] == path and _dataset_cache['mtime_ns'] == mtime_ns:
+                return _dataset_cache['table']
+            
+            content_hash = _file_digest(path)
+            if _dataset_cache['path'] != path or _dataset_cache['hash'] != content_hash:
+                _dataset_cache['table'] = add_food_features(read_food_table(path))
+                _dataset_cache['hash'] = content_hash
+                print(f"✅ Dataset loaded successfully from: {path}")
+            _dataset_cache['path'] = path
+            _dataset_cache['mtime_ns'] = mtime_ns
+            return _dataset_cache['table']
         
         print("❌ Dataset not found in any of the expected paths")
         return None
@@ -164,7 +217,8 @@ def calculate_health_score(food_name: str, category: str, calories: float, prote
     if category in ['Sayuran', 'Buah-buahan']:
         score += 0.5
     
-    # Health condition specific scoring
+    # Health condition specific scoring (the original four conditions; the
+    # backend scores every condition from catalog.conditions.CONDITION_RULES)
     for condition in health_conditions:
         if condition == 'diabetes':
             if carbs <= 25 and sugar <= 5:
@@ -189,6 +243,28 @@ def calculate_health_score(food_name: str, category: str, calories: float, prote
     
     return max(1, min(5, int(round(score))))
 
+def add_food_features(table):
+    """Precompute category, fiber and sugar once per dataset version"""
+    categories = [categorize_food(name) for name in table['name']]
+    fiber_sugar = [
+        estimate_fiber_sugar(name, category, calories, carbs)
+        for name, category, calories, carbs in zip(table['name'], categories, table['calories'], table['carbohydrate'])
+    ]
+    table = dict(table)
+    table['category'] = categories
+    table['fiber'] = array('d', (fiber for fiber, _ in fiber_sugar))
+    table['sugar'] = array('d', (sugar for _, sugar in fiber_sugar))
+    return table
+
+def iter_foods(table):
+    """Yield one dict per food (column name -> value)"""
+    columns = list(table)
+    for values in zip(*(table[column] for column in columns)):
+        yield dict(zip(columns, values))
+
+# Parse the dataset once at cold start
+load_dataset()
+
 # Root endpoint
 @https_fn.on_request()
 def root(req: https_fn.Request) -> https_fn.Response:
@@ -210,8 +286,8 @@ def root(req: https_fn.Request) -> https_fn.Response:
 def get_foods(req: https_fn.Request) -> https_fn.Response:
     """Get all foods from dataset"""
     try:
-        df = load_dataset()
-        if df is None:
+        table = load_dataset()
+        if table is None:
             return https_fn.Response(
                 json.dumps({'error': 'Dataset not found'}),
                 status=404,
@@ -219,7 +295,7 @@ def get_foods(req: https_fn.Request) -> https_fn.Response:
             )
         
         foods = []
-        for _, food in df.iterrows():
+        for food in iter_foods(table):
             food_dict = {
                 'id': food['id'],
                 'name': food['name'],
@@ -228,7 +304,7 @@ def get_foods(req: https_fn.Request) -> https_fn.Response:
                 'fat': food['fat'],
                 'carbohydrate': food['carbohydrate'],
                 'image': food.get('image', ''),
-                'category': categorize_food(food['name'])
+                'category': food['category']
             }
             foods.append(food_dict)
         
@@ -284,7 +360,7 @@ def health_check(req: https_fn.Request) -> https_fn.Response:
     """Health check endpoint"""
     response_data = {
         'status': 'healthy',
-        'timestamp': pd.Timestamp.now().isoformat()
+        'timestamp': datetime.now().isoformat()
     }
     
     return https_fn.Response(
@@ -330,8 +406,8 @@ def get_recommendations(req: https_fn.Request) -> https_fn.Response:
         available_ingredients = data.get('available_ingredients', [])
         target_calories = data.get('target_calories', 2000)
         
-        df = load_dataset()
-        if df is None:
+        table = load_dataset()
+        if table is None:
             return https_fn.Response(
                 json.dumps({'error': 'Dataset not found'}),
                 status=404,
@@ -340,7 +416,7 @@ def get_recommendations(req: https_fn.Request) -> https_fn.Response:
         
         recommended_foods = []
         
-        for _, food in df.iterrows():
+        for food in iter_foods(table):
             # Filter by available ingredients if provided
             if available_ingredients:
                 food_name_lower = food['name'].lower()
@@ -348,9 +424,9 @@ def get_recommendations(req: https_fn.Request) -> https_fn.Response:
                 if not ingredient_match:
                     continue
             
-            # Get category and estimate fiber/sugar
-            category = categorize_food(food['name'])
-            fiber, sugar = estimate_fiber_sugar(food['name'], category, food['calories'], food['carbohydrate'])
+            # Category and fiber/sugar were precomputed when the dataset was loaded
+            category = food['category']
+            fiber, sugar = food['fiber'], food['sugar']
             
             # Calculate health score
             health_score = calculate_health_score(